@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tabla de alias de artistas (mapeo manual de correcciones).
+
+La tabla vive fuera del código (aliases.json, o la que se pase con --aliases):
+cada entrada es una subcadena a buscar y el artista correcto. `AliasResolver`
+la compila una sola vez en un autómata de Aho-Corasick, así que buscar todas
+las subcadenas en un texto es un solo recorrido del texto en lugar de un
+`in` por cada alias. Reglas, en orden:
+
+- si el texto en minúsculas es exactamente un alias, gana ese alias;
+- si no, gana el primer alias de la tabla (en el orden del archivo) que
+  aparece como subcadena del texto en minúsculas.
+
+La misma instancia resuelve los usernames al clasificar
+(find_best_artist_match) y normaliza los nombres de artista antes de agregar,
+y guarda el resultado de cada valor distinto: cada username o artista se
+resuelve una sola vez por ejecución.
+"""
+
+import csv
+import json
+from collections import deque
+
+
+def load_aliases(path):
+    """
+    Lee la tabla de alias: un objeto JSON {alias: artista} o un CSV con
+    columnas alias,artista. Retorna un dict en el orden del archivo.
+    """
+    if path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = csv.reader(f)
+            next(rows, None)
+            return {alias: artist for alias, artist in rows}
+    with open(path, 'r', encoding='utf-8') as f:
+        aliases = json.load(f)
+    if not isinstance(aliases, dict):
+        raise ValueError(f'{path}: se espera un objeto {{alias: artista}}')
+    return aliases
+
+
+class AliasResolver:
+    """Alias compilados en un autómata de Aho-Corasick, con caché por valor."""
+
+    def __init__(self, aliases):
+        # Los textos se comparan en minúsculas; si dos alias quedan iguales gana el primero
+        self.aliases = {}
+        for alias, artist in aliases.items():
+            if alias:
+                self.aliases.setdefault(alias.lower(), artist)
+        self._artists = list(self.aliases.values())
+
+        # Trie de los alias; cada nodo guarda la menor prioridad (posición en la
+        # tabla) de los alias que terminan en él o en su cadena de sufijos
+        self._goto = [{}]
+        self._output = [None]
+        for priority, alias in enumerate(self.aliases):
+            node = 0
+            for char in alias:
+                following = self._goto[node].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[node][char] = following
+                    self._goto.append({})
+                    self._output.append(None)
+                node = following
+            if self._output[node] is None:
+                self._output[node] = priority
+
+        # Enlaces de falla en orden BFS (el sufijo propio más largo que está en el trie)
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, following in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[following] = fail
+                inherited = self._output[fail]
+                if inherited is not None and (self._output[following] is None
+                                              or inherited < self._output[following]):
+                    self._output[following] = inherited
+                queue.append(following)
+
+        self._lookups = {}
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def _search(self, text):
+        """Prioridad del primer alias de la tabla contenido en `text` (o None)."""
+        goto, fail, output = self._goto, self._fail, self._output
+        best = None
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = output[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+    def lookup(self, text):
+        """Artista del alias que corresponde a `text`, o None si ninguno aplica."""
+        try:
+            return self._lookups[text]
+        except KeyError:
+            pass
+        lower = text.lower()
+        artist = self.aliases.get(lower)
+        if artist is None:
+            priority = self._search(lower)
+            artist = self._artists[priority] if priority is not None else None
+        self._lookups[text] = artist
+        return artist
+
+    def normalize(self, artist_name):
+        """Nombre de artista corregido por la tabla (el mismo si ningún alias aplica)."""
+        artist = self.lookup(artist_name)
+        return artist if artist is not None else artist_name
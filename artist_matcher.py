@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice precompilado de artistas para clasificar posts de TikTok e Instagram.
+
+`ArtistMatcher` se construye una sola vez a partir de `load_artists()` y
+reproduce exactamente las reglas de `find_artist` (process_data.py) y de la
+parte difusa de `find_best_artist_match` (process_data_v2.py), pero sin
+recorrer todo el roster en cada fila:
+
+- los nombres normalizados y en minúsculas se calculan una vez;
+- las menciones exactas se resuelven con un mapa hash;
+- las coincidencias de nombre completo se filtran con un índice de trigramas
+  antes de aplicar la regex con `\\b` (compilada una sola vez por artista);
+- la similitud con SequenceMatcher solo se calcula sobre los candidatos cuyo
+  límite superior (la cota 2·LCS/T de fuzzy_kernel.py, calculada contra todo
+  el roster a la vez, o sin NumPy por longitud y bigramas compartidos, y
+  quick_ratio) todavía puede superar al mejor resultado encontrado;
+- el resultado difuso de cada mención se guarda en una `MatchCache`.
+
+Con `aliases` (AliasResolver, aliases.py) el matcher lleva también la tabla
+de alias compilada, para que los procesos de --workers la reciban junto con
+el roster.
+"""
+
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import fuzzy_kernel
+from match_cache import MatchCache
+
+NO_ARTIST = "Sin artista"
+
+MENTION_RE = re.compile(r'@(\w+)')
+
+
+def normalize_text(text):
+    """Normaliza texto removiendo espacios y caracteres especiales."""
+    if not text:
+        return ""
+    return ''.join(c.lower() for c in text if c.isalnum())
+
+
+def ngrams(text, n):
+    """Conjunto de n-gramas (subcadenas de longitud n) de un texto."""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _rarest_ngram(text, n, frequency):
+    """Elige el n-grama menos frecuente del roster como llave de índice."""
+    return min(sorted(ngrams(text, n)), key=lambda g: frequency[g])
+
+
+class _FuzzyIndex:
+    """
+    Índice de bigramas y longitudes sobre un conjunto de llaves para buscar la
+    llave con mayor SequenceMatcher.ratio() frente a una consulta.
+
+    Empates se resuelven a favor del índice más bajo, igual que los bucles
+    originales que solo reemplazan al mejor con un `>` estricto.
+    """
+
+    def __init__(self, keys, query_first):
+        self.keys = keys
+        # En process_data.py el artista es `a` y la mención `b`; en
+        # process_data_v2.py es al revés. ratio() no es simétrico.
+        self.query_first = query_first
+        self.by_length = defaultdict(list)
+        self.bigrams = defaultdict(list)
+        for idx, key in enumerate(keys):
+            self.by_length[len(key)].append(idx)
+            for gram in ngrams(key, 2):
+                self.bigrams[gram].append(idx)
+        self._key_matchers = {}
+        self._kernel = fuzzy_kernel.LcsKernel(keys) if fuzzy_kernel.available() else None
+
+    def _ratio_matcher(self, query):
+        """Devuelve una función idx -> SequenceMatcher listo para comparar."""
+        if self.query_first:
+            matchers = self._key_matchers
+
+            def score(idx):
+                sm = matchers.get(idx)
+                if sm is None:
+                    sm = matchers[idx] = SequenceMatcher(None, '', self.keys[idx])
+                sm.set_seq1(query)
+                return sm
+        else:
+            sm = SequenceMatcher(None, '', query)
+
+            def score(idx):
+                sm.set_seq1(self.keys[idx])
+                return sm
+        return score
+
+    def best_many(self, queries, floor):
+        """best() de varias consultas, con la cota de todas calculada en lote."""
+        if self._kernel is None:
+            return [self.best(query, floor) for query in queries]
+        return [self._best_bounded(query, bounds, floor)
+                for query, bounds in zip(queries, self._kernel.bounds(queries))]
+
+    def _best_bounded(self, query, bounds, floor):
+        """best() recorriendo las llaves de mayor a menor cota (`bounds` por llave)."""
+        best_score, best_idx = floor, None
+        matcher_for = self._ratio_matcher(query)
+        candidates = [idx for idx, bound in enumerate(bounds) if bound >= floor]
+        # De mayor a menor cota y, con la misma cota, en orden del roster
+        candidates.sort(key=lambda idx: -bounds[idx])
+        for idx in candidates:
+            bound = bounds[idx]
+            # Ninguna llave posterior puede superar al mejor (misma cota e índice mayor, o menor cota)
+            if bound < best_score or (bound == best_score and best_idx is not None and idx > best_idx):
+                break
+            sm = matcher_for(idx)
+            quick = sm.quick_ratio()
+            if quick < best_score or (quick == best_score and best_idx is not None and idx > best_idx):
+                continue
+            score = sm.ratio()
+            if score > best_score or (score == best_score and (best_idx is None or idx < best_idx)):
+                best_score, best_idx = score, idx
+        return best_score, best_idx
+
+    def best(self, query, floor):
+        """
+        Retorna (score, idx) de la llave con mayor similitud >= floor,
+        o (floor, None) si ninguna alcanza el umbral.
+        """
+        if self._kernel is not None:
+            return self._best_bounded(query, self._kernel.bounds([query])[0], floor)
+        best_score, best_idx = floor, None
+        query_len = len(query)
+        matcher_for = self._ratio_matcher(query)
+
+        def beats(score, idx):
+            return score > best_score or (
+                score == best_score and (best_idx is None or idx < best_idx))
+
+        def evaluate(idx):
+            nonlocal best_score, best_idx
+            sm = matcher_for(idx)
+            if not beats(sm.quick_ratio(), idx):
+                return
+            score = sm.ratio()
+            if beats(score, idx):
+                best_score, best_idx = score, idx
+
+        # 1) Candidatos que comparten bigramas, de más a menos compartidos
+        shared = defaultdict(int)
+        for gram in ngrams(query, 2):
+            for idx in self.bigrams.get(gram, ()):
+                shared[idx] += 1
+        for idx in sorted(shared, key=lambda i: (-shared[i], i)):
+            if beats(_length_bound(len(self.keys[idx]), query_len), idx):
+                evaluate(idx)
+
+        # 2) Resto del roster: sin bigramas compartidos todos los bloques
+        #    coincidentes son de un carácter, lo que acota el ratio.
+        for key_len, bucket in self.by_length.items():
+            bound = _no_bigram_bound(key_len, query_len)
+            if not beats(bound, bucket[0]):
+                continue
+            for idx in bucket:
+                if idx not in shared and beats(bound, idx):
+                    evaluate(idx)
+
+        return best_score, best_idx
+
+
+def _length_bound(len_a, len_b):
+    """Cota superior de ratio() dada solo la longitud de ambas cadenas."""
+    total = len_a + len_b
+    if not total:
+        return 1.0
+    return 2.0 * min(len_a, len_b) / total
+
+
+def _no_bigram_bound(len_a, len_b):
+    """
+    Cota superior de ratio() cuando las cadenas no comparten ningún bigrama:
+    cada par de bloques consecutivos deja un hueco en al menos una de ellas,
+    así que hay como máximo (len_a + len_b + 1) // 3 coincidencias.
+    """
+    total = len_a + len_b
+    if not total:
+        return 1.0
+    matches = min(len_a, len_b, (total + 1) // 3)
+    return 2.0 * matches / total
+
+
+class ArtistMatcher:
+    """Roster de artistas precompilado para clasificar descripciones."""
+
+    def __init__(self, artists, cache=None, aliases=None):
+        self.artists = list(artists)
+        self.cache = cache if cache is not None else MatchCache()
+        self.aliases = aliases
+        # Resultados difusos calculados en lote (score_usernames) que aún no pasan por la caché
+        self._scored = {}
+        self._lower = [a.lower() for a in self.artists]
+        self._norm = [normalize_text(a) for a in self.artists]
+
+        # Mención exacta (en minúsculas) -> primer artista con ese nombre
+        self._exact = {}
+        for idx, lower in enumerate(self._lower):
+            self._exact.setdefault(lower, idx)
+
+        # Nombre normalizado -> primer artista, para "artista contenido en la
+        # mención"; solo cuentan nombres de más de 3 caracteres
+        self._norm_exact = {}
+        for idx, norm in enumerate(self._norm):
+            if len(norm) > 3:
+                self._norm_exact.setdefault(norm, idx)
+        self._max_norm_len = max((len(n) for n in self._norm_exact), default=0)
+
+        # Nombres normalizados concatenados en orden del roster para
+        # "mención contenida en el artista": str.find devuelve el primero
+        long_names = [(idx, norm) for idx, norm in enumerate(self._norm) if len(norm) > 3]
+        self._joined_idx = [idx for idx, _ in long_names]
+        self._joined_offsets = []
+        offset = 0
+        for _, norm in long_names:
+            self._joined_offsets.append(offset)
+            offset += len(norm) + 1
+        self._joined = '\x00'.join(norm for _, norm in long_names)
+
+        # Índices de trigramas para nombre completo, palabras y subcadena
+        # normalizada; los nombres demasiado cortos siempre son candidatos
+        lower_freq = defaultdict(int)
+        for lower in self._lower:
+            for gram in ngrams(lower, 3):
+                lower_freq[gram] += 1
+        norm_freq = defaultdict(int)
+        for norm in self._norm:
+            for gram in ngrams(norm, 3):
+                norm_freq[gram] += 1
+
+        self._name_index = defaultdict(list)
+        self._short_names = []
+        self._word_index = defaultdict(list)
+        self._words = {}
+        self._substring_index = defaultdict(list)
+        for idx, lower in enumerate(self._lower):
+            if len(lower) >= 3:
+                self._name_index[_rarest_ngram(lower, 3, lower_freq)].append(idx)
+            else:
+                self._short_names.append(idx)
+
+            words = lower.split()
+            if len(words) > 1:
+                self._words[idx] = words
+                for word in words:
+                    if len(word) > 2:
+                        self._word_index[_rarest_ngram(word, 3, lower_freq)].append(idx)
+
+            norm = self._norm[idx]
+            if len(norm) > 4:
+                self._substring_index[_rarest_ngram(norm, 3, norm_freq)].append(idx)
+
+        self._patterns = {}
+        self._norm_fuzzy = _FuzzyIndex(self._norm, query_first=False)
+        self._lower_fuzzy = _FuzzyIndex(self._lower, query_first=True)
+
+    def __len__(self):
+        return len(self.artists)
+
+    def _fuzzy(self, kind, index, query, threshold):
+        """Mejor artista difuso (>= threshold) para una mención, vía caché."""
+        key = (kind, threshold, query)
+        value = self.cache.get(key)
+        if value is None:
+            value = self._scored.pop(key, None)
+            if value is None:
+                value = index.best(query, threshold)
+            self.cache.put(key, value)
+        return value
+
+    def score_usernames(self, usernames, threshold=0.6):
+        """
+        Calcula en lote el resultado difuso de best_match de los usernames que
+        no están en la caché (una pasada de la cota contra todo el roster).
+        """
+        queries = sorted({username.lower() for username in usernames})
+        queries = [query for query in queries
+                   if ('best_match', threshold, query) not in self.cache
+                   and ('best_match', threshold, query) not in self._scored]
+        for query, value in zip(queries, self._lower_fuzzy.best_many(queries, threshold)):
+            self._scored[('best_match', threshold, query)] = value
+        return len(queries)
+
+    def _pattern(self, idx):
+        pattern = self._patterns.get(idx)
+        if pattern is None:
+            pattern = self._patterns[idx] = re.compile(
+                r'\b' + re.escape(self._lower[idx]) + r'\b')
+        return pattern
+
+    def _mention_hit(self, mention):
+        """Primer artista que coincide con la mención (exacta o parcial)."""
+        hits = []
+        exact = self._exact.get(mention.lower())
+        if exact is not None:
+            hits.append(exact)
+
+        mention_norm = normalize_text(mention)
+        # Artista contenido en la mención
+        size = len(mention_norm)
+        for length in range(4, min(size, self._max_norm_len) + 1):
+            for start in range(size - length + 1):
+                idx = self._norm_exact.get(mention_norm[start:start + length])
+                if idx is not None:
+                    hits.append(idx)
+        # Mención contenida en el artista
+        pos = self._joined.find(mention_norm)
+        if pos >= 0 and self._joined_idx:
+            hits.append(self._joined_idx[bisect_right(self._joined_offsets, pos) - 1])
+
+        return min(hits) if hits else None
+
+    def _description_hit(self, description_lower, limit):
+        """Primer artista (< limit) por nombre completo o por sus palabras."""
+        grams = ngrams(description_lower, 3)
+        candidates = set(self._short_names)
+        word_hits = defaultdict(int)
+        for gram in grams:
+            candidates.update(self._name_index.get(gram, ()))
+            for idx in self._word_index.get(gram, ()):
+                word_hits[idx] += 1
+        for idx, hits in word_hits.items():
+            if hits >= len(self._words[idx]) * 0.7:
+                candidates.add(idx)
+
+        for idx in sorted(candidates):
+            if idx >= limit:
+                break
+            lower = self._lower[idx]
+            if lower in description_lower and self._pattern(idx).search(description_lower):
+                return idx
+            words = self._words.get(idx)
+            if words:
+                words_found = sum(1 for word in words if len(word) > 2 and word in description_lower)
+                if words_found >= len(words) * 0.7:
+                    return idx
+        return None
+
+    def find_artist(self, description, threshold=0.75):
+        """
+        Encuentra el artista en la descripción con las reglas de
+        process_data.py. Retorna el nombre del artista o "Sin artista".
+        """
+        if not description:
+            return NO_ARTIST
+
+        description_lower = description.lower()
+        description_normalized = normalize_text(description)
+        mentions = MENTION_RE.findall(description)
+
+        # Reglas de retorno inmediato: gana el primer artista del roster
+        first = len(self.artists)
+        for mention in mentions:
+            idx = self._mention_hit(mention)
+            if idx is not None and idx < first:
+                first = idx
+        idx = self._description_hit(description_lower, first)
+        if idx is not None:
+            first = idx
+        if first < len(self.artists):
+            return self.artists[first]
+
+        # Similitud: nombre normalizado contenido en la descripción (0.85)
+        best_score, best_idx = 0, None
+        for gram in ngrams(description_normalized, 3):
+            for idx in self._substring_index.get(gram, ()):
+                if self._norm[idx] in description_normalized:
+                    if 0.85 > best_score or (0.85 == best_score and idx < best_idx):
+                        best_score, best_idx = 0.85, idx
+
+        # Similitud con SequenceMatcher contra cada @mention
+        for mention_norm in {normalize_text(m) for m in mentions}:
+            score, idx = self._fuzzy('find_artist', self._norm_fuzzy, mention_norm, threshold)
+            if idx is not None and (score > best_score or (
+                    score == best_score and best_idx is not None and idx < best_idx)):
+                best_score, best_idx = score, idx
+
+        if best_score >= threshold:
+            return self.artists[best_idx] if best_idx is not None else None
+        return NO_ARTIST
+
+    def best_match(self, usernames, threshold=0.6):
+        """
+        Artista más similar a los usernames con las reglas difusas de
+        find_best_artist_match. Retorna (artista, similitud) o (None, 0).
+        """
+        best_artist = None
+        best_similarity = 0
+        for username in usernames:
+            score, idx = self._fuzzy('best_match', self._lower_fuzzy, username.lower(), threshold)
+            # Un username posterior solo reemplaza con similitud estrictamente mayor
+            if idx is not None and score > best_similarity:
+                best_similarity = score
+                best_artist = self.artists[idx]
+        return best_artist, best_similarity
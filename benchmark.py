@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de process_data.py y process_data_v2.py con datos sintéticos.
+
+Genera exports de TikTok e Instagram con las mismas columnas que los reales
+(video_url, publish_date, 'Visualizaciones', 'Me gusta', 'Enlace permanente',
+...), menciones con distribución tipo Zipf sobre un roster sintético de
+artistas, y mide cada etapa de ambos scripts: load, classify, ir,
+monthly_aggregation, artist_stats, rollup y serialization. También mide la
+memoria que ocupan los posts parseados por process_data.py como engine.Post
+(__slots__) contra los dicts de 10 llaves que se usaban antes.
+
+Uso:
+    python benchmark.py                                  # 10k/100k/1M filas x 100/1k/5k artistas
+    python benchmark.py --rows 10000 --artists 100 1000
+    python benchmark.py --compare .cache/benchmarks/results-20250101-120000.json
+
+Los resultados se guardan en JSON (.cache/benchmarks/ por omisión). Con
+--compare se marcan las etapas que se hicieron más lentas que el umbral y el
+script termina con código 1.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import instrumentation
+import process_data as v1
+from aliases import AliasResolver, load_aliases
+from artist_matcher import ArtistMatcher
+from match_cache import MatchCache
+
+# Subir este número si cambia el formato de resultados o el generador
+BENCHMARK_VERSION = 1
+
+BENCHMARK_DIR = '.cache/benchmarks'
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+DEFAULT_ARTISTS = [100, 1000, 5000]
+
+# Arriba de este tamaño el export de TikTok para v2 se escribe en CSV (openpyxl es muy lento)
+XLSX_MAX_ROWS = 100_000
+
+# Posts de Instagram con los que se mide la memoria por registro
+MEMORY_SAMPLE_ROWS = 100_000
+
+# Etapas más rápidas que esto no se comparan (ruido)
+MIN_COMPARE_SECONDS = 0.05
+
+FIRST_NAMES = ['Carlos', 'Camila', 'Natalia', 'Sofía', 'Alejandro', 'Diego', 'Valentina', 'Mariana',
+               'José', 'Luis', 'Ana', 'Lucía', 'Mateo', 'Julián', 'Ximena', 'Renata', 'Fernando',
+               'Andrés', 'Paola', 'Daniela', 'Eden', 'Nathy', 'Mon', 'Juan', 'Neto', 'Dove']
+LAST_NAMES = ['Rivera', 'Peluso', 'Muñoz', 'Bernal', 'Fonseca', 'López', 'García', 'Hernández',
+              'Martínez', 'Torres', 'Ramírez', 'Flores', 'Gómez', 'Díaz', 'Vargas', 'Castillo',
+              'Ortega', 'Romero', 'Navarro', 'Ibáñez', 'Laferte', 'Cameron', 'Alejandro']
+SYLLABLES = ['ma', 'lu', 'ra', 'ke', 'zo', 'ti', 'ne', 'ba', 'ro', 'li', 'ya', 'gi', 'pe', 'dú',
+             'ka', 'mi', 'sa', 'to', 'ré', 'vi']
+BAND_PREFIXES = ['Los', 'Grupo', 'Banda', 'La', 'Fuerza']
+HANDLE_SUFFIXES = ['', '', '', 'oficial', 'music', 'mx', '_', 'official']
+OTHER_ACCOUNTS = ['sonymusicmx', 'sonymusiclatin', 'spotifymexico', 'applemusic', 'tiktokmx',
+                  'purotalentop', 'fanclub_oficial', 'radio_mx']
+HASHTAGS = ['NuevoSencillo', 'YaDisponible', 'Tour2025', 'EnVivo', 'Acústico', 'Estreno',
+            'RegionalMexicano', 'Pop', 'Reggaeton', 'Corridos']
+
+
+@contextmanager
+def stage_timer(results, stage):
+    """Acumula en `results[stage]` los segundos del bloque."""
+    start = time.perf_counter()
+    yield
+    results[stage] += time.perf_counter() - start
+
+
+def strip_accents(text):
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def make_roster(count, rng):
+    """Roster de `count` artistas únicos: nombre y apellido, nombres artísticos y grupos."""
+    roster = []
+    seen = set()
+    while len(roster) < count:
+        kind = rng.random()
+        if kind < 0.55:
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        else:
+            word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+            if kind < 0.8:
+                name = word.upper() if rng.random() < 0.2 else word
+            else:
+                name = f'{rng.choice(BAND_PREFIXES)} {word}'
+        if name in seen:
+            name = f'{name} {len(roster)}'
+        seen.add(name)
+        roster.append(name)
+    return roster
+
+
+def make_handle(name, rng):
+    base = ''.join(c for c in strip_accents(name).lower() if c.isalnum())
+    return base + rng.choice(HANDLE_SUFFIXES)
+
+
+class DescriptionGenerator:
+    """Descripciones con menciones: pocos artistas acumulan la mayoría (Zipf)."""
+
+    def __init__(self, roster, rng):
+        self.rng = rng
+        self.roster = roster
+        self.handles = [make_handle(name, rng) for name in roster]
+        weights = [1 / (rank + 1) ** 1.1 for rank in range(len(roster))]
+        self.cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            self.cum_weights.append(total)
+        self.indices = range(len(roster))
+        self.other_accounts = OTHER_ACCOUNTS + [f'user{rng.randint(1000, 99999)}' for _ in range(200)]
+
+    def artist(self):
+        return self.rng.choices(self.indices, cum_weights=self.cum_weights)[0]
+
+    def __call__(self):
+        rng = self.rng
+        tag = rng.choice(HASHTAGS)
+        kind = rng.random()
+        if kind < 0.30:
+            return f'#{tag} #{rng.choice(HASHTAGS)} 🎶'
+        if kind < 0.70:
+            return f'¡Ya disponible! Escucha lo nuevo de @{self.handles[self.artist()]} 🔥 #{tag}'
+        if kind < 0.80:
+            return f'Mood: esperando lo nuevo de {self.roster[self.artist()]} 🤠 #{tag}'
+        if kind < 0.90:
+            return (f'@{self.handles[self.artist()]} x @{self.handles[self.artist()]} '
+                    f'con @{rng.choice(self.other_accounts)} #{tag}')
+        return f'Gracias a todos los que fueron al show 🙌🏽 @{rng.choice(self.other_accounts)}'
+
+
+def make_metrics(rng):
+    views = int(rng.lognormvariate(9, 1.5))
+    likes = int(views * rng.uniform(0.01, 0.15))
+    return {
+        'views': views,
+        'likes': likes,
+        'comments': int(likes * rng.uniform(0, 0.1)),
+        'shares': int(likes * rng.uniform(0, 0.2)),
+        'collects': int(likes * rng.uniform(0, 0.15)),
+    }
+
+
+def generate_dataset(directory, rows, artists, seed=1):
+    """
+    Escribe el roster y los exports sintéticos en `directory` (si no existen ya)
+    y retorna sus rutas.
+    """
+    paths = {
+        'roster': os.path.join(directory, 'ArtistasSME.xlsx'),
+        'tiktok_v1': os.path.join(directory, 'tiktok_full_dataset.csv'),
+        'tiktok_v2': os.path.join(directory, 'SMETikTokAccount.xlsx' if rows <= XLSX_MAX_ROWS
+                                  else 'SMETikTokAccount.csv'),
+        'instagram': os.path.join(directory, 'instagram_posts_by_accounts.csv'),
+    }
+    done_marker = os.path.join(directory, '.complete')
+    if os.path.exists(done_marker):
+        return paths
+    os.makedirs(directory, exist_ok=True)
+
+    rng = random.Random(seed)
+    roster = make_roster(artists, rng)
+    describe = DescriptionGenerator(roster, rng)
+    first_day = date(2021, 1, 1)
+    days = (date(2025, 12, 31) - first_day).days
+
+    with open(paths['roster'], 'w', encoding='utf-8') as f:
+        f.write('"main_artist"\n')
+        for name in roster:
+            f.write(f'"{name}"\n')
+
+    tiktok_v2_rows = []
+    with open(paths['tiktok_v1'], 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['video_url', 'publish_date', 'views', 'likes', 'comments', 'shares'])
+        for i in range(rows):
+            published = datetime.combine(first_day + timedelta(days=rng.randrange(days)), datetime.min.time())
+            published += timedelta(seconds=rng.randrange(86400))
+            metrics = make_metrics(rng)
+            url = f'https://www.tiktok.com/@sonymusicmx/video/{7000000000000000000 + i}'
+            writer.writerow([url, published.strftime('%Y-%m-%d %H:%M:%S'), metrics['views'],
+                             metrics['likes'], metrics['comments'], metrics['shares']])
+            tiktok_v2_rows.append([published.strftime('%Y-%m-%d %H:%M:%S'), describe(), metrics['views'],
+                                   metrics['likes'], metrics['comments'], metrics['shares'],
+                                   metrics['collects'], url])
+
+    columns = ['date', 'description', 'plays', 'likes', 'comments', 'shares', 'collects', 'video_id']
+    if paths['tiktok_v2'].endswith('.xlsx'):
+        import pandas as pd
+        pd.DataFrame(tiktok_v2_rows, columns=columns).to_excel(paths['tiktok_v2'], index=False)
+    else:
+        with open(paths['tiktok_v2'], 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(tiktok_v2_rows)
+    del tiktok_v2_rows
+
+    with open(paths['instagram'], 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'Descripción', 'Visualizaciones', 'Alcance', 'Me gusta', 'Comentarios',
+                         'Veces que se compartió', 'Veces que se guardó', 'Enlace permanente'])
+        for i in range(rows):
+            metrics = make_metrics(rng)
+            # Los posts anteriores a los reels no traen visualizaciones
+            views = metrics['views'] if rng.random() < 0.7 else 0
+            writer.writerow([(first_day + timedelta(days=rng.randrange(days))).isoformat(), describe(),
+                             views, metrics['views'] + rng.randint(0, 50), metrics['likes'],
+                             metrics['comments'], metrics['shares'], metrics['collects'],
+                             f'https://www.instagram.com/reel/C{i:010d}/'])
+
+    open(done_marker, 'w').close()
+    return paths
+
+
+def stage_seconds(run, default_platform):
+    """{plataforma: {etapa: segundos}} a partir de la instrumentación de una corrida."""
+    results = defaultdict(lambda: defaultdict(float))
+    for (platform_name, stage), data in run.stages.items():
+        results[platform_name or default_platform][stage] += data.seconds
+    return results
+
+
+def bench_v1(paths, artists, output_dir):
+    """Etapas de process_data.py, medidas con su propia instrumentación."""
+    run = instrumentation.start_run('benchmark')
+    matcher = ArtistMatcher(artists, MatchCache())
+    for spec in v1.PLATFORMS:
+        spool = v1.process_platform(spec.with_path(paths.get(spec.name + '_v1') or paths[spec.name]), matcher)
+        with instrumentation.stage('serialization', spec.name):
+            spool.write_partitioned(output_dir, spec.name)
+        spool.close()
+    return stage_seconds(run, 'all')
+
+
+def bench_v2(paths, artists):
+    """Etapas de process_data_v2.py (escribe en client/public del directorio actual)."""
+    import process_data_v2 as v2
+
+    run = instrumentation.start_run('benchmark')
+    matcher = ArtistMatcher(artists, MatchCache(), AliasResolver(load_aliases(v2.ALIASES_PATH)))
+    summaries = {}
+    rollups = []
+    for spec in v2.PLATFORMS:
+        summaries[spec.name], rollup, _ = v2.process_platform(
+            spec.with_path(paths.get(spec.name + '_v2') or paths[spec.name]), matcher)
+        rollups.append(rollup)
+    v2.generate_artist_stats(summaries)
+    v2.generate_rollup(rollups)
+    # Escribir artist_stats.json y rollup.json cuenta como parte de su etapa
+    results = stage_seconds(run, 'all')
+    results['all']['artist_stats'] += results.pop('artist_stats', {}).get('serialization', 0.0)
+    results['all']['rollup'] += results.pop('rollup', {}).get('serialization', 0.0)
+    return results
+
+
+def measure_records(paths):
+    """Bytes que retienen los posts parseados por process_data.py como dicts y como engine.Post."""
+    spec = v1.INSTAGRAM.with_path(paths['instagram'])
+    with open(spec.path, 'r', encoding='utf-8') as f:
+        rows = list(islice(csv.DictReader(f), MEMORY_SAMPLE_ROWS))
+    sizes = {}
+    for model, convert in (('dict', lambda post: post.to_dict()), ('Post', lambda post: post)):
+        tracemalloc.start()
+        records = [convert(parsed[1]) for parsed in (v1.parse_row(spec, row) for row in rows) if parsed]
+        sizes[model], _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del records
+    return {
+        'posts': len(rows),
+        'dict_bytes': sizes['dict'],
+        'post_bytes': sizes['Post'],
+        'reduction': round(1 - sizes['Post'] / sizes['dict'], 4) if sizes['dict'] else 0.0,
+    }
+
+
+def run_case(rows, artists, seed, repeat):
+    """
+    Genera (o reutiliza) el dataset y corre ambos scripts; retorna la mejor de
+    `repeat` corridas de cada etapa y la memoria por registro.
+    """
+    # Rutas absolutas: v2 corre dentro de un directorio temporal
+    directory = os.path.abspath(os.path.join(BENCHMARK_DIR, 'data', f'{rows}_{artists}_{seed}'))
+    paths = generate_dataset(directory, rows, artists, seed)
+    roster = v1.load_artists(paths['roster'])
+    best = {}
+    cwd = os.getcwd()
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='sme_bench_') as workdir:
+            runs = {'process_data.py': bench_v1(paths, roster, workdir)}
+            os.makedirs(os.path.join(workdir, 'client', 'public'))
+            os.chdir(workdir)
+            try:
+                # Los mensajes de progreso de v2 no aportan nada aquí
+                with redirect_stdout(io.StringIO()):
+                    runs['process_data_v2.py'] = bench_v2(paths, roster)
+            finally:
+                os.chdir(cwd)
+        for script, platforms in runs.items():
+            for platform_name, stages in platforms.items():
+                for stage, seconds in stages.items():
+                    key = (script, platform_name, stage)
+                    best[key] = min(seconds, best.get(key, seconds))
+
+    runs = [{
+        'rows': rows,
+        'artists': artists,
+        'script': script,
+        'platform': platform_name,
+        'stage': stage,
+        'seconds': round(seconds, 6),
+        'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+    } for (script, platform_name, stage), seconds in best.items()]
+    memory = dict(measure_records(paths), rows=rows, artists=artists)
+    return runs, memory
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_key(run):
+    return run['rows'], run['artists'], run['script'], run['platform'], run['stage']
+
+
+def compare(previous, current, threshold):
+    """Etapas que tardan más de `threshold` (fracción) que en `previous`."""
+    before = {run_key(run): run for run in previous['runs']}
+    regressions = []
+    for run in current['runs']:
+        old = before.get(run_key(run))
+        if old is None or old['seconds'] < MIN_COMPARE_SECONDS:
+            continue
+        change = run['seconds'] / old['seconds'] - 1
+        if change > threshold:
+            regressions.append((run, old, change))
+    return regressions
+
+
+def print_runs(runs):
+    print(f"{'filas':>9} {'artistas':>8}  {'script':<19} {'plataforma':<10} {'etapa':<20} {'segundos':>9} {'filas/s':>12}")
+    for run in runs:
+        rate = f"{run['rows_per_sec']:,.0f}" if run['rows_per_sec'] else '-'
+        print(f"{run['rows']:>9} {run['artists']:>8}  {run['script']:<19} {run['platform']:<10} "
+              f"{run['stage']:<20} {run['seconds']:>9.3f} {rate:>12}")
+
+
+def print_memory(memory):
+    print(f"Memoria de {memory['posts']:,} posts parseados: dict {memory['dict_bytes'] / 2**20:.1f} MB, "
+          f"Post {memory['post_bytes'] / 2**20:.1f} MB (-{memory['reduction']:.0%})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmarks de los scripts de procesamiento con datos sintéticos')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                        help='Filas por export (default: 10000 100000 1000000)')
+    parser.add_argument('--artists', type=int, nargs='+', default=DEFAULT_ARTISTS,
+                        help='Tamaños del roster de artistas (default: 100 1000 5000)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Corridas por caso; se guarda el mejor tiempo de cada etapa')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla del generador de datos')
+    parser.add_argument('--output', help='Archivo de resultados (default: .cache/benchmarks/results-<fecha>.json)')
+    parser.add_argument('--compare', help='Resultados anteriores contra los que marcar regresiones')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Aumento de tiempo (fracción) a partir del cual una etapa es regresión')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    runs = []
+    memory = []
+    for rows in args.rows:
+        for artists in args.artists:
+            print(f"\n=== {rows} filas, {artists} artistas ===")
+            case_runs, case_memory = run_case(rows, artists, args.seed, args.repeat)
+            print_runs(case_runs)
+            print_memory(case_memory)
+            runs.extend(case_runs)
+            memory.append(case_memory)
+
+    results = {
+        'version': BENCHMARK_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'runs': runs,
+        'memory': memory,
+    }
+    output = args.output or os.path.join(BENCHMARK_DIR, f"results-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(previous, results, args.threshold)
+        if not regressions:
+            print(f"Sin regresiones contra {args.compare}")
+            return 0
+        print(f"\n{len(regressions)} etapas más lentas que {args.compare} (umbral {args.threshold:.0%}):")
+        for run, old, change in regressions:
+            print(f"  {run['rows']} filas / {run['artists']} artistas  {run['script']} {run['platform']} "
+                  f"{run['stage']}: {old['seconds']:.3f}s -> {run['seconds']:.3f}s (+{change:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agregación por bloques para el modo --chunksize de process_data_v2.py.
+
+En ese modo los exports se leen por bloques de filas
+(ingest.read_export_chunks) con los tipos de `read_dtypes`, y cada bloque
+se clasifica, vuelca sus videos a disco (streaming.VideoSpool) y se resume:
+
+- `RunningStats` lleva por grupo (mes o artista) el número de posts y las
+  sumas de cada métrica. Las sumas son de Kahan, las mismas que hace pandas
+  en groupby().sum() y .mean(), y continúan de un bloque al siguiente en el
+  orden del export, así que totales y medias son bit a bit los de agrupar
+  el export completo.
+- `FactTable` guarda lo que no se puede resumir sin perder exactitud: la
+  mediana de views por mes y los cuantiles y sketches del cubo (rollup.py)
+  necesitan los valores. Es una fila compacta por post (mes y artista como
+  categóricas, métricas en int32 e IR en float64, unos 30 bytes), así que
+  esa parte de la memoria sigue creciendo con el número de posts, no con el
+  texto del export.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Filas por bloque si no se pasa un número
+DEFAULT_CHUNKSIZE = 100_000
+
+INT32 = np.iinfo(np.int32)
+
+# Mientras la suma de los valores absolutos no llegue aquí, las sumas de enteros en float64 son exactas
+EXACT_FLOAT_SUM = 2 ** 53
+
+
+def read_dtypes(metrics, text):
+    """
+    Tipos de lectura de las columnas. Las métricas se leen como float64 y no
+    como int32: un int32 al leer da la vuelta en silencio con valores fuera
+    de rango (3000000000 -> -1294967296) y no admite celdas vacías; float64
+    es exacto para enteros y deja los vacíos como NaN, igual que pandas al
+    leer el export completo.
+    """
+    dtypes = {column: 'float64' for column in metrics if column is not None}
+    dtypes.update({column: 'str' for column in text if column is not None})
+    return dtypes
+
+
+def compact_metric(values):
+    """
+    Métrica en int32 si todos sus valores son enteros que caben; si trae
+    vacíos o decimales se deja en float64 para que la mediana sea la misma
+    que sobre el export completo.
+    """
+    array = values.to_numpy()
+    if array.dtype.kind in 'iu' or (array.dtype.kind == 'f' and np.isfinite(array).all()
+                                    and (array == np.floor(array)).all()):
+        if not len(array) or (INT32.min <= array.min() and array.max() <= INT32.max):
+            return values.astype('int32')
+    return values
+
+
+def _kahan(sums, groups, values):
+    """Suma de Kahan por grupo, valor por valor (mismo algoritmo que el groupby de pandas)."""
+    for group, value in zip(groups, values):
+        entry = sums.get(group)
+        if entry is None:
+            entry = sums[group] = [0.0, 0.0, 0]
+        if value != value:
+            continue
+        entry[2] += 1
+        y = value - entry[1]
+        total = entry[0] + y
+        compensation = total - entry[0] - y
+        # Con infinitos la compensación es NaN; pandas la deja en 0
+        entry[1] = 0.0 if compensation != compensation else compensation
+        entry[0] = total
+
+
+class RunningStats:
+    """Posts y sumas por grupo que se van acumulando bloque por bloque."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        # Posts por grupo, en orden de primera aparición
+        self.size = {}
+        # {columna: {grupo: [suma, compensación, valores no nulos]}}
+        self._sums = {column: {} for column in self.columns}
+        # Suma de valores absolutos mientras todos han sido enteros (None cuando ya no)
+        self._magnitude = dict.fromkeys(self.columns, 0.0)
+
+    def add(self, groups, frame):
+        """Agrega un bloque: `groups` es la columna de grupo y `frame` trae las columnas."""
+        if not len(groups):
+            return
+        for group, count in groups.groupby(groups, sort=False, observed=True).size().items():
+            self.size[group] = self.size.get(group, 0) + int(count)
+        for column in self.columns:
+            values = frame[column].to_numpy(dtype=float)
+            sums = self._sums[column]
+            present = values[~np.isnan(values)]
+            magnitude = self._magnitude[column]
+            if magnitude is not None and np.isfinite(present).all() and (present == np.floor(present)).all():
+                magnitude += float(np.abs(present).sum())
+            else:
+                magnitude = None
+            if magnitude is not None and magnitude < EXACT_FLOAT_SUM:
+                # Todas las sumas parciales son enteros exactos: Kahan no compensa nada y se puede vectorizar
+                partial = pd.Series(values, index=groups.index).groupby(groups, sort=False, observed=True).agg(['sum', 'count'])
+                for group, total, count in zip(partial.index, partial['sum'], partial['count']):
+                    entry = sums.setdefault(group, [0.0, 0.0, 0])
+                    entry[0] += float(total)
+                    entry[2] += int(count)
+                self._magnitude[column] = magnitude
+            else:
+                _kahan(sums, groups.tolist(), values.tolist())
+                self._magnitude[column] = None
+
+    def total(self, group, column):
+        return self._sums[column].get(group, [0.0, 0.0, 0])[0]
+
+    def mean(self, group, column):
+        total, _, count = self._sums[column].get(group, [0.0, 0.0, 0])
+        return total / count if count else float('nan')
+
+
+class FactTable:
+    """Una fila compacta por post, agregada bloque por bloque."""
+
+    def __init__(self, columns):
+        # Columnas de métricas que se conservan
+        self.columns = list(columns)
+        self._chunks = []
+
+    def add(self, chunk):
+        """Agrega las filas de un bloque (con month y artist)."""
+        compact = {
+            'month': chunk['month'].astype('category'),
+            'artist': chunk['artist'].astype('category'),
+        }
+        for column in self.columns:
+            compact[column] = compact_metric(chunk[column])
+        compact['ir'] = chunk['ir'].astype(float)
+        self._chunks.append(pd.DataFrame(compact).reset_index(drop=True))
+
+    def frame(self):
+        """
+        La tabla completa en el orden del export. Las categorías de mes y
+        artista quedan ordenadas, así que agrupar por mes da el mismo orden
+        que con texto.
+        """
+        categories = {column: union_categoricals([chunk[column] for chunk in self._chunks], sort_categories=True)
+                      for column in ('month', 'artist')}
+        for chunk in self._chunks:
+            del chunk['month'], chunk['artist']
+        df = pd.concat(self._chunks, ignore_index=True)
+        self._chunks = []
+        df.insert(0, 'month', categories['month'])
+        df.insert(1, 'artist', categories['artist'])
+        return df
@@ -0,0 +1,113 @@
+// Carga de los datos mensuales del dashboard.
+//
+// El pipeline escribe por plataforma un manifest (`/data/<plataforma>/manifest.json`)
+// con las métricas de cada mes y un shard minificado con los videos de cada mes,
+// cuyo nombre lleva el hash de su contenido. Así solo se descargan los meses que
+// se necesitan y los shards se pueden cachear sin revalidar.
+
+export type MonthSummary<M> = Omit<M, 'all_videos'>;
+
+export type ManifestMonth<M> = MonthSummary<M> & {
+  shard: string;
+  sha256: string;
+};
+
+export interface Manifest<M> {
+  version: number;
+  platform: string;
+  months: Record<string, ManifestMonth<M>>;
+}
+
+// Shards ya descargados (o en curso), por ruta; la ruta cambia si cambia el contenido
+const shardCache = new Map<string, Promise<unknown[]>>();
+
+const fetchShard = (shard: string): Promise<unknown[]> => {
+  let request = shardCache.get(shard);
+  if (!request) {
+    request = fetch(`/${shard}`).then((response) => {
+      if (!response.ok) throw new Error(`HTTP ${response.status} al cargar ${shard}`);
+      return response.json();
+    });
+    request.catch(() => shardCache.delete(shard));
+    shardCache.set(shard, request);
+  }
+  return request;
+};
+
+// Manifest de una plataforma, o null si el pipeline se corrió con --single-file
+export const fetchManifest = async <M>(platform: string): Promise<Manifest<M> | null> => {
+  const response = await fetch(`/data/${platform}/manifest.json`, { cache: 'no-cache' });
+  if (!response.ok) return null;
+  try {
+    return await response.json();
+  } catch {
+    // Sin manifest el servidor de desarrollo responde con index.html
+    return null;
+  }
+};
+
+// Datos completos (métricas + all_videos) de los meses pedidos
+export const loadMonths = async <M extends { all_videos: unknown[] }>(
+  manifest: Manifest<M>,
+  months: string[],
+): Promise<Record<string, M>> => {
+  const entries = await Promise.all(
+    months.map(async (monthKey) => {
+      const { shard, sha256, ...summary } = manifest.months[monthKey];
+      const videos = await fetchShard(shard);
+      return [monthKey, { ...summary, all_videos: videos } as unknown as M] as const;
+    }),
+  );
+  return Object.fromEntries(entries);
+};
+
+// Formato anterior: un solo JSON con todos los meses y videos
+export const fetchSingleFile = async <M>(platform: string): Promise<Record<string, M>> => {
+  const response = await fetch(`/data_${platform}.json`);
+  return response.json();
+};
+
+// Cubo de agregados (rollup.json): una celda por plataforma, periodo y artista,
+// con '*' para los totales marginales
+export interface RollupCell {
+  count: number;
+  views: number;
+  likes: number;
+  shares: number;
+  comments: number;
+  collects: number;
+  ir: number;
+  avg_ir: number;
+  median_views: number;
+  views_quantiles: number[];
+}
+
+export interface Rollup {
+  version: number;
+  dimensions: string[];
+  all: string;
+  quantiles: number[];
+  cells: Record<string, Record<string, Record<string, RollupCell>>>;
+}
+
+// Cubo de agregados, o null si el pipeline no lo generó
+export const fetchRollup = async (): Promise<Rollup | null> => {
+  const response = await fetch('/rollup.json', { cache: 'no-cache' });
+  if (!response.ok) return null;
+  try {
+    return await response.json();
+  } catch {
+    return null;
+  }
+};
+
+// Celda de una combinación de filtros ('all' = todos), o null si no hay videos
+export const rollupCell = (
+  rollup: Rollup,
+  platform: string,
+  period: string = 'all',
+  artist: string = 'all',
+): RollupCell | null => {
+  const key = (value: string) => (value === 'all' ? rollup.all : value);
+  return rollup.cells[key(platform)]?.[key(period)]?.[key(artist)] ?? null;
+};
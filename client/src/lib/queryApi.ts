@@ -0,0 +1,49 @@
+// Cliente del servicio local de consultas (query_service.py).
+//
+// El servicio calcula en Python los agregados que antes se obtenían recorriendo
+// todos los `all_videos` en el navegador. Si no está corriendo, `probeQueryApi`
+// responde false y el dashboard sigue calculando con los shards descargados.
+
+export interface Page<T> {
+  total: number;
+  offset: number;
+  limit: number;
+  items: T[];
+}
+
+export interface ArtistRow {
+  artist: string;
+  videos: number;
+  avg_views: number;
+  avg_likes: number;
+  avg_ir: number;
+  metric: number;
+}
+
+export type QueryParams = Record<string, string | number | null | undefined>;
+
+const buildUrl = (endpoint: string, params: QueryParams): string => {
+  const search = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== null && value !== undefined && value !== '') search.set(key, String(value));
+  });
+  const query = search.toString();
+  return `/api/${endpoint}${query ? `?${query}` : ''}`;
+};
+
+// Consulta al servicio; lanza error si responde con un estado distinto de 2xx
+export const queryApi = async <T>(endpoint: string, params: QueryParams = {}, signal?: AbortSignal): Promise<T> => {
+  const response = await fetch(buildUrl(endpoint, params), { signal });
+  if (!response.ok) throw new Error(`HTTP ${response.status} al consultar ${endpoint}`);
+  return response.json();
+};
+
+// true si el servicio responde (sin él, el servidor de desarrollo devuelve index.html o un error)
+export const probeQueryApi = async (): Promise<boolean> => {
+  try {
+    await queryApi('meta');
+    return true;
+  } catch {
+    return false;
+  }
+};
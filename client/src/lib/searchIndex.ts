@@ -0,0 +1,105 @@
+// Índice de búsqueda (search/<plataforma>.json) que genera search_index.py.
+//
+// Los videos traen la descripción recortada, así que buscar un hashtag
+// recorriendo `all_videos` falla. El índice guarda por término (hashtag,
+// mención o palabra, en minúsculas y sin acentos) la lista de ids de los posts
+// con la descripción completa que lo contienen, como diferencias. El id de un
+// post es su posición en el orden de la salida: meses en orden y, dentro de
+// cada mes, el orden de `all_videos`.
+
+export interface SearchIndexData {
+  version: number;
+  platform: string;
+  months: [string, number][];
+  terms: Record<string, number[]>;
+}
+
+export interface SearchIndex {
+  data: SearchIndexData;
+  // Id del primer post de cada mes, en el orden de `data.months`
+  starts: number[];
+  decoded: Map<string, number[]>;
+}
+
+// Misma tokenización que search_index.py (hashtags, menciones y palabras)
+const TERM_PATTERN = /#[\p{L}\p{N}_]+|@[\p{L}\p{N}_.]*[\p{L}\p{N}_]|[\p{L}\p{N}_]+/gu;
+const MIN_WORD_LENGTH = 2;
+
+const fold = (text: string): string => text.toLowerCase().normalize('NFKD').replace(/\p{M}/gu, '');
+
+export const searchTerms = (text: string): string[] => {
+  const found = new Set<string>();
+  for (const term of fold(text).match(TERM_PATTERN) ?? []) {
+    if (term[0] === '#' || term[0] === '@' || [...term].length >= MIN_WORD_LENGTH) found.add(term);
+  }
+  return Array.from(found);
+};
+
+// Índice de la plataforma (o de un mes si se generó con --search-partitions), o null si no existe
+export const fetchSearchIndex = async (platform: string, month?: string): Promise<SearchIndex | null> => {
+  const path = month ? `/search/${platform}/${month}.json` : `/search/${platform}.json`;
+  const response = await fetch(path, { cache: 'no-cache' });
+  if (!response.ok) return null;
+  let data: SearchIndexData;
+  try {
+    data = await response.json();
+  } catch {
+    return null;
+  }
+  const starts: number[] = [];
+  let start = 0;
+  data.months.forEach(([, count]) => {
+    starts.push(start);
+    start += count;
+  });
+  return { data, starts, decoded: new Map() };
+};
+
+// Si el índice es de los mismos meses y posts que los datos (`counts`: posts por mes).
+// Un índice de otra ejecución llevaría los ids a videos equivocados
+export const matchesMonths = (index: SearchIndex, counts: Record<string, number>): boolean =>
+  index.data.months.length === Object.keys(counts).length &&
+  index.data.months.every(([month, count]) => counts[month] === count);
+
+const postings = (index: SearchIndex, term: string): number[] => {
+  let ids = index.decoded.get(term);
+  if (!ids) {
+    ids = [];
+    let current = 0;
+    (index.data.terms[term] ?? []).forEach((gap) => {
+      current += gap;
+      ids!.push(current);
+    });
+    index.decoded.set(term, ids);
+  }
+  return ids;
+};
+
+// Ids ordenados de los posts que contienen todos los términos de la búsqueda
+export const searchPosts = (index: SearchIndex, query: string): number[] => {
+  const lists = searchTerms(query)
+    .map((term) => postings(index, term))
+    .sort((a, b) => a.length - b.length);
+  if (lists.length === 0) return [];
+  let matches = new Set(lists[0]);
+  for (const ids of lists.slice(1)) {
+    matches = new Set(ids.filter((id) => matches.has(id)));
+    if (matches.size === 0) break;
+  }
+  return Array.from(matches).sort((a, b) => a - b);
+};
+
+// [mes, posición en all_videos] de un id
+export const locatePost = (index: SearchIndex, id: number): [string, number] | null => {
+  let low = 0;
+  let high = index.starts.length - 1;
+  while (low <= high) {
+    const middle = (low + high) >> 1;
+    if (index.starts[middle] <= id) low = middle + 1;
+    else high = middle - 1;
+  }
+  if (high < 0) return null;
+  const [month, count] = index.data.months[high];
+  const position = id - index.starts[high];
+  return position < count ? [month, position] : null;
+};
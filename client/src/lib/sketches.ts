@@ -0,0 +1,96 @@
+// Sketches de cuantiles (sketches.json).
+//
+// El pipeline guarda por plataforma un sketch de views, likes e ir por mes y por
+// artista: los valores ordenados si el grupo es chico, o los centroides de un
+// t-digest si es grande. Los sketches se combinan entre meses, así que la mediana
+// y la densidad del violin plot no necesitan recorrer todos los videos.
+
+export type SketchMetric = 'views' | 'likes' | 'ir';
+
+export interface ExactSketch {
+  count: number;
+  values: number[];
+}
+
+export interface DigestSketch {
+  count: number;
+  min: number;
+  max: number;
+  centroids: [number, number][];
+}
+
+export type Sketch = ExactSketch | DigestSketch;
+
+export type SketchGroup = Record<SketchMetric, Sketch>;
+
+export interface Sketches {
+  version: number;
+  exact_limit: number;
+  metrics: SketchMetric[];
+  platforms: Record<string, { months: Record<string, SketchGroup>; artists: Record<string, SketchGroup> }>;
+}
+
+// Sketches del pipeline, o null si no se generaron
+export const fetchSketches = async (): Promise<Sketches | null> => {
+  const response = await fetch('/sketches.json', { cache: 'no-cache' });
+  if (!response.ok) return null;
+  try {
+    return await response.json();
+  } catch {
+    return null;
+  }
+};
+
+// Centroides (valor, peso) ordenados de un sketch
+const centroidsOf = (sketch: Sketch): [number, number][] =>
+  'values' in sketch ? sketch.values.map((value) => [value, 1]) : sketch.centroids;
+
+// Combina sketches: exacto mientras todos lo sean, si no una lista de centroides
+export const mergeSketches = (sketches: Sketch[]): Sketch | null => {
+  if (sketches.length === 0) return null;
+  const count = sketches.reduce((total, sketch) => total + sketch.count, 0);
+  if (sketches.every((sketch) => 'values' in sketch)) {
+    const values = sketches.flatMap((sketch) => (sketch as ExactSketch).values).sort((a, b) => a - b);
+    return { count, values };
+  }
+  const centroids = sketches.flatMap(centroidsOf).sort((a, b) => a[0] - b[0]);
+  const bounds = sketches.map((sketch) =>
+    'values' in sketch ? [sketch.values[0], sketch.values[sketch.values.length - 1]] : [sketch.min, sketch.max],
+  ).filter(([min]) => min !== undefined);
+  return {
+    count,
+    min: Math.min(...bounds.map(([min]) => min)),
+    max: Math.max(...bounds.map(([, max]) => max)),
+    centroids,
+  };
+};
+
+// Mediana como la de los datos mensuales: el central superior (aproximada en un t-digest)
+export const sketchMedian = (sketch: Sketch | null): number => {
+  if (!sketch || sketch.count === 0) return 0;
+  if ('values' in sketch) return sketch.values[Math.floor(sketch.values.length / 2)];
+  const target = Math.floor(sketch.count / 2) + 0.5;
+  let seen = 0;
+  for (const [mean, weight] of sketch.centroids) {
+    seen += weight;
+    if (seen >= target) return mean;
+  }
+  return sketch.max;
+};
+
+// Valor máximo del sketch
+export const sketchMax = (sketch: Sketch | null): number => {
+  if (!sketch || sketch.count === 0) return 0;
+  return 'values' in sketch ? sketch.values[sketch.values.length - 1] : sketch.max;
+};
+
+// Histograma de `numBins` bins entre 0 y maxValue (los valores mayores van al último)
+export const sketchHistogram = (sketch: Sketch | null, numBins: number, maxValue: number): number[] => {
+  const bins = new Array(numBins).fill(0);
+  if (!sketch) return bins;
+  centroidsOf(sketch).forEach(([value, weight]) => {
+    const binIndex = Math.min(Math.floor((Math.min(value, maxValue) / maxValue) * (numBins - 1)), numBins - 1);
+    bins[binIndex] += weight;
+  });
+  return bins;
+};
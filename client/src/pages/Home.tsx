@@ -34,6 +34,27 @@ import {
   ZAxis,
   ReferenceLine
 } from 'recharts';
+import {
+  fetchManifest,
+  fetchRollup,
+  fetchSingleFile,
+  loadMonths,
+  rollupCell,
+  type Manifest,
+  type MonthSummary,
+  type Rollup,
+} from '@/lib/dashboardData';
+import { probeQueryApi, queryApi, type ArtistRow, type Page } from '@/lib/queryApi';
+import { fetchSearchIndex, locatePost, matchesMonths, searchPosts, type SearchIndex } from '@/lib/searchIndex';
+import {
+  fetchSketches,
+  mergeSketches,
+  sketchHistogram,
+  sketchMax,
+  sketchMedian,
+  type SketchMetric,
+  type Sketches,
+} from '@/lib/sketches';
 
 // Tipos
 interface Video {
@@ -90,6 +111,9 @@ type SortColumn = 'date' | 'views' | 'likes' | 'shares' | 'comments' | 'collects
 type SortDirection = 'asc' | 'desc';
 type ArtistMetric = 'median_views' | 'avg_views' | 'avg_likes' | 'median_ir' | 'avg_ir';
 
+// Videos de un artista que se piden al servicio de consultas (su página máxima)
+const ARTIST_VIDEOS_LIMIT = 1000;
+
 // Función para formatear números
 const formatNumber = (num: number): string => {
   if (num >= 1000000) {
@@ -130,7 +154,11 @@ const MetricCard = ({ label, value, icon, borderColor }: MetricCardProps) => (
 export default function Home() {
   const [platform, setPlatform] = useState<Platform>('tiktok');
   const [data, setData] = useState<DataSet>({});
+  // null = sin manifest (datos en un solo JSON)
+  const [manifest, setManifest] = useState<Manifest<MonthData> | null | undefined>(undefined);
   const [artistStatsData, setArtistStatsData] = useState<ArtistStatsData>({});
+  const [rollup, setRollup] = useState<Rollup | null>(null);
+  const [sketches, setSketches] = useState<Sketches | null>(null);
   const [activeTab, setActiveTab] = useState<Tab>('evolution');
   const [selectedMonth, setSelectedMonth] = useState<string | null>(null);
   const [selectedArtist, setSelectedArtist] = useState<string | null>(null);
@@ -146,6 +174,16 @@ export default function Home() {
   const [showImpactView, setShowImpactView] = useState(false);
   const [selectedYear, setSelectedYear] = useState<string>('all');
   const [selectedImpactFilter, setSelectedImpactFilter] = useState<string>('all');
+  const [searchQuery, setSearchQuery] = useState<string>('');
+  const [searchIndex, setSearchIndex] = useState<SearchIndex | null>(null);
+  // Con el servicio de consultas la pestaña de artistas no descarga todos los meses
+  const [hasQueryApi, setHasQueryApi] = useState<boolean | undefined>(undefined);
+  const [apiArtistData, setApiArtistData] = useState<ArtistRow[]>([]);
+  const [apiArtistVideos, setApiArtistVideos] = useState<Page<Video> | null>(null);
+
+  useEffect(() => {
+    probeQueryApi().then(setHasQueryApi);
+  }, []);
 
   // Cargar artist stats una vez al inicio
   useEffect(() => {
@@ -159,24 +197,111 @@ export default function Home() {
       }
     };
     loadArtistStats();
+    fetchRollup()
+      .then(setRollup)
+      .catch((error) => console.error('Error loading rollup:', error));
+    fetchSketches()
+      .then(setSketches)
+      .catch((error) => console.error('Error loading sketches:', error));
   }, []);
 
-  // Cargar datos al cambiar plataforma
+  // Cargar el manifest al cambiar plataforma
   useEffect(() => {
-    const loadData = async () => {
+    let cancelled = false;
+    const loadManifest = async () => {
       try {
-        const response = await fetch(`/data_${platform}.json`);
-        const jsonData = await response.json();
-        setData(jsonData);
+        const platformManifest = await fetchManifest<MonthData>(platform);
+        if (cancelled) return;
+        setManifest(platformManifest);
         setSelectedMonth(null);
         setSelectedArtist(null);
+        if (!platformManifest) {
+          const jsonData = await fetchSingleFile<MonthData>(platform);
+          if (!cancelled) setData(jsonData);
+        }
       } catch (error) {
         console.error('Error loading data:', error);
       }
     };
-    loadData();
+    loadManifest();
+    return () => {
+      cancelled = true;
+    };
   }, [platform]);
 
+  // Índice de búsqueda de la plataforma (descripciones completas, hashtags y menciones)
+  useEffect(() => {
+    let cancelled = false;
+    setSearchIndex(null);
+    fetchSearchIndex(platform)
+      .then((index) => {
+        if (!cancelled) setSearchIndex(index);
+      })
+      .catch((error) => console.error('Error loading search index:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [platform]);
+
+  // Cargar solo los meses necesarios: los del año seleccionado en Evolución,
+  // todos en la pestaña de artistas
+  useEffect(() => {
+    if (!manifest || hasQueryApi === undefined) return;
+    if (activeTab === 'artist' && hasQueryApi) return;
+    let cancelled = false;
+    const year = activeTab === 'evolution' ? selectedYear : 'all';
+    const months = Object.keys(manifest.months).filter((monthKey) => year === 'all' || monthKey.startsWith(year));
+    loadMonths(manifest, months)
+      .then((monthsData) => {
+        if (!cancelled) setData(monthsData);
+      })
+      .catch((error) => console.error('Error loading data:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [manifest, activeTab, selectedYear, hasQueryApi]);
+
+  // Ranking y videos por artista desde el servicio de consultas
+  useEffect(() => {
+    if (!hasQueryApi || activeTab !== 'artist') return;
+    const controller = new AbortController();
+    queryApi<Page<ArtistRow>>('artists', {
+      platform,
+      year: artistYear,
+      metric: artistMetric,
+      min_videos: minVideos,
+      exclude: filterWord,
+    }, controller.signal)
+      .then((result) => setApiArtistData(result.items))
+      .catch((error) => {
+        if (!controller.signal.aborted) console.error('Error loading artists:', error);
+      });
+    return () => controller.abort();
+  }, [hasQueryApi, activeTab, platform, artistYear, artistMetric, minVideos, filterWord]);
+
+  useEffect(() => {
+    if (!hasQueryApi || !selectedArtist) {
+      setApiArtistVideos(null);
+      return;
+    }
+    const controller = new AbortController();
+    queryApi<Page<Video>>('videos', {
+      platform,
+      artist: selectedArtist,
+      sort: artistSortColumn,
+      direction: artistSortDirection,
+      limit: ARTIST_VIDEOS_LIMIT,
+    }, controller.signal)
+      .then(setApiArtistVideos)
+      .catch((error) => {
+        if (!controller.signal.aborted) console.error('Error loading artist videos:', error);
+      });
+    return () => controller.abort();
+  }, [hasQueryApi, platform, selectedArtist, artistSortColumn, artistSortDirection]);
+
+  // Meses disponibles (del manifest aunque sus videos aún no se hayan cargado)
+  const monthKeys = useMemo(() => (manifest ? Object.keys(manifest.months) : Object.keys(data)), [manifest, data]);
+
   // Calcular métricas totales o del mes seleccionado
   
 
@@ -185,6 +310,22 @@ export default function Home() {
   
   
   const totalMetrics = useMemo(() => {
+  // Con el cubo de agregados basta una celda: mes seleccionado, año o todo
+  if (rollup) {
+    const month = selectedMonth && selectedMonth !== 'all' ? selectedMonth : null;
+    const outsideYear = month !== null && selectedYear !== 'all' && !month.startsWith(selectedYear);
+    const cell = outsideYear ? null : rollupCell(rollup, platform, month ?? selectedYear);
+    return {
+      total_posts: cell?.count ?? 0,
+      avg_views: cell ? cell.views / cell.count : 0,
+      avg_likes: cell ? cell.likes / cell.count : 0,
+      avg_ir: cell?.avg_ir ?? 0,
+      total_shares: cell?.shares ?? 0,
+      total_comments: cell?.comments ?? 0,
+      total_collects: cell?.collects ?? 0,
+    };
+  }
+
   let allVideos: Video[] = [];
 
   // Recorre todos los meses del dataset y aplica ambos filtros
@@ -225,7 +366,7 @@ export default function Home() {
     total_comments: allVideos.reduce((sum, v) => sum + v.comments, 0),
     total_collects: allVideos.reduce((sum, v) => sum + v.collects, 0),
   };
-}, [data, selectedMonth, selectedYear]);
+}, [data, selectedMonth, selectedYear, rollup, platform]);
 
 
 
@@ -364,53 +505,77 @@ export default function Home() {
 
   const violinValues = useMemo(() => {
     let allVideos: Video[] = [];
-    
-    if (selectedMonth && data[selectedMonth]) {
-      // Si hay un mes seleccionado, usar solo esos videos
-      allVideos = data[selectedMonth].all_videos;
-    } else {
-      // Si no, usar todos los videos
-      Object.values(data).forEach((month) => {
-        allVideos.push(...month.all_videos);
-      });
-    }
+    const shownMonths = selectedMonth && data[selectedMonth] ? [selectedMonth] : Object.keys(data);
+    shownMonths.forEach((month) => {
+      allVideos.push(...data[month].all_videos);
+    });
     
     // Extraer valores según la métrica seleccionada
     let metricValues: number[];
-    let maxValue: number;
     let metricName: string;
     let metricUnit: string;
     
     if (evolutionMetric === 'avg_ir' || evolutionMetric === 'median_ir') {
       metricValues = allVideos.map((v) => Math.min(v.ir, 25));
-      maxValue = 25;
       metricName = 'IR';
       metricUnit = '%';
     } else if (evolutionMetric === 'avg_views' || evolutionMetric === 'median_views') {
       metricValues = allVideos.map((v) => v.views);
-      maxValue = Math.max(...metricValues, 1);
       metricName = 'Views';
       metricUnit = '';
     } else { // avg_likes
       metricValues = allVideos.map((v) => v.likes);
-      maxValue = Math.max(...metricValues, 1);
       metricName = 'Likes';
       metricUnit = '';
     }
     
-    // Calcular mediana y promedio
-    const sortedValues = [...metricValues].sort((a, b) => a - b);
-    const median = sortedValues.length > 0 ? sortedValues[Math.floor(sortedValues.length / 2)] : 0;
-    const average = metricValues.length > 0 ? metricValues.reduce((a, b) => a + b, 0) / metricValues.length : 0;
+    // Sketch combinado de los meses mostrados (sin recorrer los videos). Solo
+    // sirve si es de los videos cargados: sketches.json de otra ejecución
+    // tendría otro número de posts en algún mes
+    const sketchMetric: SketchMetric = metricName === 'IR' ? 'ir' : metricName === 'Views' ? 'views' : 'likes';
+    const monthSketches = sketches?.platforms[platform]?.months;
+    const sketch = monthSketches && shownMonths.every((month) =>
+      monthSketches[month]?.[sketchMetric].count === data[month].all_videos.length)
+      ? mergeSketches(shownMonths.map((month) => monthSketches[month][sketchMetric]))
+      : null;
+    let maxValue: number;
+    if (metricName === 'IR') {
+      maxValue = 25;
+    } else if (sketch) {
+      maxValue = Math.max(sketchMax(sketch), 1);
+    } else {
+      maxValue = metricValues.reduce((max, value) => Math.max(max, value), 1);
+    }
+    
+    // Calcular mediana (del sketch si lo hay)
+    let median: number;
+    if (sketch) {
+      median = metricName === 'IR' ? Math.min(sketchMedian(sketch), 25) : sketchMedian(sketch);
+    } else {
+      const sortedValues = [...metricValues].sort((a, b) => a - b);
+      median = sortedValues.length > 0 ? sortedValues[Math.floor(sortedValues.length / 2)] : 0;
+    }
+    
+    // Promedio ponderado de los promedios de cada mes
+    const monthAverage = (month: MonthData) =>
+      metricName === 'IR' ? month.avg_ir : metricName === 'Views' ? month.avg_views : month.avg_likes;
+    const totalPosts = shownMonths.reduce((sum, month) => sum + data[month].total_posts, 0);
+    const average = totalPosts > 0
+      ? shownMonths.reduce((sum, month) => sum + monthAverage(data[month]) * data[month].total_posts, 0) / totalPosts
+      : 0;
     
     // Crear bins para el histograma (forma de violin)
     const numBins = evolutionMetric === 'avg_ir' ? 26 : 50;
-    const bins = new Array(numBins).fill(0);
-    
-    metricValues.forEach(value => {
-      const binIndex = Math.min(Math.floor((value / maxValue) * (numBins - 1)), numBins - 1);
-      bins[binIndex]++;
-    });
+    let bins: number[];
+    if (sketch) {
+      bins = sketchHistogram(sketch, numBins, maxValue);
+    } else {
+      bins = new Array(numBins).fill(0);
+      metricValues.forEach(value => {
+        const binIndex = Math.min(Math.floor((value / maxValue) * (numBins - 1)), numBins - 1);
+        bins[binIndex]++;
+      });
+    }
     
     // Normalizar bins para el ancho del violin
     const maxBin = Math.max(...bins);
@@ -452,9 +617,38 @@ export default function Home() {
       metricName,
       metricUnit
     };
-  }, [data, selectedMonth, evolutionMetric]);
+  }, [data, selectedMonth, evolutionMetric, sketches, platform]);
+
+  // Índice de búsqueda solo si corresponde a los meses de la plataforma (el del
+  // manifest, o todos los cargados con un solo JSON); si no, se ignora
+  const checkedSearchIndex = useMemo(() => {
+    if (!searchIndex || searchIndex.data.platform !== platform || manifest === undefined) return null;
+    const counts: Record<string, number> = {};
+    if (manifest) {
+      Object.entries(manifest.months).forEach(([monthKey, month]) => {
+        counts[monthKey] = month.total_posts;
+      });
+    } else {
+      Object.entries(data).forEach(([monthKey, month]) => {
+        counts[monthKey] = month.all_videos.length;
+      });
+    }
+    return matchesMonths(searchIndex, counts) ? searchIndex : null;
+  }, [searchIndex, platform, manifest, data]);
+
+  // Videos cargados que coinciden con la búsqueda (null sin búsqueda o sin índice)
+  const searchMatches = useMemo(() => {
+    if (!checkedSearchIndex || !searchQuery.trim()) return null;
+    const matches = new Set<Video>();
+    searchPosts(checkedSearchIndex, searchQuery).forEach((id) => {
+      const location = locatePost(checkedSearchIndex, id);
+      const video = location ? data[location[0]]?.all_videos[location[1]] : undefined;
+      if (video) matches.add(video);
+    });
+    return matches;
+  }, [checkedSearchIndex, searchQuery, data]);
 
-  // Todos los videos (filtrados por año y mes)
+  // Todos los videos (filtrados por año, mes y búsqueda)
   const allVideos = useMemo(() => {
     const videos: Video[] = [];
     Object.entries(data)
@@ -478,6 +672,11 @@ export default function Home() {
       });
     }
     
+    // Aplicar búsqueda
+    if (searchMatches) {
+      filteredVideos = filteredVideos.filter((video) => searchMatches.has(video));
+    }
+    
     // Ordenar
     filteredVideos.sort((a, b) => {
       const aVal = a[sortColumn];
@@ -489,7 +688,7 @@ export default function Home() {
     });
     
     return filteredVideos;
-  }, [data, selectedYear, selectedMonth, selectedImpactFilter, sortColumn, sortDirection, evolutionMetric, getImpactCategory]);
+  }, [data, selectedYear, selectedMonth, selectedImpactFilter, sortColumn, sortDirection, evolutionMetric, getImpactCategory, searchMatches]);
 
   // Videos del mes seleccionado
   const monthVideos = useMemo(() => {
@@ -504,6 +703,9 @@ export default function Home() {
         return category.name === selectedImpactFilter;
       });
     }
+    if (searchMatches) {
+      videos = videos.filter((video) => searchMatches.has(video));
+    }
     
     videos.sort((a, b) => {
       const aVal = a[sortColumn];
@@ -514,10 +716,11 @@ export default function Home() {
       return aVal < bVal ? 1 : -1;
     });
     return videos;
-  }, [data, selectedMonth, sortColumn, sortDirection, selectedImpactFilter, evolutionMetric, getImpactCategory]);
+  }, [data, selectedMonth, sortColumn, sortDirection, selectedImpactFilter, evolutionMetric, getImpactCategory, searchMatches]);
 
   // Análisis por artista
   const artistData = useMemo(() => {
+    if (hasQueryApi) return apiArtistData;
     const result: Array<{
       artist: string;
       videos: number;
@@ -538,7 +741,9 @@ export default function Home() {
       if (platformStats.total_videos < minVideos) return;
 
       // Si se seleccionó un año específico, filtrar videos por año
-      if (artistYear !== 'all') {
+      if (artistYear !== 'all' && rollup) {
+        if ((rollupCell(rollup, platform, artistYear, artistName)?.count ?? 0) < minVideos) return;
+      } else if (artistYear !== 'all') {
         let videosInYear = 0;
         Object.values(data).forEach((month) => {
           month.all_videos.forEach((video) => {
@@ -551,7 +756,12 @@ export default function Home() {
       }
 
       let metric = platformStats.avg_views;
-      if (artistMetric === 'median_views') {
+      const artistCell = rollup ? rollupCell(rollup, platform, artistYear, artistName) : null;
+      if (artistMetric === 'median_views' && rollup) {
+        // Mediana (interpolada) de los cuantiles del cubo
+        const medianIndex = rollup.quantiles.indexOf(0.5);
+        if (artistCell && medianIndex >= 0) metric = artistCell.views_quantiles[medianIndex];
+      } else if (artistMetric === 'median_views') {
         // Calcular mediana de views para este artista
         const artistVideos: number[] = [];
         Object.values(data).forEach((month) => {
@@ -605,16 +815,17 @@ export default function Home() {
 
     result.sort((a, b) => b.metric - a.metric);
     return result.slice(0, 30);
-  }, [artistStatsData, platform, artistYear, artistMetric, minVideos, filterWord, data]);
+  }, [artistStatsData, platform, artistYear, artistMetric, minVideos, filterWord, data, hasQueryApi, apiArtistData, rollup]);
 
   // Videos del artista seleccionado
   const artistVideos = useMemo(() => {
     if (!selectedArtist) return [];
+    if (hasQueryApi) return apiArtistVideos?.items ?? [];
 
     const videos: Video[] = [];
     Object.values(data).forEach((month) => {
       month.all_videos.forEach((video) => {
-        if (video.artist === selectedArtist) {
+        if (video.artist === selectedArtist && (!searchMatches || searchMatches.has(video))) {
           videos.push(video);
         }
       });
@@ -630,17 +841,17 @@ export default function Home() {
     });
 
     return videos;
-  }, [data, selectedArtist, artistSortColumn, artistSortDirection]);
+  }, [data, selectedArtist, artistSortColumn, artistSortDirection, hasQueryApi, apiArtistVideos, searchMatches]);
 
   // Años disponibles
   const availableYears = useMemo(() => {
     const years = new Set<string>();
-    Object.keys(data).forEach((monthKey) => {
+    monthKeys.forEach((monthKey) => {
       const year = monthKey.split('-')[0];
       years.add(year);
     });
     return Array.from(years).sort();
-  }, [data]);
+  }, [monthKeys]);
 
   // Función para descargar CSV
   const downloadCSV = () => {
@@ -648,7 +859,7 @@ export default function Home() {
       ['Mes', 'Total Posts', 'Mediana Views', 'Promedio Views', 'Promedio Likes', 'Total Shares', 'Total Comments', 'Total Collects', 'IR Promedio'],
     ];
 
-    Object.entries(data)
+    Object.entries<MonthSummary<MonthData>>(manifest ? manifest.months : data)
       .sort((a, b) => a[0].localeCompare(b[0]))
       .forEach(([monthKey, month]) => {
         rows.push([
@@ -887,7 +1098,7 @@ export default function Home() {
                       }}
                     >
                       <option value="all">Todos los años</option>
-                      {Object.keys(data).map(month => month.split('-')[0]).filter((v, i, a) => a.indexOf(v) === i).sort().reverse().map(year => (
+                      {monthKeys.map(month => month.split('-')[0]).filter((v, i, a) => a.indexOf(v) === i).sort().reverse().map(year => (
                         <option key={year} value={year}>{year}</option>
                       ))}
                     </select>
@@ -1106,6 +1317,15 @@ export default function Home() {
                       }
                     </h3>
                     <div style={{ display: 'flex', gap: '8px', alignItems: 'center' }}>
+                      {checkedSearchIndex && (
+                        <input
+                          type="search"
+                          placeholder="Buscar #hashtag, @mención o palabra..."
+                          value={searchQuery}
+                          onChange={(e) => setSearchQuery(e.target.value)}
+                          style={{ padding: '4px 12px', borderRadius: '6px', border: '1px solid #e5e7eb', fontSize: '12px', width: '240px' }}
+                        />
+                      )}
                       <select
                         value={selectedImpactFilter}
                         onChange={(e) => setSelectedImpactFilter(e.target.value)}
@@ -1147,6 +1367,7 @@ export default function Home() {
                     {selectedMonth && selectedMonth !== 'all' ? ` del mes ${selectedMonth}` : ''}
                     {selectedYear !== 'all' ? ` del año ${selectedYear}` : ''}
                     {selectedImpactFilter !== 'all' ? ` (filtrados por ${selectedImpactFilter})` : ''}
+                    {searchMatches ? ` que coinciden con "${searchQuery.trim()}"` : ''}
                   </p>
                 </div>
                 <div style={{ maxHeight: '500px', overflowY: 'auto' }}>
@@ -1353,7 +1574,7 @@ export default function Home() {
               <div style={{ backgroundColor: 'white', padding: '20px', borderRadius: '12px', boxShadow: '0 1px 3px rgba(0,0,0,0.1)' }}>
                 <div style={{ marginBottom: '16px' }}>
                   <h3 style={{ fontSize: '16px', fontWeight: 'bold', color: '#111', marginBottom: '4px' }}>Videos de {selectedArtist}</h3>
-                  <p style={{ fontSize: '12px', color: '#666' }}>{artistVideos.length} videos</p>
+                  <p style={{ fontSize: '12px', color: '#666' }}>{apiArtistVideos?.total ?? artistVideos.length} videos</p>
                 </div>
                 <div style={{ maxHeight: '500px', overflowY: 'auto' }}>
                   <table style={{ width: '100%', borderCollapse: 'collapse', fontSize: '13px' }}>
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportación columnar de la tabla de videos (--columnar).
+
+Cada plataforma se escribe como dos archivos:
+
+    <plataforma>.bin    columnas binarias (little-endian, alineadas a 8 bytes)
+    <plataforma>.json   sidecar: esquema, posición de cada columna, diccionarios
+                        y métricas de cada mes con su rango de filas
+
+Las métricas numéricas son arreglos tipados (float64; las enteras se marcan
+como `int` para leerlas de vuelta como enteros), artist y date van codificados
+con diccionario (uint32 + lista de valores) y description/url son columnas de
+texto UTF-8 con offsets uint32, como en Arrow. Las filas están ordenadas por
+mes, así que cada mes es un rango contiguo. En el navegador cada columna se
+lee con `new Float64Array(buffer, offset, length / 8)`; en Python
+`read_columnar` la devuelve como DataFrame de pandas.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+
+# Subir este número si cambia el formato
+COLUMNAR_VERSION = 1
+
+# (columna, tipo): int/float se guardan como float64, dict como códigos uint32
+COLUMNS = [
+    ('date', 'dict'),
+    ('artist', 'dict'),
+    ('description', 'string'),
+    ('url', 'string'),
+    ('views', 'int'),
+    ('likes', 'int'),
+    ('shares', 'int'),
+    ('comments', 'int'),
+    ('collects', 'int'),
+    ('ir', 'float'),
+]
+
+# Filas que se acumulan en memoria antes de volcarlas a disco
+CHUNK_ROWS = 65536
+
+_TYPECODES = {'int': 'd', 'float': 'd', 'dict': 'I', 'string': 'I'}
+
+
+def _write_array(values, f):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    values.tofile(f)
+
+
+class ColumnarWriter:
+    """Escribe la tabla de videos mes por mes; `close()` genera el .bin y el sidecar."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.months = {}
+        self._dir = tempfile.TemporaryDirectory(prefix='sme_columnar_')
+        self._files = {}
+        self._dictionaries = {}
+        self._string_sizes = {}
+        for name, kind in COLUMNS:
+            self._files[name] = open(os.path.join(self._dir.name, name), 'w+b')
+            if kind == 'dict':
+                self._dictionaries[name] = {}
+            elif kind == 'string':
+                self._files[name + '.data'] = open(os.path.join(self._dir.name, name + '.data'), 'w+b')
+                self._string_sizes[name] = 0
+                _write_array(array('I', [0]), self._files[name])
+        self._pending = self._new_chunk()
+
+    def _new_chunk(self):
+        chunk = {name: array(_TYPECODES[kind]) for name, kind in COLUMNS}
+        for name in self._string_sizes:
+            chunk[name + '.data'] = bytearray()
+        return chunk
+
+    def _flush(self):
+        for name, values in self._pending.items():
+            if isinstance(values, bytearray):
+                self._files[name].write(values)
+            else:
+                _write_array(values, self._files[name])
+        self._pending = self._new_chunk()
+
+    def add(self, video):
+        chunk = self._pending
+        for name, kind in COLUMNS:
+            value = video[name]
+            if kind == 'dict':
+                codes = self._dictionaries[name]
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(codes)
+                chunk[name].append(code)
+            elif kind == 'string':
+                data = str(value).encode('utf-8')
+                chunk[name + '.data'] += data
+                self._string_sizes[name] += len(data)
+                chunk[name].append(self._string_sizes[name])
+            else:
+                chunk[name].append(value)
+        self.rows += 1
+        if len(chunk['views']) >= CHUNK_ROWS:
+            self._flush()
+
+    def add_month(self, year_month, summary, videos):
+        """Agrega los videos de un mes (en orden) y sus métricas."""
+        start = self.rows
+        for video in videos:
+            self.add(video)
+        self.months[year_month] = dict(summary, row_offset=start, row_count=self.rows - start)
+
+    def close(self):
+        """Ensambla el .bin (columna por columna) y escribe el sidecar."""
+        self._flush()
+        columns = []
+        digest = hashlib.sha256()
+        tmp_path = self.path + '.bin.tmp'
+        with open(tmp_path, 'wb') as out:
+            def copy(name):
+                padding = -out.tell() % 8
+                out.write(b'\0' * padding)
+                digest.update(b'\0' * padding)
+                offset = out.tell()
+                spill = self._files[name]
+                spill.seek(0)
+                while True:
+                    block = spill.read(1 << 20)
+                    if not block:
+                        break
+                    digest.update(block)
+                    out.write(block)
+                return {'offset': offset, 'length': out.tell() - offset}
+
+            for name, kind in COLUMNS:
+                if kind == 'string':
+                    column = {'name': name, 'type': 'utf8',
+                              'offsets': copy(name), 'data': copy(name + '.data')}
+                elif kind == 'dict':
+                    column = dict({'name': name, 'type': 'uint32', 'encoding': 'dictionary'}, **copy(name))
+                    column['dictionary'] = list(self._dictionaries[name])
+                else:
+                    column = dict({'name': name, 'type': 'float64', 'logical': kind}, **copy(name))
+                columns.append(column)
+
+        for spill in self._files.values():
+            spill.close()
+        self._dir.cleanup()
+        os.replace(tmp_path, self.path + '.bin')
+
+        sidecar = {
+            'version': COLUMNAR_VERSION,
+            'rows': self.rows,
+            'byte_order': 'little',
+            'sha256': digest.hexdigest(),
+            'columns': columns,
+            'months': self.months,
+        }
+        with open(self.path + '.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(self.path + '.json.tmp', self.path + '.json')
+
+
+def write_columnar(path, monthly_data):
+    """Escribe {mes: {..., 'all_videos': [...]}} en formato columnar."""
+    writer = ColumnarWriter(path)
+    for year_month, month in monthly_data.items():
+        summary = {key: value for key, value in month.items() if key != 'all_videos'}
+        writer.add_month(year_month, summary, month['all_videos'])
+    writer.close()
+
+
+def read_summary(path):
+    """Sidecar de una exportación columnar (métricas por mes y esquema)."""
+    with open(path + '.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_columnar(path):
+    """
+    Lee una exportación columnar como DataFrame de pandas, sin volver a
+    clasificar: una fila por video más la columna `month`. artist y date se
+    devuelven como categorías.
+    """
+    import numpy as np
+    import pandas as pd
+
+    sidecar = read_summary(path)
+    with open(path + '.bin', 'rb') as f:
+        buffer = f.read()
+
+    def view(dtype, location):
+        return np.frombuffer(buffer, dtype=np.dtype(dtype).newbyteorder('<'),
+                             count=location['length'] // np.dtype(dtype).itemsize,
+                             offset=location['offset'])
+
+    data = {}
+    for column in sidecar['columns']:
+        name = column['name']
+        if column['type'] == 'utf8':
+            offsets = view('u4', column['offsets'])
+            start = column['data']['offset']
+            data[name] = [buffer[start + offsets[i]:start + offsets[i + 1]].decode('utf-8')
+                          for i in range(sidecar['rows'])]
+        elif column.get('encoding') == 'dictionary':
+            data[name] = pd.Categorical.from_codes(view('u4', column).astype('int64'),
+                                                   categories=column['dictionary'])
+        elif column['logical'] == 'int':
+            data[name] = view('f8', column).astype('int64')
+        else:
+            data[name] = view('f8', column).copy()
+
+    months = np.empty(sidecar['rows'], dtype=object)
+    for year_month, month in sidecar['months'].items():
+        months[month['row_offset']:month['row_offset'] + month['row_count']] = year_month
+    data['month'] = months
+    return pd.DataFrame(data)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Especificaciones de plataforma para los scripts de procesamiento.
+
+Cada export (TikTok, Instagram, ...) se describe con un `PlatformSpec`: de qué
+archivo se lee, qué columna identifica al post y qué columnas traen la fecha,
+la descripción y cada métrica. process_data.py y process_data_v2.py procesan
+cualquier plataforma con una sola función genérica (`process_platform`), así
+que agregar otra fuente (p. ej. YouTube Shorts) es agregar un spec a su lista
+`PLATFORMS`.
+
+La ruta de un spec puede ser un archivo, un directorio (todos sus .csv y
+.xlsx) o un patrón glob; `export_paths` la expande a la lista de exports.
+"""
+
+import glob
+import os
+
+# Extensiones de los exports que se toman de un directorio
+EXPORT_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def export_paths(path):
+    """Archivos de una ruta de export (archivo, directorio o glob, o una lista de ellas)."""
+    if isinstance(path, (list, tuple)):
+        return [name for item in path for name in export_paths(item)]
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path)
+                      if name.endswith(EXPORT_EXTENSIONS) and not name.startswith(('.', '~$')))
+    if glob.has_magic(path):
+        return sorted(glob.glob(path))
+    return [path]
+
+
+def platform_paths(specs, values):
+    """
+    Rutas "plataforma=ruta" (p. ej. de --input) por plataforma.
+    Retorna {plataforma: [rutas]} con las plataformas de `specs`.
+    """
+    paths = {spec.name: [] for spec in specs}
+    for value in values:
+        platform, separator, path = value.partition('=')
+        if not separator or platform not in paths:
+            raise ValueError(f'Ruta inválida {value!r}: se espera plataforma=ruta '
+                             f'con plataforma en {", ".join(paths)}')
+        paths[platform].append(path)
+    return paths
+
+
+class PlatformSpec:
+    """
+    Mapeo de columnas de un export. Las columnas opcionales en None
+    (shares, collects, url, description) se toman como 0 o ''.
+    """
+
+    def __init__(self, name, label, noun, path, key, date, views, likes, comments,
+                 shares=None, collects=None, url=None, description=(), date_format=None,
+                 views_fallback=None, description_length=200):
+        self.name = name                              # llave en los JSON de salida
+        self.label = label                            # nombre para los mensajes
+        self.noun = noun                              # 'videos' o 'posts'
+        self.path = path
+        self.key = key                                # columna que identifica al post
+        self.date = date
+        self.date_format = date_format
+        self.views = views
+        self.views_fallback = views_fallback          # si views no es numérico
+        self.likes = likes
+        self.comments = comments
+        self.shares = shares
+        self.collects = collects
+        self.url = url
+        self.description = tuple(description)         # candidatas, en orden
+        self.description_length = description_length
+
+    def with_path(self, path):
+        """Mismo spec leyendo otro archivo (benchmarks, pruebas)."""
+        spec = PlatformSpec.__new__(PlatformSpec)
+        spec.__dict__.update(self.__dict__, path=path)
+        return spec
+
+    @property
+    def paths(self):
+        """Exports del spec (un archivo, o varios si la ruta es un directorio o glob)."""
+        return export_paths(self.path)
+
+    @property
+    def classified(self):
+        """Solo las plataformas con descripción se clasifican por artista."""
+        return bool(self.description)
+
+    def describe(self, row):
+        """Primera descripción no vacía de una fila (dict)."""
+        for column in self.description:
+            value = row.get(column, '')
+            if value:
+                return value
+        return ''
+
+    def __repr__(self):
+        return f'PlatformSpec({self.name!r}, path={self.path!r})'
+
+
+class Post:
+    """
+    Un post ya parseado (process_data.py). Con __slots__ cada post ocupa una
+    fracción de lo que ocupa un dict de 10 llaves; solo se convierte a dict
+    (`to_dict`, mismas llaves y orden que el JSON de salida) al serializar.
+    """
+
+    __slots__ = ('date', 'description', 'artist', 'url', 'views', 'likes', 'shares', 'comments',
+                 'collects', 'ir')
+
+    def __init__(self, date, description, artist, url, views, likes, shares, comments, collects, ir):
+        self.date = date                              # 'YYYY-MM-DD'
+        self.description = description
+        self.artist = artist
+        self.url = url
+        self.views = views
+        self.likes = likes
+        self.shares = shares
+        self.comments = comments
+        self.collects = collects
+        self.ir = ir
+
+    @property
+    def year_month(self):
+        return self.date[:7]
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data[field] for field in cls.__slots__))
+
+    def __repr__(self):
+        return f'Post({self.date!r}, {self.url!r}, views={self.views})'
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cota de similitud en lote para la búsqueda difusa de artistas.
+
+SequenceMatcher.ratio() es 2·M/T, con M los caracteres de sus bloques
+coincidentes. Esos bloques forman una subsecuencia común, así que M nunca
+supera la subsecuencia común más larga (LCS) y 2·LCS/T es una cota superior
+del ratio. `LcsKernel` codifica el roster una sola vez y calcula esa cota
+para un lote de menciones contra todos los artistas a la vez:
+
+- con `rapidfuzz` instalado, con su distancia Indel compilada (T - 2·LCS);
+- si no, con el algoritmo bit-paralelo de LCS (Hyyrö) en NumPy: cada
+  artista es una máscara de 64 bits por carácter y cada carácter de la
+  mención es una operación vectorial sobre la matriz menciones × artistas.
+
+ArtistMatcher (artist_matcher.py) solo calcula el ratio exacto, en orden de
+cota, de los artistas cuya cota todavía puede superar al mejor resultado, así
+que el resultado es el mismo que comparar contra todo el roster.
+"""
+
+import importlib.util
+
+# Menciones por lote (la matriz de trabajo es lote × artistas enteros de 64 bits)
+BATCH_SIZE = 1024
+
+# Los nombres más largos que una máscara no se acotan (cota por longitud)
+WORD_BITS = 64
+
+
+def available():
+    """Si hay con qué calcular la cota en lote (rapidfuzz o NumPy)."""
+    return (importlib.util.find_spec('rapidfuzz') is not None
+            or importlib.util.find_spec('numpy') is not None)
+
+
+class LcsKernel:
+    """Roster codificado para calcular 2·LCS/T de muchas menciones a la vez."""
+
+    def __init__(self, keys):
+        import numpy as np
+
+        self.keys = list(keys)
+        self._lengths = np.array([len(key) for key in self.keys], dtype=np.int64)
+        self._rapidfuzz = importlib.util.find_spec('rapidfuzz') is not None
+        if self._rapidfuzz:
+            return
+
+        # Código 0: caracteres que no aparecen en el roster (máscara vacía)
+        self._codes = {char: code for code, char in
+                       enumerate(sorted({char for key in self.keys for char in key}), start=1)}
+        masks = [[0] * len(self.keys) for _ in range(len(self._codes) + 1)]
+        widths = [0] * len(self.keys)
+        for idx, key in enumerate(self.keys):
+            if len(key) > WORD_BITS:
+                continue
+            for position, char in enumerate(key):
+                masks[self._codes[char]][idx] |= 1 << position
+            widths[idx] = (1 << len(key)) - 1
+        self._masks = np.array(masks, dtype=np.uint64)
+        self._widths = np.array(widths, dtype=np.uint64)
+        self._long = self._lengths > WORD_BITS
+
+    def _lcs(self, queries):
+        """Matriz (menciones × artistas) de longitudes de la LCS."""
+        import numpy as np
+
+        if self._rapidfuzz:
+            from rapidfuzz import process
+            from rapidfuzz.distance import Indel
+
+            distances = process.cdist(queries, self.keys, scorer=Indel.distance, dtype=np.int64)
+            totals = np.array([len(query) for query in queries], dtype=np.int64)[:, None] + self._lengths
+            return (totals - distances) // 2
+
+        width = max(len(query) for query in queries)
+        codes = np.zeros((len(queries), width), dtype=np.intp)
+        for row, query in enumerate(queries):
+            codes[row, :len(query)] = [self._codes.get(char, 0) for char in query]
+        state = np.full((len(queries), len(self.keys)), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for column in range(width):
+            matches = state & self._masks[codes[:, column]]
+            state = (state + matches) | (state - matches)
+        remaining = ~state & self._widths
+        if hasattr(np, 'bitwise_count'):
+            lcs = np.bitwise_count(remaining).astype(np.int64)
+        else:
+            lcs = np.unpackbits(remaining.view(np.uint8), axis=1).reshape(
+                len(queries), len(self.keys), WORD_BITS).sum(axis=2, dtype=np.int64)
+        if self._long.any():
+            lengths = np.array([len(query) for query in queries], dtype=np.int64)[:, None]
+            lcs = np.where(self._long, np.minimum(lengths, self._lengths), lcs)
+        return lcs
+
+    def bounds(self, queries):
+        """Por cada mención, la cota 2·LCS/T contra cada artista (lista de listas)."""
+        import numpy as np
+
+        result = []
+        for start in range(0, len(queries), BATCH_SIZE):
+            batch = queries[start:start + BATCH_SIZE]
+            totals = np.array([len(query) for query in batch], dtype=np.int64)[:, None] + self._lengths
+            lcs = self._lcs(batch)
+            # Misma expresión que difflib (2.0 * matches / length) para que los empates coincidan
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = np.where(totals > 0, 2.0 * lcs / totals, 1.0)
+            result.extend(ratio.tolist())
+        return result
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Historial de métricas por post (--history).
+
+Cada ejecución sobrescribe los JSON del dashboard, así que se pierde cómo
+crecen views y likes durante la vida de un post. `MetricHistory` guarda en
+sqlite un snapshot de las métricas de cada post por cada export ingerido en el
+índice de posts (post_index.py); la hora del snapshot es el mtime del export.
+
+La serie de cada post es un blob: por snapshot, la diferencia contra el
+anterior de la hora y de cada métrica de METRICS, en varints con zigzag. Los
+valores crecen poco entre snapshots, así que cada uno ocupa unos pocos bytes y
+agregar uno es concatenar al blob (la tabla guarda los últimos valores).
+
+Las consultas por edad ("views al día 7 de los posts del artista X") solo
+leen las series de los posts del artista (índice por plataforma y artista) y
+se detienen en el primer snapshot posterior a esa edad:
+
+    python history.py .cache/history_v2.sqlite instagram --artist "Mon Laferte" --day 7
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Subir este número si cambia la codificación de las series
+HISTORY_VERSION = 1
+
+METRICS = ('views', 'likes', 'comments', 'shares', 'collects')
+
+DAY_SECONDS = 86400
+
+
+def _encode(records, previous):
+    """Varints zigzag de las diferencias de cada registro contra el anterior."""
+    out = bytearray()
+    for record in records:
+        for value, last in zip(record, previous):
+            delta = value - last
+            delta = (delta << 1) ^ (delta >> 63)
+            while delta > 0x7F:
+                out.append((delta & 0x7F) | 0x80)
+                delta >>= 7
+            out.append(delta)
+        previous = record
+    return bytes(out)
+
+
+def _decode(data):
+    """Registros (hora, *métricas) de un blob, en orden."""
+    width = len(METRICS) + 1
+    values = []
+    current = [0] * width
+    shift = delta = 0
+    for byte in data:
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append((delta >> 1) ^ -(delta & 1))
+        shift = delta = 0
+        if len(values) == width:
+            current = [last + value for last, value in zip(current, values)]
+            values = []
+            yield tuple(current)
+
+
+def _int(row, column, default=0):
+    if column is None:
+        return 0
+    try:
+        return int(float(row.get(column, 0) or 0))
+    except ValueError:
+        return default
+
+
+def _timestamp(spec, value):
+    """Segundos epoch de la fecha de publicación (None si no se puede leer)."""
+    if not value:
+        return None
+    try:
+        if spec.date_format:
+            return int(datetime.strptime(value, spec.date_format).timestamp())
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        return None
+
+
+def snapshot_values(spec, row):
+    """(publicación, métricas) de una fila de texto del export de `spec`."""
+    # Como en process_data.py: views_fallback solo si views no es numérico
+    views = _int(row, spec.views, None)
+    if views is None:
+        views = _int(row, spec.views_fallback)
+    metrics = (views, _int(row, spec.likes), _int(row, spec.comments),
+               _int(row, spec.shares), _int(row, spec.collects))
+    return _timestamp(spec, row.get(spec.date)), metrics
+
+
+class MetricHistory:
+    """Series de métricas por post, por plataforma y llave."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != str(HISTORY_VERSION):
+            with self._db:
+                self._db.execute('DROP TABLE IF EXISTS series')
+                self._db.execute('DROP TABLE IF EXISTS snapshots')
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                                 (str(HISTORY_VERSION),))
+        last_columns = ', '.join(f'last_{metric} INTEGER' for metric in METRICS)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS series ('
+            ' platform TEXT, key TEXT, artist TEXT, published INTEGER, snapshots INTEGER,'
+            f' last_taken INTEGER, {last_columns}, data BLOB,'
+            ' PRIMARY KEY (platform, key))')
+        self._db.execute('CREATE INDEX IF NOT EXISTS series_artist ON series (platform, artist)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS snapshots ('
+            ' platform TEXT, taken INTEGER, source TEXT, posts INTEGER,'
+            ' PRIMARY KEY (platform, taken, source))')
+
+    def record(self, spec, taken, source, rows):
+        """
+        Agrega un snapshot (hora `taken` en segundos epoch) de cada post del
+        export `source`; `rows` son pares (llave, fila de texto). Un mismo
+        export no se registra dos veces.
+        """
+        last_columns = ', '.join(f'last_{metric}' for metric in METRICS)
+        with self._lock, self._db:
+            if self._db.execute('SELECT 1 FROM snapshots WHERE platform = ? AND taken = ? AND source = ?',
+                                (spec.name, taken, source)).fetchone():
+                return 0
+            posts = {}
+            for key, row in rows:
+                posts[key] = snapshot_values(spec, row)
+            stored = {}
+            keys = list(posts)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                stored.update((row[0], row[1:]) for row in self._db.execute(
+                    f'SELECT key, last_taken, {last_columns}, data FROM series'
+                    f' WHERE platform = ? AND key IN ({", ".join("?" * len(chunk))})',
+                    (spec.name, *chunk)))
+            inserts, updates = [], []
+            for key, (published, metrics) in posts.items():
+                record = (taken,) + metrics
+                previous = stored.get(key)
+                if previous is None:
+                    inserts.append((spec.name, key, published, taken, *metrics, _encode([record], (0,) * len(record))))
+                    continue
+                last, data = tuple(previous[:-1]), previous[-1]
+                if taken >= last[0]:
+                    # Caso normal: el snapshot es el más reciente, basta concatenar
+                    data += _encode([record], last)
+                else:
+                    # Export más antiguo que llegó tarde: se reescribe la serie en orden
+                    records = sorted(list(_decode(data)) + [record])
+                    data, record = _encode(records, (0,) * len(record)), records[-1]
+                updates.append((published, *record, data, spec.name, key))
+            self._db.executemany(
+                f'INSERT INTO series (platform, key, published, snapshots, last_taken, {last_columns}, data)'
+                f' VALUES (?, ?, ?, 1, {", ".join("?" * (len(METRICS) + 2))})', inserts)
+            self._db.executemany(
+                'UPDATE series SET published = COALESCE(?, published), snapshots = snapshots + 1,'
+                f' last_taken = ?, {", ".join(f"last_{metric} = ?" for metric in METRICS)}, data = ?'
+                ' WHERE platform = ? AND key = ?', updates)
+            self._db.execute('INSERT INTO snapshots (platform, taken, source, posts) VALUES (?, ?, ?, ?)',
+                             (spec.name, taken, source, len(posts)))
+        return len(posts)
+
+    def set_artists(self, platform, artists):
+        """Guarda el artista clasificado de cada post (dict llave -> artista)."""
+        with self._lock, self._db:
+            self._db.executemany('UPDATE series SET artist = ? WHERE platform = ? AND key = ?',
+                                 [(artist, platform, key) for key, artist in artists.items()])
+
+    def series(self, platform, key):
+        """Snapshots de un post: [{'taken', 'views', ...}] en orden."""
+        with self._lock:
+            row = self._db.execute('SELECT data FROM series WHERE platform = ? AND key = ?',
+                                   (platform, key)).fetchone()
+        if row is None:
+            return []
+        return [dict(zip(('taken',) + METRICS, record)) for record in _decode(row[0])]
+
+    def at_age(self, platform, days, metric='views', artist=None):
+        """
+        Valor de `metric` de cada post al cumplir `days` días de publicado: el del
+        último snapshot tomado hasta esa edad. Los posts sin snapshot a esa edad
+        (o sin fecha) no aparecen. Con `artist` solo se leen los posts del artista.
+        """
+        column = METRICS.index(metric) + 1
+        query = 'SELECT key, published, data FROM series WHERE platform = ? AND published IS NOT NULL'
+        params = [platform]
+        if artist is not None:
+            query += ' AND artist = ?'
+            params.append(artist)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        values = {}
+        for key, published, data in rows:
+            limit = published + days * DAY_SECONDS
+            value = None
+            for record in _decode(data):
+                if record[0] > limit:
+                    break
+                value = record[column]
+            if value is not None:
+                values[key] = value
+        return values
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consulta el historial de métricas por post')
+    parser.add_argument('path', help='Archivo del historial (.cache/history_v1.sqlite o history_v2.sqlite)')
+    parser.add_argument('platform')
+    parser.add_argument('--artist', help='Solo los posts de este artista')
+    parser.add_argument('--day', type=float, default=7, help='Edad del post en días')
+    parser.add_argument('--metric', choices=METRICS, default='views')
+    args = parser.parse_args()
+    history = MetricHistory(args.path)
+    try:
+        values = history.at_age(args.platform, args.day, args.metric, args.artist)
+    finally:
+        history.close()
+    print(json.dumps(values, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estado del modo incremental (--incremental) de los scripts de procesamiento.
+
+Por cada plataforma se guarda, para cada post, una llave estable (video_url,
+Enlace permanente o video_id) y un hash de su contenido. En la siguiente
+ejecución solo se clasifican las filas nuevas o modificadas y solo se
+recalculan los meses y artistas a los que pertenecen (o pertenecían).
+El estado se descarta completo si cambia la huella del roster de artistas.
+"""
+
+import hashlib
+import json
+import os
+
+# Subir este número si cambia el formato del estado o el cálculo de métricas
+STATE_VERSION = 1
+
+
+def content_hash(values):
+    """Hash del contenido de una fila (dict o lista de valores)."""
+    payload = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _to_json(value):
+    """Registros con to_dict (p. ej. engine.Post) se guardan como dict."""
+    to_dict = getattr(value, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f'{type(value).__name__} no se puede guardar en el estado')
+    return to_dict()
+
+
+class PostKeys:
+    """
+    Genera llaves únicas por post a partir de su URL. Si la misma URL aparece
+    varias veces en un export, las repeticiones se distinguen por su ordinal.
+    """
+
+    def __init__(self):
+        self._seen = {}
+
+    def next(self, url):
+        url = str(url)
+        count = self._seen.get(url, 0) + 1
+        self._seen[url] = count
+        return url if count == 1 else f'{url}#{count}'
+
+
+class IncrementalState:
+    """Estado persistido en JSON: plataforma -> {'posts': {...}, 'months': {...}}."""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.platforms = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == STATE_VERSION and data.get('fingerprint') == fingerprint:
+                self.platforms = data.get('platforms', {})
+
+    def platform(self, name):
+        """Estado de una plataforma; vacío en la primera ejecución."""
+        return self.platforms.setdefault(name, {'posts': {}, 'months': {}})
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': STATE_VERSION,
+                'fingerprint': self.fingerprint,
+                'platforms': self.platforms,
+            }, f, ensure_ascii=False, separators=(',', ':'), default=_to_json)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura de los exports de entrada.
+
+`SnapshotStore` convierte cada export (Excel o CSV) en un DataFrame una sola
+vez y lo guarda como snapshot binario (pickle de pandas) en .cache/snapshots/.
+La llave del snapshot es la ruta del archivo, su mtime y su tamaño, así que
+cualquier export nuevo o modificado se vuelve a leer y las siguientes
+ejecuciones cargan el snapshot en milisegundos en lugar de volver a parsear el
+Excel. Con `memory` (modo --watch) además conserva en memoria el DataFrame de
+la última versión de cada export, así que entre ejecuciones del mismo proceso
+solo se lee el export que cambió.
+
+`read_exports` lee varios exports de una plataforma (un directorio o un glob
+de exports mensuales) a la vez con un pool acotado de hilos.
+`read_export_chunks` los lee por bloques de filas y solo con las columnas
+que se usan (modo --chunksize de process_data_v2.py).
+
+Los .xlsx se leen con python-calamine si está instalado (mucho más rápido) y
+si no con openpyxl en modo de solo lectura.
+
+`load_roster` lee el roster de artistas de ArtistasSME.xlsx: de la hoja del
+libro si es un Excel real, o como texto con un nombre por línea (entre
+comillas, con encabezado "main_artist") como lo entrega el export actual.
+"""
+
+import hashlib
+import importlib.util
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Subir este número si cambia la forma de leer los exports
+SNAPSHOT_VERSION = 1
+
+# Encabezado de la columna de artistas del roster
+ROSTER_HEADER = 'main_artist'
+
+# Hilos para leer varios exports a la vez
+IO_WORKERS = 8
+
+
+def excel_engine():
+    """Motor de pandas para .xlsx: calamine si está instalado, si no openpyxl."""
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return 'openpyxl'
+
+
+def read_export(path):
+    """Lee un export en Excel o CSV según su extensión (sin snapshot)."""
+    import pandas as pd
+
+    if path.endswith('.xlsx'):
+        return pd.read_excel(path, engine=excel_engine())
+    return pd.read_csv(path)
+
+
+def read_exports(paths, snapshots=None, workers=IO_WORKERS):
+    """
+    Lee uno o varios exports (desde `snapshots` si se pasa un SnapshotStore)
+    y los junta en un DataFrame, en el orden de `paths`. Varios archivos se
+    leen a la vez con un pool de hasta `workers` hilos.
+    """
+    import pandas as pd
+
+    if not paths:
+        raise FileNotFoundError('No se encontró ningún export que leer')
+    read = snapshots.read if snapshots is not None else read_export
+    if len(paths) == 1:
+        return read(paths[0])
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+        frames = list(executor.map(read, paths))
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_export_chunks(paths, chunksize, columns, dtypes=None):
+    """
+    DataFrames de hasta `chunksize` filas de los exports, en orden, solo con
+    las columnas de `columns` que existan y con los tipos de `dtypes` en vez
+    de inferirlos. Los CSV se leen por bloques; un .xlsx (a lo más ~1M filas
+    por hoja) se lee completo con esas columnas y se entrega por bloques.
+    """
+    import pandas as pd
+
+    if not paths:
+        raise FileNotFoundError('No se encontró ningún export que leer')
+    columns = set(columns)
+    for path in paths:
+        if path.endswith('.xlsx'):
+            df = pd.read_excel(path, engine=excel_engine(), usecols=lambda column: column in columns, dtype=dtypes)
+            for start in range(0, len(df), chunksize):
+                yield df.iloc[start:start + chunksize].reset_index(drop=True)
+            del df
+            continue
+        with pd.read_csv(path, usecols=lambda column: column in columns, dtype=dtypes,
+                         chunksize=chunksize) as reader:
+            yield from reader
+
+
+class SnapshotStore:
+    """Snapshots de exports ya leídos, invalidados por mtime y tamaño."""
+
+    def __init__(self, directory, memory=False):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        # Snapshot -> DataFrame, solo con `memory`
+        self._frames = {} if memory else None
+        self._lock = threading.Lock()
+
+    def _paths(self, path):
+        import pandas as pd
+
+        stat = os.stat(path)
+        source = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+        key = f'{SNAPSHOT_VERSION}:{stat.st_mtime_ns}:{stat.st_size}:{pd.__version__}'
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        return source, os.path.join(self.directory, f'{source}.{digest}.pkl')
+
+    def read(self, path):
+        """DataFrame del export, desde el snapshot si el archivo no cambió."""
+        import pandas as pd
+
+        source, snapshot = self._paths(path)
+        if self._frames is not None:
+            with self._lock:
+                df = self._frames.get(snapshot)
+            if df is not None:
+                self.hits += 1
+                # Copia superficial: los scripts agregan columnas al DataFrame que reciben
+                return df.copy(deep=False)
+        try:
+            df = pd.read_pickle(snapshot)
+            self.hits += 1
+            return self._remember(source, snapshot, df)
+        except (OSError, EOFError, ValueError, ImportError, AttributeError):
+            pass
+
+        self.misses += 1
+        df = read_export(path)
+        os.makedirs(self.directory, exist_ok=True)
+        df.to_pickle(snapshot + '.tmp', compression=None)
+        os.replace(snapshot + '.tmp', snapshot)
+        # Los snapshots de versiones anteriores del mismo archivo ya no sirven
+        for name in os.listdir(self.directory):
+            if name.startswith(source + '.') and name != os.path.basename(snapshot):
+                os.remove(os.path.join(self.directory, name))
+        return self._remember(source, snapshot, df)
+
+    def _remember(self, source, snapshot, df):
+        if self._frames is None:
+            return df
+        prefix = os.path.join(self.directory, source + '.')
+        with self._lock:
+            for stale in [key for key in self._frames if key.startswith(prefix)]:
+                del self._frames[stale]
+            self._frames[snapshot] = df
+        return df.copy(deep=False)
+
+
+def _roster_names(values):
+    names = []
+    for value in values:
+        name = str(value).strip() if value is not None else ''
+        if name and name != ROSTER_HEADER:
+            names.append(name)
+    return names
+
+
+def load_roster(path):
+    """Lista de artistas del roster (en orden, sin encabezado ni vacíos)."""
+    if zipfile.is_zipfile(path):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, ())
+            # La columna main_artist, o la primera si el libro no tiene encabezado
+            if ROSTER_HEADER in header:
+                column = header.index(ROSTER_HEADER)
+                first = []
+            else:
+                column = 0
+                first = [header[0]] if header else []
+            return _roster_names(first + [row[column] for row in rows if len(row) > column])
+        finally:
+            workbook.close()
+
+    # Export en texto: un nombre por línea, entre comillas
+    with open(path, 'rb') as f:
+        text = f.read().decode('utf-8-sig', errors='ignore')
+    return _roster_names(line.strip().strip('"') for line in text.splitlines())
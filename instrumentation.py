@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentación de los scripts de procesamiento.
+
+`stage(nombre, plataforma)` mide una etapa (load, classify, ir,
+monthly_aggregation, artist_stats, rollup, sketches,
+serialization): tiempo, filas, filas/s y
+RSS máximo mientras estuvo activa. Las llamadas repetidas a la misma etapa
+(p. ej. una por lote) se acumulan. Al final `save_report` escribe un reporte
+JSON con las etapas, las tasas de acierto de las cachés y, con --profile, los
+puntos calientes de cProfile o tracemalloc.
+
+El RSS se muestrea en un hilo aparte, así que el máximo por etapa es
+aproximado (resolución de SAMPLE_INTERVAL) y, cuando las plataformas se
+procesan en paralelo, incluye la memoria de las etapas simultáneas. El hilo
+arranca con la primera etapa y se detiene con `close` (lo llaman
+`save_report` y `start_run`, así --watch no deja un hilo por reconstrucción).
+"""
+
+import cProfile
+import json
+import os
+import platform as platform_module
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Segundos entre muestras de RSS
+SAMPLE_INTERVAL = 0.02
+
+# Puntos calientes que se incluyen en el reporte con --profile
+PROFILE_TOP = 25
+
+
+def current_rss():
+    """RSS actual del proceso en bytes (el máximo histórico si no hay /proc)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Stage:
+    """Totales acumulados de una etapa."""
+
+    def __init__(self, name, platform):
+        self.name = name
+        self.platform = platform
+        self.seconds = 0.0
+        self.rows = 0
+        self.calls = 0
+        self.peak_rss = 0
+
+    def to_dict(self):
+        return {
+            'platform': self.platform,
+            'stage': self.name,
+            'seconds': round(self.seconds, 6),
+            'rows': self.rows,
+            'rows_per_sec': round(self.rows / self.seconds, 1) if self.rows and self.seconds else None,
+            'calls': self.calls,
+            'peak_rss_mb': round(self.peak_rss / 2 ** 20, 1),
+        }
+
+
+class Instrumentation:
+    """Etapas y cachés de una ejecución."""
+
+    def __init__(self, script=None):
+        self.script = script
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.caches = {}
+        self.peak_rss = 0
+        self._active = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = None
+
+    def _sample(self):
+        rss = current_rss()
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            for stage in self._active:
+                stage.peak_rss = max(stage.peak_rss, rss)
+
+    def _run_sampler(self, stop):
+        while True:
+            self._sample()
+            if stop.wait(SAMPLE_INTERVAL):
+                return
+
+    @contextmanager
+    def stage(self, name, platform=None, rows=0):
+        """Mide un bloque; `rows` (o `stage.rows += n` dentro del bloque) cuenta filas."""
+        if self._sampler is None:
+            self._stop = threading.Event()
+            self._sampler = threading.Thread(target=self._run_sampler, args=(self._stop,), daemon=True)
+            self._sampler.start()
+        with self._lock:
+            stage = self.stages.get((platform, name))
+            if stage is None:
+                stage = self.stages[(platform, name)] = Stage(name, platform)
+            stage.calls += 1
+            stage.rows += rows
+            self._active.append(stage)
+        self._sample()
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            elapsed = time.perf_counter() - start
+            self._sample()
+            with self._lock:
+                stage.seconds += elapsed
+                self._active.remove(stage)
+
+    def close(self):
+        """Detiene el hilo que muestrea el RSS (una etapa posterior lo vuelve a arrancar)."""
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def record_cache(self, name, cache):
+        """Guarda aciertos y fallos de una caché (MatchCache u otra con hits/misses)."""
+        total = cache.hits + cache.misses
+        self.caches[name] = {
+            'hits': cache.hits,
+            'misses': cache.misses,
+            'hit_rate': round(cache.hits / total, 4) if total else 0.0,
+        }
+
+    def report(self, args=None, profile=None):
+        self._sample()
+        report = {
+            'script': self.script,
+            'started': self.started.isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - self._start, 3),
+            'python': platform_module.python_version(),
+            'args': args or {},
+            'peak_rss_mb': round(self.peak_rss / 2 ** 20, 1),
+            'stages': [stage.to_dict() for stage in self.stages.values()],
+            'caches': self.caches,
+        }
+        if profile is not None:
+            report['profile'] = profile
+        return report
+
+    def print_summary(self):
+        print("\n=== Tiempos por etapa ===")
+        for stage in self.stages.values():
+            data = stage.to_dict()
+            rate = f"{data['rows_per_sec']:,.0f} filas/s" if data['rows_per_sec'] else ''
+            print(f"  {stage.platform or '-':<12} {stage.name:<20} {stage.seconds:8.2f}s  "
+                  f"{data['peak_rss_mb']:8.1f} MB  {rate}")
+        for name, cache in self.caches.items():
+            print(f"  Caché {name}: {cache['hit_rate']:.1%} aciertos ({cache['hits']}/{cache['hits'] + cache['misses']})")
+
+
+class Profiler:
+    """
+    --profile cpu (cProfile) o memory (tracemalloc) alrededor de la ejecución.
+    cProfile solo ve el hilo donde se activa: las funciones que corren en otros
+    hilos se envuelven con `wrap` para perfilarlas también. Los procesos de
+    --workers no se perfilan.
+    """
+
+    def __init__(self, mode=None, top=PROFILE_TOP):
+        self.mode = mode
+        self.top = top
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = None
+
+    def __enter__(self):
+        if self.mode == 'cpu':
+            self._main = cProfile.Profile()
+            self._main.enable()
+        elif self.mode == 'memory':
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._main is not None:
+            self._main.disable()
+        return False
+
+    def wrap(self, function):
+        """Versión de `function` que se perfila en el hilo donde corre."""
+        if self.mode != 'cpu':
+            return function
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+        return profiled
+
+    def hot_spots(self, dump_path=None):
+        """Puntos calientes para el reporte (None sin --profile)."""
+        if self.mode == 'cpu':
+            stats = pstats.Stats(self._main)
+            for profile in self._profiles:
+                stats.add(profile)
+            if dump_path:
+                os.makedirs(os.path.dirname(dump_path) or '.', exist_ok=True)
+                stats.dump_stats(dump_path)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+            return {
+                'mode': 'cpu',
+                'stats_file': dump_path,
+                'top': [{
+                    'function': f'{filename}:{line}({name})',
+                    'calls': calls,
+                    'tottime': round(tottime, 6),
+                    'cumtime': round(cumtime, 6),
+                } for (filename, line, name), (_, calls, tottime, cumtime, _) in rows],
+            }
+        if self.mode == 'memory':
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return {
+                'mode': 'memory',
+                'traced_current_mb': round(current / 2 ** 20, 1),
+                'traced_peak_mb': round(peak / 2 ** 20, 1),
+                'top': [{
+                    'location': str(stat.traceback),
+                    'size_kb': round(stat.size / 1024, 1),
+                    'count': stat.count,
+                } for stat in snapshot.statistics('lineno')[:self.top]],
+            }
+        return None
+
+    def print_hot_spots(self, profile):
+        if profile is None:
+            return
+        print(f"\n=== Puntos calientes ({profile['mode']}) ===")
+        for row in profile['top']:
+            if profile['mode'] == 'cpu':
+                print(f"  {row['tottime']:9.3f}s {row['cumtime']:9.3f}s {row['calls']:>10}  {row['function']}")
+            else:
+                print(f"  {row['size_kb']:10.1f} KB {row['count']:>9}  {row['location']}")
+
+
+# Instrumentación de la ejecución actual (los scripts la reinician con start_run)
+_current = Instrumentation()
+
+
+def start_run(script):
+    global _current
+    _current.close()
+    _current = Instrumentation(script)
+    return _current
+
+
+def current():
+    return _current
+
+
+def stage(name, platform=None, rows=0):
+    return _current.stage(name, platform, rows)
+
+
+def save_report(path, args=None, profiler=None, profile_dump=None):
+    """Escribe el reporte de la ejecución actual e imprime el resumen."""
+    profile = profiler.hot_spots(profile_dump) if profiler is not None else None
+    report = _current.report(args, profile)
+    _current.close()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+    _current.print_summary()
+    if profiler is not None:
+        profiler.print_hot_spots(profile)
+    return report
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de resoluciones mención -> artista.
+
+Las mismas menciones (@rauwalejandro, @sonymusicmx, ...) aparecen en miles de
+descripciones. `MatchCache` guarda el resultado de la búsqueda difusa de cada
+mención normalizada en un LRU acotado en memoria y, opcionalmente, en un
+archivo sqlite para que las siguientes ejecuciones no vuelvan a calcular la
+similitud. El archivo se invalida solo cuando cambia la huella del roster de
+artistas o del mapeo manual.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+
+# Subir este número si cambian las reglas de similitud del clasificador
+CACHE_VERSION = 1
+
+
+def roster_fingerprint(artists, manual_mapping=None):
+    """Hash estable del roster de artistas y del mapeo manual (en orden)."""
+    payload = json.dumps({
+        'version': CACHE_VERSION,
+        'artists': list(artists),
+        'manual_mapping': list((manual_mapping or {}).items()),
+    }, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MatchCache:
+    """LRU acotado de (tipo, umbral, mención) -> (score, índice de artista)."""
+
+    def __init__(self, path=None, fingerprint='', maxsize=100_000):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._db = None
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Los scripts pueden usar la caché desde el hilo de cada plataforma
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS matches ('
+            ' kind TEXT, threshold REAL, mention TEXT, score REAL, artist_idx INTEGER,'
+            ' PRIMARY KEY (kind, threshold, mention))')
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != self.fingerprint:
+            # Roster o mapeo manual distintos: los resultados guardados ya no valen
+            with self._db:
+                self._db.execute('DELETE FROM matches')
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+                    (self.fingerprint,))
+
+    def get(self, key):
+        """Retorna (score, idx) o None si la mención no se ha resuelto."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        if self._db is not None:
+            row = self._db.execute(
+                'SELECT score, artist_idx FROM matches WHERE kind = ? AND threshold = ? AND mention = ?',
+                key).fetchone()
+            if row is not None:
+                self.hits += 1
+                self._remember(key, row)
+                return row
+        self.misses += 1
+        return None
+
+    def __contains__(self, key):
+        """Si la mención ya está resuelta (no cuenta como acierto ni fallo)."""
+        if key in self._entries:
+            return True
+        if self._db is None:
+            return False
+        return self._db.execute(
+            'SELECT 1 FROM matches WHERE kind = ? AND threshold = ? AND mention = ?', key).fetchone() is not None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self._db is not None:
+            self._pending[key] = value
+
+    def update(self, entries):
+        """Agrega resoluciones calculadas en otro proceso."""
+        for key, value in entries.items():
+            self.put(key, value)
+
+    def take_pending(self):
+        """Retorna y olvida las resoluciones nuevas que aún no se guardan."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _remember(self, key, value):
+        self._entries[key] = tuple(value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Escribe en disco las resoluciones nuevas en una sola transacción."""
+        if self._db is None or not self._pending:
+            return
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO matches (kind, threshold, mention, score, artist_idx)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                [key + value for key, value in self._pending.items()])
+        self._pending.clear()
+
+    def close(self):
+        self.save()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
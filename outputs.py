@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escritura de los JSON del dashboard.
+
+`write_json` escribe minificado y de forma atómica (archivo temporal + rename
+en el mismo directorio), así que el dashboard o query_service.py nunca leen un
+archivo a medio escribir. `write_parallel` escribe varios archivos a la vez
+con un pool acotado de hilos: mientras uno espera al disco (la escritura
+libera el GIL) otro se serializa, en lugar de escribirlos uno tras otro.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos para escribir archivos a la vez
+WRITE_WORKERS = 4
+
+
+def write_json(path, value):
+    """Escribe `value` como JSON compacto en `path` de forma atómica."""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+
+
+def write_parallel(jobs, workers=WRITE_WORKERS):
+    """
+    Ejecuta las escrituras de `jobs` (funciones sin argumentos) a la vez.
+    Espera a todas y relanza el primer error.
+    """
+    jobs = list(jobs)
+    if len(jobs) <= 1 or workers <= 1:
+        for job in jobs:
+            job()
+        return
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = [executor.submit(job) for job in jobs]
+    for future in futures:
+        future.result()
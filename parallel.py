@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clasificación de artistas en paralelo (--workers N).
+
+Cada proceso del pool construye su propio `ArtistMatcher` una sola vez en el
+inicializador, así que el roster no se serializa en cada tarea. Las filas se
+reparten en bloques y `ProcessPoolExecutor.map` devuelve los resultados en el
+mismo orden de entrada, por lo que la salida es idéntica a la ejecución serial.
+Las menciones que cada proceso resuelve se devuelven al proceso principal para
+que su `MatchCache` las guarde en disco. Con `prepare` cada proceso hace antes
+el trabajo en lote de su bloque (p. ej. la cota difusa de score_usernames).
+"""
+
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from aliases import AliasResolver
+from artist_matcher import ArtistMatcher
+from match_cache import MatchCache
+
+# Estado de cada proceso del pool (inicializado una vez por proceso)
+_worker_matcher = None
+
+
+def _init_worker(artists, cache_path, fingerprint, aliases):
+    global _worker_matcher
+    _worker_matcher = ArtistMatcher(artists, MatchCache(cache_path, fingerprint),
+                                    AliasResolver(aliases) if aliases is not None else None)
+
+
+def _classify_chunk(classify, items, prepare=None):
+    """Clasifica un bloque de filas; retorna (resultados, menciones nuevas, aciertos, fallos)."""
+    cache = _worker_matcher.cache
+    hits, misses = cache.hits, cache.misses
+    if prepare is not None:
+        prepare(items, _worker_matcher)
+    results = [classify(item, _worker_matcher) for item in items]
+    return results, cache.take_pending(), cache.hits - hits, cache.misses - misses
+
+
+class ClassifierPool:
+    """Pool de procesos para aplicar una función de clasificación a muchas filas."""
+
+    def __init__(self, artists, workers, cache, chunks_per_worker=4, aliases=None):
+        self.workers = workers
+        self.cache = cache
+        self.chunks_per_worker = chunks_per_worker
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(list(artists), cache.path, cache.fingerprint,
+                      dict(aliases.aliases) if aliases is not None else None))
+
+    def map(self, classify, items, prepare=None):
+        """
+        Aplica `classify(item, matcher)` a cada elemento y retorna la lista de
+        resultados en el orden original. `prepare(items, matcher)`, si se pasa,
+        se llama una vez por bloque antes de clasificarlo. Ambas deben ser
+        funciones de módulo (se envían por referencia a los procesos).
+        """
+        items = list(items)
+        if not items:
+            return []
+        size = max(1, math.ceil(len(items) / (self.workers * self.chunks_per_worker)))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+
+        results = []
+        for chunk_results, pending, hits, misses in self._executor.map(
+                _classify_chunk, [classify] * len(chunks), chunks, [prepare] * len(chunks)):
+            results.extend(chunk_results)
+            # Las plataformas pueden clasificar en paralelo desde hilos distintos
+            with self._lock:
+                self.cache.update(pending)
+                self.cache.hits += hits
+                self.cache.misses += misses
+        return results
+
+    def close(self):
+        self._executor.shutdown()
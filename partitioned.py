@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Salida particionada para el dashboard.
+
+En lugar de un solo `data_<plataforma>.json` con todos los videos, cada
+plataforma se escribe como:
+
+    data/<plataforma>/manifest.json           métricas de cada mes + shard
+    data/<plataforma>/<mes>.<hash>.json       all_videos del mes (minificado)
+
+El nombre de cada shard lleva el hash de su contenido, así que el cliente
+solo descarga los meses que necesita y puede cachearlos como inmutables.
+El manifest se escribe al final y de forma atómica; los shards que ya no
+referencia se borran después.
+"""
+
+import hashlib
+import json
+import os
+
+# Subir este número si cambia el formato del manifest
+MANIFEST_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def compact_json(value):
+    """JSON minificado (sin espacios) conservando acentos."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def platform_dir(public_dir, platform):
+    return os.path.join(public_dir, 'data', platform)
+
+
+class ShardWriter:
+    """Escribe los shards mensuales de una plataforma y, al cerrar, su manifest."""
+
+    def __init__(self, public_dir, platform):
+        self.platform = platform
+        self.directory = platform_dir(public_dir, platform)
+        self.months = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write_month(self, year_month, summary, video_lines):
+        """
+        Escribe el shard de un mes. `video_lines` son los videos ya serializados
+        con `compact_json`, en orden.
+        """
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(self.directory, f'.{year_month}.tmp')
+        with open(tmp_path, 'wb') as f:
+            def write(text):
+                data = text.encode('utf-8')
+                digest.update(data)
+                f.write(data)
+            write('[')
+            for position, line in enumerate(video_lines):
+                write(line if position == 0 else ',' + line)
+            write(']')
+        sha256 = digest.hexdigest()
+        name = f'{year_month}.{sha256[:16]}.json'
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        self.months[year_month] = dict(summary, shard=f'data/{self.platform}/{name}', sha256=sha256)
+
+    def close(self):
+        """Escribe el manifest y borra los shards de ejecuciones anteriores."""
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(compact_json({
+                'version': MANIFEST_VERSION,
+                'platform': self.platform,
+                'months': self.months,
+            }))
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        current = {os.path.basename(month['shard']) for month in self.months.values()}
+        for name in os.listdir(self.directory):
+            if name.endswith('.json') and name != MANIFEST_NAME and name not in current:
+                os.remove(os.path.join(self.directory, name))
+
+
+def write_partitioned(public_dir, platform, monthly_data):
+    """Escribe {mes: {..., 'all_videos': [...]}} como manifest + shards."""
+    writer = ShardWriter(public_dir, platform)
+    for year_month, month in monthly_data.items():
+        summary = {key: value for key, value in month.items() if key != 'all_videos'}
+        writer.write_month(year_month, summary, (compact_json(video) for video in month['all_videos']))
+    writer.close()
+
+
+def read_partitioned(public_dir, platform):
+    """
+    Reconstruye {mes: {..., 'all_videos': [...]}} a partir del manifest y sus
+    shards ({} si no existe).
+    """
+    try:
+        with open(os.path.join(platform_dir(public_dir, platform), MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            return {}
+        data = {}
+        for year_month, month in manifest['months'].items():
+            with open(os.path.join(public_dir, month['shard']), 'r', encoding='utf-8') as f:
+                videos = json.load(f)
+            summary = {key: value for key, value in month.items() if key not in ('shard', 'sha256')}
+            data[year_month] = dict(summary, all_videos=videos)
+        return data
+    except (OSError, ValueError, KeyError):
+        return {}
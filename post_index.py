@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de posts (--post-index).
+
+Cada export semanal vuelve a incluir los posts anteriores con métricas
+actualizadas; procesar los exports tal cual cuenta esos posts dos veces.
+`PostIndex` guarda en sqlite una fila por post, con llave (plataforma, llave
+del spec: video_url, Enlace permanente o video_id), y la actualiza (upsert)
+con la versión del export más reciente según su mtime. Todos los exports de
+una ejecución se ingieren en una sola transacción (los que cambiaron se leen
+a la vez) y los que no cambiaron desde la ingesta anterior (misma ruta, mtime
+y tamaño) se saltan.
+
+Los scripts leen los posts del índice en lugar del export: las filas se
+guardan como texto (igual que las entrega csv.DictReader), en el orden en que
+cada post apareció por primera vez; `frame` las entrega como DataFrame.
+
+Con `history` (MetricHistory, history.py) cada export ingerido agrega además
+un snapshot de las métricas de sus posts al historial.
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import export_paths, platform_paths
+from ingest import IO_WORKERS
+
+# Subir este número si cambia el formato del índice
+INDEX_VERSION = 1
+
+
+def _text(value):
+    """Valor de una celda como texto, como lo dejaría un export en CSV."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def read_rows(path):
+    """Filas de un export (CSV o .xlsx) como dicts de texto."""
+    if zipfile.is_zipfile(path):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [_text(value) for value in next(rows, ())]
+            for values in rows:
+                yield {column: _text(value) for column, value in zip(header, values)}
+        finally:
+            workbook.close()
+        return
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+class PostIndex:
+    """Último snapshot de cada post, por plataforma y llave."""
+
+    def __init__(self, path, history=None):
+        self.path = path
+        self.history = history
+        # Exports saltados (sin cambios) e ingeridos, para el reporte de ejecución
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Los scripts leen el índice desde el hilo de cada plataforma
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != str(INDEX_VERSION):
+            with self._db:
+                self._db.execute('DROP TABLE IF EXISTS posts')
+                self._db.execute('DROP TABLE IF EXISTS exports')
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                                 (str(INDEX_VERSION),))
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS posts ('
+            ' platform TEXT, key TEXT, position INTEGER, snapshot_ns INTEGER, source TEXT, row TEXT,'
+            ' PRIMARY KEY (platform, key))')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS exports ('
+            ' platform TEXT, path TEXT, mtime_ns INTEGER, size INTEGER, rows INTEGER,'
+            ' PRIMARY KEY (platform, path))')
+
+    def ingest(self, exports):
+        """
+        Ingiere los exports de cada plataforma en una sola transacción.
+        `exports` es una lista de (spec, [rutas]); retorna las filas leídas.
+        Los exports nuevos o modificados se leen a la vez (hasta IO_WORKERS).
+        """
+        total = 0
+        with self._lock:
+            pending = []
+            for spec, paths in exports:
+                # Del más antiguo al más reciente: el último snapshot de cada post gana
+                stats = sorted(((os.stat(path), os.path.abspath(path)) for path in paths),
+                               key=lambda item: item[0].st_mtime_ns)
+                for stat, path in stats:
+                    seen = self._db.execute(
+                        'SELECT mtime_ns, size FROM exports WHERE platform = ? AND path = ?',
+                        (spec.name, path)).fetchone()
+                    if seen == (stat.st_mtime_ns, stat.st_size):
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+                        pending.append((spec, stat, path))
+            if not pending:
+                return 0
+            with ThreadPoolExecutor(max_workers=min(IO_WORKERS, len(pending))) as executor:
+                contents = executor.map(lambda item: list(read_rows(item[2])), pending)
+                with self._db:
+                    positions = {}
+                    for (spec, stat, path), rows in zip(pending, contents):
+                        position = positions.get(spec.name)
+                        if position is None:
+                            position = self._db.execute(
+                                'SELECT COALESCE(MAX(position), 0) FROM posts WHERE platform = ?',
+                                (spec.name,)).fetchone()[0]
+                        records = []
+                        keyed = []
+                        for line, row in enumerate(rows, start=2):
+                            # Sin llave el post no se puede deduplicar: se identifica por su línea
+                            key = row.get(spec.key) or f'{path}:{line}'
+                            position += 1
+                            records.append((spec.name, key, position, stat.st_mtime_ns, path,
+                                            json.dumps(row, ensure_ascii=False)))
+                            keyed.append((key, row))
+                        positions[spec.name] = position
+                        if self.history is not None:
+                            self.history.record(spec, stat.st_mtime_ns // 10**9, path, keyed)
+                        self._db.executemany(
+                            'INSERT INTO posts (platform, key, position, snapshot_ns, source, row)'
+                            ' VALUES (?, ?, ?, ?, ?, ?)'
+                            ' ON CONFLICT (platform, key) DO UPDATE SET'
+                            ' snapshot_ns = excluded.snapshot_ns, source = excluded.source, row = excluded.row'
+                            ' WHERE excluded.snapshot_ns >= posts.snapshot_ns',
+                            records)
+                        self._db.execute(
+                            'INSERT OR REPLACE INTO exports (platform, path, mtime_ns, size, rows)'
+                            ' VALUES (?, ?, ?, ?, ?)',
+                            (spec.name, path, stat.st_mtime_ns, stat.st_size, len(records)))
+                        total += len(records)
+        return total
+
+    def count(self, platform):
+        """Posts distintos de una plataforma."""
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM posts WHERE platform = ?',
+                                    (platform,)).fetchone()[0]
+
+    def rows(self, platform):
+        """Filas de los posts de una plataforma, en el orden de su primera aparición."""
+        with self._lock:
+            stored = self._db.execute(
+                'SELECT row FROM posts WHERE platform = ? ORDER BY position', (platform,)).fetchall()
+        return [json.loads(row) for row, in stored]
+
+    def frame(self, platform):
+        """DataFrame de los posts de una plataforma, con los mismos tipos que read_csv."""
+        import pandas as pd
+
+        rows = self.rows(platform)
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+        buffer.seek(0)
+        return pd.read_csv(buffer) if rows else pd.DataFrame(columns=columns)
+
+    def close(self):
+        if self.history is not None:
+            self.history.close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def index_exports(specs, extra=()):
+    """
+    Exports a ingerir por plataforma: los del spec más los de `extra`
+    ("plataforma=ruta", p. ej. de --export; la ruta puede ser un directorio
+    o un glob). Retorna [(spec, [rutas])].
+    """
+    extra_paths = platform_paths(specs, extra)
+    return [(spec, spec.paths + [path for value in extra_paths[spec.name] for path in export_paths(value)])
+            for spec in specs]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Versiones precomprimidas de las salidas del dashboard.
+
+Al final de cada ejecución `precompress` recorre la carpeta pública y, para
+cada .json y .bin, escribe a su lado `<archivo>.gz` (gzip) y `<archivo>.br`
+(brotli, si el paquete `brotli` está instalado). Así la compresión se hace una
+sola vez al generar los datos y no en cada request.
+
+El índice `precompressed.json` guarda por ruta relativa el ETag fuerte (hash
+del contenido sin comprimir), el tamaño del archivo original y el tamaño de
+cada codificación. server/index.ts sirve la variante que pida Accept-Encoding
+solo si el hash del original sigue siendo el del índice (el build de Vite
+copia los archivos, así que el mtime no sirve para comprobarlo). Los
+archivos que no cambiaron desde la ejecución anterior (mismo hash) no se
+vuelven a comprimir, y las variantes de archivos que ya no existen se borran.
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from outputs import WRITE_WORKERS
+
+# Subir este número si cambia el formato del índice
+PRECOMPRESS_VERSION = 1
+
+INDEX_NAME = 'precompressed.json'
+
+# Archivos que se comprimen y archivos que no (se reescriben después de comprimir)
+COMPRESSIBLE = ('.json', '.bin')
+SKIP_NAMES = (INDEX_NAME, 'run_report.json')
+
+# Abajo de este tamaño no vale la pena comprimir
+MIN_SIZE = 1024
+
+GZIP_LEVEL = 9
+# Calidad 11 es varias veces más lenta que 9 para un par de puntos de tamaño
+BROTLI_QUALITY = 9
+
+# Extensión de cada codificación
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+def encodings():
+    """Codificaciones disponibles: gzip siempre, br si está instalado `brotli`."""
+    if importlib.util.find_spec('brotli') is not None:
+        return ['br', 'gzip']
+    return ['gzip']
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        import brotli
+
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _write_atomic(path, data):
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+
+def _load_index(public_dir):
+    try:
+        with open(os.path.join(public_dir, INDEX_NAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get('version') != PRECOMPRESS_VERSION:
+        return {}
+    return index.get('files', {})
+
+
+def _sources(public_dir):
+    """Rutas relativas de los archivos a comprimir."""
+    for directory, _, names in os.walk(public_dir):
+        for name in names:
+            if name.endswith(COMPRESSIBLE) and name not in SKIP_NAMES and not name.startswith('.'):
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, public_dir).replace(os.sep, '/')
+
+
+def _precompress_file(public_dir, relative, previous, available):
+    """Entrada del índice de un archivo; lo comprime solo si cambió."""
+    path = os.path.join(public_dir, relative)
+    with open(path, 'rb') as f:
+        data = f.read()
+    etag = hashlib.sha256(data).hexdigest()[:32]
+    entry = {'etag': etag, 'size': len(data), 'encodings': {}}
+    if len(data) < MIN_SIZE:
+        return entry, False
+    reuse = previous is not None and previous.get('etag') == etag
+    for encoding in available:
+        variant = path + SUFFIXES[encoding]
+        if reuse and encoding in previous['encodings'] and os.path.exists(variant):
+            entry['encodings'][encoding] = previous['encodings'][encoding]
+            continue
+        compressed = _compress(data, encoding)
+        _write_atomic(variant, compressed)
+        entry['encodings'][encoding] = len(compressed)
+    # Una variante que ya no se genera (p. ej. se desinstaló brotli) no debe quedar vieja
+    for encoding, suffix in SUFFIXES.items():
+        if encoding not in entry['encodings'] and os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return entry, not reuse
+
+
+def precompress(public_dir, workers=WRITE_WORKERS):
+    """
+    Comprime las salidas de `public_dir` que cambiaron y actualiza el índice.
+    Retorna (archivos comprimidos, bytes sin comprimir, bytes en gzip).
+    """
+    previous = _load_index(public_dir)
+    available = encodings()
+    relatives = sorted(_sources(public_dir))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda relative: _precompress_file(public_dir, relative, previous.get(relative), available),
+            relatives))
+    files = {relative: entry for relative, (entry, _) in zip(relatives, results)}
+
+    # Variantes huérfanas: su archivo original ya no existe
+    for directory, _, names in os.walk(public_dir):
+        for name in names:
+            base, suffix = os.path.splitext(name)
+            if suffix in SUFFIXES.values() and base.endswith(COMPRESSIBLE):
+                relative = os.path.relpath(os.path.join(directory, base), public_dir).replace(os.sep, '/')
+                if relative not in files:
+                    os.remove(os.path.join(directory, name))
+
+    _write_atomic(os.path.join(public_dir, INDEX_NAME), json.dumps({
+        'version': PRECOMPRESS_VERSION,
+        'files': files,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    compressed = sum(1 for _, changed in results if changed)
+    raw = sum(entry['size'] for entry in files.values() if entry['encodings'])
+    gzipped = sum(entry['encodings'].get('gzip', 0) for entry in files.values())
+    return compressed, raw, gzipped
@@ -4,98 +4,83 @@ Script para procesar datasets de TikTok e Instagram y generar archivos JSON
 para el dashboard de analytics de Sony Music México.
 """
 
+import argparse
 import csv
-import json
+import os
 from datetime import datetime
-from difflib import SequenceMatcher
-from collections import defaultdict
-import statistics
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-def load_artists(filepath):
-    """Carga la lista de artistas desde el archivo de texto."""
-    artists = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and line != '"main_artist"':
-                # Remover comillas si existen
-                artist = line.strip('"')
-                if artist:
-                    artists.append(artist)
-    return artists
+import instrumentation
+from artist_matcher import NO_ARTIST, ArtistMatcher
+from engine import PlatformSpec, Post, platform_paths
+from ingest import load_roster
+from incremental import IncrementalState, PostKeys, content_hash
+from parallel import ClassifierPool
+from history import MetricHistory
+from post_index import PostIndex, index_exports
+from precompress import precompress
+from match_cache import MatchCache, roster_fingerprint
+from outputs import write_parallel
+from quantiles import DEFAULT_EXACT_LIMIT
+from streaming import MonthlySpool
+
+# Caché en disco de menciones ya resueltas (se invalida si cambia el roster)
+MATCH_CACHE_PATH = '.cache/artist_matches_v1.sqlite'
+
+# Filas que se clasifican juntas (un lote se reparte entre los procesos del pool)
+CLASSIFY_BATCH = 20000
+
+# Estado del modo --incremental (llave y hash de cada post ya procesado)
+STATE_PATH = '.cache/incremental_v1.json'
+
+# Índice de posts del modo --post-index (último snapshot de cada post)
+POST_INDEX_PATH = '.cache/posts_v1.sqlite'
+
+# Historial de métricas por post del modo --history (un snapshot por export ingerido)
+HISTORY_PATH = '.cache/history_v1.sqlite'
+
+# Exports de cada plataforma (agregar un spec aquí para procesar otra fuente)
+TIKTOK = PlatformSpec(
+    'tiktok', 'TikTok', 'videos', '/home/ubuntu/upload/tiktok_full_dataset.csv',
+    key='video_url', date='publish_date', date_format='%Y-%m-%d %H:%M:%S',
+    views='views', likes='likes', comments='comments', shares='shares',
+    url='video_url')  # Sin descripción ni collects: todo queda como "Sin artista"
+INSTAGRAM = PlatformSpec(
+    'instagram', 'Instagram', 'posts', '/home/ubuntu/upload/instagram_posts_by_accounts.csv',
+    key='Enlace permanente', date='date', date_format='%Y-%m-%d',
+    views='Visualizaciones', views_fallback='Alcance', likes='Me gusta', comments='Comentarios',
+    shares='Veces que se compartió', collects='Veces que se guardó', url='Enlace permanente',
+    description=('Descripción', 'Description'), description_length=100)
+PLATFORMS = [TIKTOK, INSTAGRAM]
 
-def normalize_text(text):
-    """Normaliza texto removiendo espacios y caracteres especiales."""
-    if not text:
-        return ""
-    return ''.join(c.lower() for c in text if c.isalnum())
+# Roster de artistas
+ROSTER_PATH = '/home/ubuntu/upload/ArtistasSME.xlsx'
+
+# Carpeta pública del dashboard (se cambia con --output-dir)
+OUTPUT_DIR = '/home/ubuntu/tiktok-dashboard/client/public'
+
+# Reporte de tiempos, memoria y cachés de cada ejecución (junto a los JSON)
+REPORT_NAME = 'run_report.json'
+
+# Salidas que solo escribe process_data_v2.py: describen los videos de otra
+# ejecución, así que se borran al reescribir los datos
+V2_ONLY_OUTPUTS = ['rollup.json', 'sketches.json']
+
+# Estadísticas de cProfile con --profile cpu (para pstats o snakeviz)
+PROFILE_PATH = '.cache/profile_v1.prof'
+
+def load_artists(filepath):
+    """Carga la lista de artistas del roster (hoja de Excel o texto)."""
+    return load_roster(filepath)
 
-def find_artist(description, artists, threshold=0.75):
+def find_artist(description, matcher, threshold=0.75):
     """
     Encuentra el artista en la descripción usando similitud de strings.
     Retorna el nombre del artista o "Sin artista" si no hay coincidencia.
+    La búsqueda usa el índice precompilado de `ArtistMatcher`.
     """
-    if not description:
-        return "Sin artista"
-    
-    description_lower = description.lower()
-    description_normalized = normalize_text(description)
-    
-    # Buscar @mentions primero
-    import re
-    mentions = re.findall(r'@(\w+)', description)
-    
-    best_match = None
-    best_score = 0
-    
-    for artist in artists:
-        artist_lower = artist.lower()
-        artist_normalized = normalize_text(artist)
-        
-        # Búsqueda exacta en @mentions (sin el @)
-        for mention in mentions:
-            mention_lower = mention.lower()
-            # Comparación exacta
-            if mention_lower == artist_lower:
-                return artist
-            # Comparación parcial (el mention contiene el artista o viceversa)
-            if artist_normalized in normalize_text(mention) or normalize_text(mention) in artist_normalized:
-                if len(artist_normalized) > 3:  # Evitar coincidencias muy cortas
-                    return artist
-        
-        # Búsqueda exacta en descripción (nombre completo)
-        if artist_lower in description_lower:
-            # Verificar que sea una palabra completa, no parte de otra palabra
-            pattern = r'\b' + re.escape(artist_lower) + r'\b'
-            if re.search(pattern, description_lower):
-                return artist
-        
-        # Búsqueda por palabras del nombre del artista
-        artist_words = artist_lower.split()
-        if len(artist_words) > 1:
-            # Si el artista tiene múltiples palabras, buscar cada una
-            words_found = sum(1 for word in artist_words if len(word) > 2 and word in description_lower)
-            if words_found >= len(artist_words) * 0.7:  # 70% de las palabras encontradas
-                return artist
-        
-        # Similitud de strings con SequenceMatcher para cada @mention
-        for mention in mentions:
-            similarity = SequenceMatcher(None, artist_normalized, normalize_text(mention)).ratio()
-            if similarity > best_score:
-                best_score = similarity
-                best_match = artist
-        
-        # También buscar el artista como substring normalizado
-        if len(artist_normalized) > 4 and artist_normalized in description_normalized:
-            similarity = 0.85
-            if similarity > best_score:
-                best_score = similarity
-                best_match = artist
-    
-    if best_score >= threshold:
-        return best_match
-    
-    return "Sin artista"
+    return matcher.find_artist(description, threshold)
 
 def calculate_ir(views, likes, shares, comments, collects):
     """Calcula el Interaction Rate."""
@@ -103,176 +88,306 @@ def calculate_ir(views, likes, shares, comments, collects):
         return 0.0
     return ((likes + shares + comments + collects) / views) * 100
 
-def process_tiktok(csv_path, artists):
-    """Procesa el dataset de TikTok y retorna datos agrupados por mes."""
-    monthly_data = defaultdict(lambda: {
-        'videos': [],
-        'year_month': ''
-    })
+def int_value(row, column):
+    """Valor entero de una columna del CSV (0 si la columna no aplica o está vacía)."""
+    if column is None:
+        return 0
+    return int(float(row.get(column, 0) or 0))
+
+def parse_row(spec, row, artist=NO_ARTIST):
+    """
+    Convierte una fila del export de `spec` (ya clasificada con `artist`)
+    en (year_month, Post), o None si no tiene fecha.
+    """
+    # Parsear fecha
+    date_str = row.get(spec.date)
+    if not date_str:
+        return None
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Parsear fecha
-            publish_date = datetime.strptime(row['publish_date'], '%Y-%m-%d %H:%M:%S')
-            year_month = publish_date.strftime('%Y-%m')
-            
-            # Extraer métricas
-            views = int(row['views'])
-            likes = int(row['likes'])
-            comments = int(row['comments'])
-            shares = int(row['shares'])
-            collects = 0  # TikTok no tiene collects en el dataset
-            
-            ir = calculate_ir(views, likes, shares, comments, collects)
-            
-            video = {
-                'date': publish_date.strftime('%Y-%m-%d'),
-                'description': '',  # TikTok no tiene descripción en el dataset
-                'artist': 'Sin artista',  # Sin descripción, no se puede extraer artista
-                'url': row['video_url'],
-                'views': views,
-                'likes': likes,
-                'shares': shares,
-                'comments': comments,
-                'collects': collects,
-                'ir': round(ir, 2)
-            }
-            
-            monthly_data[year_month]['videos'].append(video)
-            monthly_data[year_month]['year_month'] = year_month
+    publish_date = datetime.strptime(date_str, spec.date_format)
+    year_month = publish_date.strftime('%Y-%m')
     
-    # Calcular métricas por mes
-    result = {}
-    for year_month, data in monthly_data.items():
-        videos = data['videos']
-        
-        views_list = [v['views'] for v in videos]
-        likes_list = [v['likes'] for v in videos]
-        ir_list = [v['ir'] for v in videos]
-        
-        result[year_month] = {
-            'year_month': year_month,
-            'median_views': round(statistics.median(views_list), 2) if views_list else 0,
-            'avg_views': round(statistics.mean(views_list), 2) if views_list else 0,
-            'avg_likes': round(statistics.mean(likes_list), 2) if likes_list else 0,
-            'total_shares': sum(v['shares'] for v in videos),
-            'total_comments': sum(v['comments'] for v in videos),
-            'total_collects': sum(v['collects'] for v in videos),
-            'avg_ir': round(statistics.mean(ir_list), 2) if ir_list else 0,
-            'total_posts': len(videos),
-            'all_videos': videos
-        }
+    # Extraer descripción
+    description = spec.describe(row)
+    
+    # Extraer métricas
+    try:
+        views = int_value(row, spec.views)
+    except ValueError:
+        if spec.views_fallback is None:
+            raise
+        views = int_value(row, spec.views_fallback)
     
-    return result
+    likes = int_value(row, spec.likes)
+    comments = int_value(row, spec.comments)
+    shares = int_value(row, spec.shares)
+    collects = int_value(row, spec.collects)
+    
+    ir = calculate_ir(views, likes, shares, comments, collects)
+    
+    video = Post(
+        publish_date.strftime('%Y-%m-%d'),
+        description[:spec.description_length] if description else '',
+        artist,
+        row.get(spec.url, '') if spec.url else '',
+        views, likes, shares, comments, collects,
+        round(ir, 2))
+    return year_month, video
 
-def process_instagram(csv_path, artists):
-    """Procesa el dataset de Instagram y retorna datos agrupados por mes."""
-    monthly_data = defaultdict(lambda: {
-        'videos': [],
-        'year_month': ''
-    })
+def read_rows(spec, index=None):
+    """
+    Filas de los exports de `spec` (uno tras otro si la ruta es un directorio o
+    glob), o de sus posts en el índice si se pasa `index`.
+    """
+    if index is not None:
+        yield from index.rows(spec.name)
+        return
+    for path in spec.paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+def process_csv(spec, state=None, classify=None, exact_median_limit=DEFAULT_EXACT_LIMIT, index=None):
+    """
+    Lee el export en CSV de `spec` (o sus posts en `index`, un PostIndex) y retorna un `MonthlySpool` con sus datos
+    agrupados por mes: métricas corrientes por mes y videos volcados a disco,
+    así que la memoria no crece con el tamaño del export.
+    Con `state` (estado incremental de la plataforma) solo se parsean las filas
+    nuevas o modificadas y solo se recalculan los meses que las contienen.
+    Con `classify` las filas a parsear se clasifican por lotes y el artista de
+    cada una se pasa a `parse_row`.
+    """
+    platform = spec.name
+    posts = state['posts'] if state is not None else {}
+    months = state['months'] if state is not None else {}
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Parsear fecha
-            date_str = row['date']
-            if not date_str:
-                continue
-            
-            publish_date = datetime.strptime(date_str, '%Y-%m-%d')
-            year_month = publish_date.strftime('%Y-%m')
-            
-            # Extraer descripción
-            description = row.get('Descripción', '') or row.get('Description', '')
-            
-            # Encontrar artista
-            artist = find_artist(description, artists)
-            
-            # Extraer métricas
-            try:
-                views = int(float(row.get('Visualizaciones', 0) or 0))
-            except:
-                views = int(float(row.get('Alcance', 0) or 0))
-            
-            likes = int(float(row.get('Me gusta', 0) or 0))
-            comments = int(float(row.get('Comentarios', 0) or 0))
-            shares = int(float(row.get('Veces que se compartió', 0) or 0))
-            collects = int(float(row.get('Veces que se guardó', 0) or 0))
-            
-            ir = calculate_ir(views, likes, shares, comments, collects)
-            
-            video = {
-                'date': publish_date.strftime('%Y-%m-%d'),
-                'description': description[:100] if description else '',
-                'artist': artist,
-                'url': row.get('Enlace permanente', ''),
-                'views': views,
-                'likes': likes,
-                'shares': shares,
-                'comments': comments,
-                'collects': collects,
-                'ir': round(ir, 2)
-            }
-            
-            monthly_data[year_month]['videos'].append(video)
-            monthly_data[year_month]['year_month'] = year_month
+    spool = MonthlySpool(exact_median_limit)
+    # Solo el modo incremental necesita conservar cada post (se guarda en el estado)
+    current = {} if state is not None else None
+    affected = set()
+    changed = 0
+    batch = []
+    keys = PostKeys()
     
-    # Calcular métricas por mes
-    result = {}
-    for year_month, data in monthly_data.items():
-        videos = data['videos']
-        
-        views_list = [v['views'] for v in videos]
-        likes_list = [v['likes'] for v in videos]
-        ir_list = [v['ir'] for v in videos]
+    def parse_batch():
+        if classify:
+            with instrumentation.stage('classify', platform, len(batch)):
+                artists = classify([row for _, _, row in batch])
+        else:
+            artists = [NO_ARTIST] * len(batch)
+        with instrumentation.stage('ir', platform, len(batch)):
+            parsed_rows = [parse_row(spec, row, artist) for (_, _, row), artist in zip(batch, artists)]
+        with instrumentation.stage('monthly_aggregation', platform):
+            for (key, digest, _), parsed in zip(batch, parsed_rows):
+                year_month, video = parsed if parsed else (None, None)
+                if current is None:
+                    if year_month is not None:
+                        spool.add(year_month, video)
+                    continue
+                affected.add(year_month)
+                current[key] = {'hash': digest, 'month': year_month, 'video': video}
+        batch.clear()
+    
+    reader = read_rows(spec, index)
+    while True:
+        with instrumentation.stage('load', platform) as load:
+            rows = list(islice(reader, CLASSIFY_BATCH))
+            load.rows += len(rows)
+        if not rows:
+            break
+        for row in rows:
+            if current is None:
+                batch.append((None, None, row))
+            else:
+                key = keys.next(row.get(spec.key, ''))
+                digest = content_hash(row)
+                entry = posts.get(key)
+                if entry is not None and entry['hash'] == digest:
+                    # El estado guardado trae el video como dict
+                    if isinstance(entry['video'], dict):
+                        entry['video'] = Post.from_dict(entry['video'])
+                    current[key] = entry
+                    continue
+                if entry is not None:
+                    affected.add(entry['month'])
+                # Se reserva la posición de la fila para conservar el orden del export
+                current[key] = None
+                batch.append((key, digest, row))
+                changed += 1
+            if len(batch) >= CLASSIFY_BATCH:
+                parse_batch()
+    parse_batch()
+    
+    if current is None:
+        with instrumentation.stage('monthly_aggregation', platform):
+            spool.summarize()
+        return spool
+    
+    # Posts que ya no vienen en el export
+    for key in posts.keys() - current.keys():
+        affected.add(posts[key]['month'])
+    
+    with instrumentation.stage('monthly_aggregation', platform):
+        for entry in current.values():
+            if entry['month'] is not None:
+                spool.add(entry['month'], entry['video'])
         
-        result[year_month] = {
-            'year_month': year_month,
-            'median_views': round(statistics.median(views_list), 2) if views_list else 0,
-            'avg_views': round(statistics.mean(views_list), 2) if views_list else 0,
-            'avg_likes': round(statistics.mean(likes_list), 2) if likes_list else 0,
-            'total_shares': sum(v['shares'] for v in videos),
-            'total_comments': sum(v['comments'] for v in videos),
-            'total_collects': sum(v['collects'] for v in videos),
-            'avg_ir': round(statistics.mean(ir_list), 2) if ir_list else 0,
-            'total_posts': len(videos),
-            'all_videos': videos
-        }
+        # Calcular métricas por mes (solo los meses afectados)
+        summaries = spool.summarize(months, affected)
+    print(f"Filas nuevas o modificadas: {changed}, "
+          f"meses recalculados: {len(affected & summaries.keys())}/{len(summaries)}")
+    state['posts'] = current
+    state['months'] = summaries
     
-    return result
+    return spool
 
-def main():
-    """Función principal."""
+def process_platform(spec, matcher, state=None, pool=None, exact_median_limit=DEFAULT_EXACT_LIMIT, index=None):
+    """Procesa el export (o los posts indexados) de una plataforma y retorna sus datos agrupados por mes."""
+    classify = None
+    if spec.classified:
+        def classify(rows):
+            # Las filas sin fecha se descartan, no hace falta clasificarlas
+            descriptions = [spec.describe(row) if row.get(spec.date) else '' for row in rows]
+            if pool is not None:
+                artists = pool.map(find_artist, descriptions)
+            else:
+                artists = [find_artist(description, matcher) for description in descriptions]
+            if index is not None and index.history is not None:
+                index.history.set_artists(spec.name, {row[spec.key]: artist for row, artist in zip(rows, artists)
+                                                      if row.get(spec.key)})
+            return artists
+    
+    return process_csv(spec, state, classify, exact_median_limit, index)
+
+def parse_args():
+    """Argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--incremental', action='store_true',
+                        help='Procesar solo los posts nuevos o modificados desde la última ejecución')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Procesos para clasificar artistas en paralelo (1 = serial)')
+    parser.add_argument('--exact-median-limit', type=int, default=DEFAULT_EXACT_LIMIT,
+                        help='Posts por mes hasta los que la mediana es exacta (después se aproxima con t-digest)')
+    parser.add_argument('--single-file', action='store_true',
+                        help='Escribir data_<plataforma>.json completos en lugar de manifest + shards por mes')
+    parser.add_argument('--columnar', action='store_true',
+                        help='Escribir también la tabla de videos en formato columnar (columnar/<plataforma>.bin + .json)')
+    parser.add_argument('--input', action='append', default=[], metavar='PLATAFORMA=RUTA',
+                        help='Exports de una plataforma en lugar de los de /home/ubuntu/upload: archivo, directorio o glob (se puede repetir)')
+    parser.add_argument('--roster', default=ROSTER_PATH,
+                        help='Roster de artistas (ArtistasSME.xlsx)')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help=f'Carpeta pública del dashboard donde se escriben las salidas (por omisión {OUTPUT_DIR})')
+    parser.add_argument('--post-index', action='store_true',
+                        help=f'Ingerir los exports en el índice de posts ({POST_INDEX_PATH}) y procesar el último snapshot de cada post')
+    parser.add_argument('--export', action='append', default=[], metavar='PLATAFORMA=RUTA',
+                        help='Export adicional a ingerir en el índice con --post-index (se puede repetir)')
+    parser.add_argument('--history', action='store_true',
+                        help=f'Guardar un snapshot de las métricas de cada post por export ingerido en {HISTORY_PATH} (implica --post-index)')
+    parser.add_argument('--no-precompress', action='store_true',
+                        help='No escribir las versiones .gz/.br de las salidas (ni precompressed.json)')
+    parser.add_argument('--profile', choices=['cpu', 'memory'],
+                        help='Perfilar la ejecución con cProfile (cpu) o tracemalloc (memory) e incluir los puntos calientes en el reporte')
+    return parser.parse_args()
+
+def run(args, profiler):
+    """Procesa los datasets y escribe los archivos de salida."""
+    output_dir = args.output_dir
+    inputs = platform_paths(PLATFORMS, args.input)
+    platforms = [spec.with_path(inputs[spec.name]) if inputs[spec.name] else spec for spec in PLATFORMS]
+    
     print("Cargando lista de artistas...")
-    artists = load_artists('/home/ubuntu/upload/ArtistasSME.xlsx')
+    # El roster se lee mientras los exports se ingieren en el índice
+    with ThreadPoolExecutor(max_workers=1) as io:
+        roster = io.submit(load_artists, args.roster)
+        index = None
+        if args.post_index or args.history:
+            index = PostIndex(POST_INDEX_PATH, MetricHistory(HISTORY_PATH) if args.history else None)
+            with instrumentation.stage('load', 'index') as load:
+                load.rows += index.ingest(index_exports(platforms, args.export))
+            print(f"Índice de posts: {index.misses} exports ingeridos, {index.hits} sin cambios, "
+                  + ", ".join(f"{index.count(spec.name)} {spec.noun} de {spec.label}" for spec in platforms))
+            instrumentation.current().record_cache('post_index', index)
+        artists = roster.result()
     print(f"Cargados {len(artists)} artistas")
+    cache = MatchCache(MATCH_CACHE_PATH, roster_fingerprint(artists))
+    matcher = ArtistMatcher(artists, cache)
+    state = IncrementalState(STATE_PATH, roster_fingerprint(artists)) if args.incremental else None
+    pool = ClassifierPool(artists, args.workers, cache) if args.workers > 1 else None
     
-    print("\nProcesando dataset de TikTok...")
-    tiktok_data = process_tiktok('/home/ubuntu/upload/tiktok_full_dataset.csv', artists)
-    print(f"Procesados {sum(d['total_posts'] for d in tiktok_data.values())} videos de TikTok")
+    print(f"\nProcesando datasets de {' e '.join(spec.label for spec in platforms)}...")
+    # Las plataformas son independientes: con --workers se procesan a la vez
+    with ThreadPoolExecutor(max_workers=len(platforms) if pool else 1) as executor:
+        futures = [executor.submit(profiler.wrap(process_platform), spec, matcher,
+                                   state.platform(spec.name) if state else None, pool,
+                                   args.exact_median_limit, index)
+                   for spec in platforms]
+        outputs = [(spec, future.result()) for spec, future in zip(platforms, futures)]
+    if pool:
+        pool.close()
+    if index:
+        index.close()
+    for spec, platform_data in outputs:
+        print(f"Procesados {platform_data.total_posts()} {spec.noun} de {spec.label}")
     
-    print("\nProcesando dataset de Instagram...")
-    instagram_data = process_instagram('/home/ubuntu/upload/instagram_posts_by_accounts.csv', artists)
-    print(f"Procesados {sum(d['total_posts'] for d in instagram_data.values())} posts de Instagram")
+    cache.close()
+    print(f"Caché de menciones: {cache.hits} aciertos, {cache.misses} fallos")
+    instrumentation.current().record_cache('artist_matches', cache)
     
-    # Guardar archivos JSON
+    # Guardar archivos JSON (las plataformas a la vez)
     print("\nGuardando archivos JSON...")
-    with open('/home/ubuntu/tiktok-dashboard/client/public/data_tiktok.json', 'w', encoding='utf-8') as f:
-        json.dump(tiktok_data, f, ensure_ascii=False, indent=2)
+    os.makedirs(output_dir, exist_ok=True)
+    def save(spec, platform_data):
+        platform = spec.name
+        with instrumentation.stage('serialization', platform, platform_data.total_posts()):
+            if args.single_file:
+                platform_data.write_json(f'{output_dir}/data_{platform}.json')
+            else:
+                platform_data.write_partitioned(output_dir, platform)
+            if args.columnar:
+                os.makedirs(f'{output_dir}/columnar', exist_ok=True)
+                platform_data.write_columnar(f'{output_dir}/columnar/{platform}')
+    write_parallel([lambda spec=spec, platform_data=platform_data: save(spec, platform_data)
+                    for spec, platform_data in outputs])
+    for name in V2_ONLY_OUTPUTS:
+        if os.path.exists(f'{output_dir}/{name}'):
+            os.remove(f'{output_dir}/{name}')
+    
+    # Versiones .gz/.br para el servidor (solo de los archivos que cambiaron)
+    if not args.no_precompress:
+        with instrumentation.stage('serialization', 'precompress'):
+            compressed, raw, gzipped = precompress(output_dir)
+        print(f"Precomprimidos {compressed} archivos ({raw / 2**20:.1f} MB -> {gzipped / 2**20:.1f} MB en gzip)")
     
-    with open('/home/ubuntu/tiktok-dashboard/client/public/data_instagram.json', 'w', encoding='utf-8') as f:
-        json.dump(instagram_data, f, ensure_ascii=False, indent=2)
+    # El estado solo se guarda una vez escritos los JSON
+    if state:
+        state.save()
     
     print("\n✓ Archivos generados exitosamente:")
-    print("  - client/public/data_tiktok.json")
-    print("  - client/public/data_instagram.json")
+    for spec, _ in outputs:
+        platform = spec.name
+        if args.single_file:
+            print(f"  - {output_dir}/data_{platform}.json")
+        else:
+            print(f"  - {output_dir}/data/{platform}/ (manifest.json + shards por mes)")
+        if args.columnar:
+            print(f"  - {output_dir}/columnar/{platform}.bin (+ {platform}.json)")
     
     # Mostrar estadísticas
     print("\n=== Estadísticas ===")
-    print(f"TikTok: {len(tiktok_data)} meses, {sum(d['total_posts'] for d in tiktok_data.values())} videos")
-    print(f"Instagram: {len(instagram_data)} meses, {sum(d['total_posts'] for d in instagram_data.values())} posts")
+    for spec, platform_data in outputs:
+        print(f"{spec.label}: {len(platform_data.months)} meses, {platform_data.total_posts()} {spec.noun}")
+        platform_data.close()
+
+def main():
+    """Función principal."""
+    args = parse_args()
+    instrumentation.start_run('process_data.py')
+    profiler = instrumentation.Profiler(args.profile)
+    with profiler:
+        run(args, profiler)
+    report_path = os.path.join(args.output_dir, REPORT_NAME)
+    instrumentation.save_report(report_path, vars(args), profiler if args.profile else None, PROFILE_PATH)
+    print(f"\nReporte de ejecución: {report_path}")
 
 if __name__ == '__main__':
     main()
@@ -5,13 +5,82 @@ Script para procesar datasets de TikTok e Instagram
 Clasifica videos por artista usando username @ más similar
 """
 
+import argparse
 import pandas as pd
 import json
 import re
 import math
+import os
+import time
+import traceback
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from difflib import SequenceMatcher
 
+import instrumentation
+from aliases import AliasResolver, load_aliases
+from artist_matcher import ArtistMatcher
+from chunked import DEFAULT_CHUNKSIZE, FactTable, RunningStats, read_dtypes
+from incremental import IncrementalState, PostKeys
+from match_cache import MatchCache, roster_fingerprint
+from columnar import write_columnar
+from engine import PlatformSpec, platform_paths
+from ingest import IO_WORKERS, SnapshotStore, load_roster, read_export_chunks, read_exports
+from outputs import write_json, write_parallel
+from parallel import ClassifierPool
+from partitioned import read_partitioned, write_partitioned
+from history import MetricHistory
+from post_index import PostIndex, index_exports
+from precompress import precompress
+from rollup import build_rollup, build_sketches
+from search_index import SearchIndexBuilder, write_search_index
+from streaming import VideoSpool
+from watch import FileWatcher, file_signatures
+
+# Caché en disco de menciones ya resueltas (se invalida si cambia el roster o el mapeo)
+MATCH_CACHE_PATH = '.cache/artist_matches_v2.sqlite'
+
+# Estado del modo --incremental (llave y hash de cada post ya procesado)
+STATE_PATH = '.cache/incremental_v2.json'
+
+# Exports de cada plataforma (agregar un spec aquí para procesar otra fuente)
+TIKTOK = PlatformSpec(
+    'tiktok', 'TikTok', 'videos', '/home/ubuntu/upload/SMETikTokAccount(1).xlsx',
+    key='video_id', date='date', views='plays', likes='likes', comments='comments',
+    shares='shares', collects='collects', url='video_id', description=('description',))
+INSTAGRAM = PlatformSpec(
+    'instagram', 'Instagram', 'posts', '/home/ubuntu/upload/instagram_posts_by_accounts.csv',
+    key='Enlace permanente', date='date', views='Visualizaciones', likes='Me gusta',
+    comments='Comentarios', shares='Veces que se compartió', collects='Veces que se guardó',
+    url='Enlace permanente', description=('Descripción',))
+PLATFORMS = [TIKTOK, INSTAGRAM]
+
+# Índice de posts del modo --post-index (último snapshot de cada post)
+POST_INDEX_PATH = '.cache/posts_v2.sqlite'
+
+# Historial de métricas por post del modo --history (un snapshot por export ingerido)
+HISTORY_PATH = '.cache/history_v2.sqlite'
+
+# Snapshots de los exports ya leídos (se invalidan si cambia el mtime o el tamaño)
+SNAPSHOT_DIR = '.cache/snapshots'
+
+# Roster de artistas
+ROSTER_PATH = '/home/ubuntu/upload/ArtistasSME.xlsx'
+
+# Carpeta pública del dashboard
+OUTPUT_DIR = 'client/public'
+
+# Reporte de tiempos, memoria y cachés de cada ejecución (junto a los JSON)
+REPORT_PATH = f'{OUTPUT_DIR}/run_report.json'
+
+# Estadísticas de cProfile con --profile cpu (para pstats o snakeviz)
+PROFILE_PATH = '.cache/profile_v2.prof'
+
+# Tabla de alias (clave: subcadena a buscar, valor: artista correcto)
+# Compartida por find_best_artist_match y la normalización de nombres
+# (junto a este script, para que no dependa del directorio de trabajo)
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'aliases.json')
+
 def safe_float(value, default=0.0):
     """Convierte a float y reemplaza NaN/inf con valor por defecto"""
     try:
@@ -36,316 +105,767 @@ def similarity(a, b):
     """Calcula similitud entre dos strings (0-1)"""
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
-def load_artists():
-    """Carga lista de artistas desde archivo"""
-    try:
-        with open('/home/ubuntu/upload/ArtistasSME.xlsx', 'r', encoding='utf-8') as f:
-            artists = [line.strip() for line in f if line.strip()]
-        print(f"Cargados {len(artists)} artistas")
-        return artists
-    except:
-        # Si falla, intentar leer como texto plano
-        with open('/home/ubuntu/upload/ArtistasSME.xlsx', 'rb') as f:
-            content = f.read().decode('utf-8', errors='ignore')
-            artists = [line.strip() for line in content.split('\n') if line.strip()]
-        print(f"Cargados {len(artists)} artistas")
-        return artists
+def load_artists(path=ROSTER_PATH):
+    """Carga lista de artistas del roster (hoja de Excel o texto, sin comillas ni encabezado)"""
+    artists = load_roster(path)
+    print(f"Cargados {len(artists)} artistas")
+    return artists
+
+USERNAME_PATTERN = r'@([a-zA-Z0-9_.]+)'
 
 def extract_usernames(text):
     """Extrae todos los usernames @ de un texto"""
     if pd.isna(text):
         return []
-    matches = re.findall(r'@([a-zA-Z0-9_.]+)', str(text))
+    matches = re.findall(USERNAME_PATTERN, str(text))
     return matches
 
-def find_best_artist_match(usernames, artists, threshold=0.6):
+def find_best_artist_match(usernames, matcher, threshold=0.6):
     """
     Encuentra el artista más similar a los usernames encontrados
     Retorna (artista, similitud) o (None, 0) si no hay match
+    La similitud se calcula con el índice precompilado de `ArtistMatcher`
     """
-    # Mapeo manual de correcciones (clave: subcadena a buscar, valor: artista correcto)
-    manual_mapping = {
-        'dope': 'Dove Cameron',
-        'nath': 'Nathy Peluso',
-        'calo': 'Carlos Rivera',
-        'belo': 'BEÉLE',
-        'beelo': 'BEÉLE',
-        'pereza': 'Fuerza Regida',
-        'miguel': 'Miguel Bueno',
-        'mdo': 'Mon Laferte',
-        'haim': 'Ha*Ash',
-        'jain': 'Juan Luis',
-        'neton': 'Neto Bernal'
-    }
-    
     if not usernames:
         return None, 0
     
-    # Primero verificar mapeo manual (búsqueda exacta y por subcadena)
-    for username in usernames:
-        username_lower = username.lower()
-        # Búsqueda exacta
-        if username_lower in manual_mapping:
-            return manual_mapping[username_lower], 1.0
-        # Búsqueda por subcadena (si el username contiene la clave)
-        for key, artist in manual_mapping.items():
-            if key in username_lower:
+    # Primero verificar la tabla de alias (búsqueda exacta y por subcadena)
+    if matcher.aliases is not None:
+        for username in usernames:
+            artist = matcher.aliases.lookup(username)
+            if artist is not None:
                 return artist, 1.0
     
-    best_artist = None
-    best_similarity = 0
-    
-    for username in usernames:
-        for artist in artists:
-            sim = similarity(username, artist)
-            if sim > best_similarity and sim >= threshold:
-                best_similarity = sim
-                best_artist = artist
-    
-    return best_artist, best_similarity
+    return matcher.best_match(usernames, threshold)
 
-def process_tiktok(artists):
-    """Procesa dataset de TikTok"""
-    print("\nProcesando dataset de TikTok...")
-    
-    # Leer datos
-    df = pd.read_excel('/home/ubuntu/upload/SMETikTokAccount(1).xlsx')
-    df['date'] = pd.to_datetime(df['date'])
-    
-    # Clasificar por artista
-    classified_count = 0
-    for idx, row in df.iterrows():
-        usernames = extract_usernames(row['description'])
-        artist, sim = find_best_artist_match(usernames, artists)
-        
-        if artist:
-            df.at[idx, 'artist'] = artist
-            df.at[idx, 'artist_similarity'] = sim
-            classified_count += 1
+def fuzzy_usernames(keys, aliases):
+    """Usernames de las tuplas sin alias (las que find_best_artist_match compara contra el roster)"""
+    return {username for key in keys
+            if aliases is None or all(aliases.lookup(username) is None for username in key)
+            for username in key}
+
+def score_fuzzy_usernames(keys, matcher):
+    """Puntúa en lote contra todo el roster los usernames de `keys` que llegan a la búsqueda difusa"""
+    matcher.score_usernames(fuzzy_usernames(keys, matcher.aliases))
+
+def safe_float_series(series):
+    """Versión vectorizada de safe_float para una columna completa"""
+    values = pd.to_numeric(series, errors='coerce').astype(float)
+    return values.replace([math.inf, -math.inf], math.nan).fillna(0.0)
+
+def safe_int_series(series):
+    """Versión vectorizada de safe_int para una columna completa"""
+    return safe_float_series(series).astype('int64')
+
+def upper_median(values):
+    """Elemento central de los valores ordenados (el superior si el total es par)"""
+    return values.sort_values().iloc[len(values) // 2]
+
+def classify_descriptions(descriptions, matcher, pool=None):
+    """
+    Clasifica una columna de descripciones por artista
+    Cada tupla única de usernames se resuelve una sola vez (en paralelo con `pool`)
+    Retorna (artista, similitud) como columnas
+    """
+    texts = descriptions.where(descriptions.notna(), '').astype(str)
+    usernames = texts.str.findall(USERNAME_PATTERN).map(tuple)
+    
+    unique_keys = list(usernames.unique())
+    if pool is not None:
+        # Cada proceso puntúa en lote los usernames de su bloque
+        results = pool.map(find_best_artist_match, [list(key) for key in unique_keys], prepare=score_fuzzy_usernames)
+    else:
+        score_fuzzy_usernames(unique_keys, matcher)
+        results = [find_best_artist_match(list(key), matcher) for key in unique_keys]
+    
+    matches = {}
+    for key, (artist, sim) in zip(unique_keys, results):
+        matches[key] = (artist, sim) if artist else ('Sin artista', 0)
+    
+    artist = usernames.map(lambda key: matches[key][0])
+    artist_similarity = usernames.map(lambda key: matches[key][1]).astype(float)
+    return artist, artist_similarity
+
+def load_previous_output(path):
+    """Carga un JSON generado por una ejecución anterior ({} si no existe)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def load_previous_monthly(platform, single_file=False):
+    """Datos mensuales de la ejecución anterior ({} si no existen)"""
+    if single_file:
+        return load_previous_output(f'{OUTPUT_DIR}/data_{platform}.json')
+    return read_partitioned(OUTPUT_DIR, platform)
+
+def save_monthly(platform, monthly_data, single_file=False, columnar=False):
+    """
+    Guarda los datos mensuales como manifest + shards, o en un solo JSON con --single-file
+    Con --columnar también escribe la tabla de videos en formato columnar
+    """
+    if single_file:
+        write_json(f'{OUTPUT_DIR}/data_{platform}.json', monthly_data)
+    else:
+        write_partitioned(OUTPUT_DIR, platform, monthly_data)
+    if columnar:
+        os.makedirs(f'{OUTPUT_DIR}/columnar', exist_ok=True)
+        write_columnar(f'{OUTPUT_DIR}/columnar/{platform}', monthly_data)
+
+def save_spool(platform, spool, single_file=False, columnar=False):
+    """Como save_monthly, con los videos volcados en un VideoSpool (modo --chunksize)"""
+    if single_file:
+        spool.write_json(f'{OUTPUT_DIR}/data_{platform}.json')
+    else:
+        spool.write_partitioned(OUTPUT_DIR, platform)
+    if columnar:
+        os.makedirs(f'{OUTPUT_DIR}/columnar', exist_ok=True)
+        spool.write_columnar(f'{OUTPUT_DIR}/columnar/{platform}')
+
+def description_series(df, spec):
+    """Columna de descripción de la plataforma ('' si no tiene)"""
+    if not spec.classified:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[spec.description[0]]
+
+def classify_posts(df, spec, matcher, state=None, pool=None):
+    """
+    Agrega las columnas artist y artist_similarity al DataFrame
+    Con `state` (estado incremental de la plataforma) solo se clasifican las filas
+    nuevas o modificadas; el resto se toma del estado guardado
+    Retorna (meses afectados, artistas afectados), o None sin `state`
+    """
+    if state is None:
+        df['artist'], df['artist_similarity'] = classify_descriptions(description_series(df, spec), matcher, pool)
+        return None
+    
+    keys = PostKeys()
+    post_keys = [keys.next(value) for value in df[spec.key]]
+    hashes = pd.util.hash_pandas_object(df, index=False).map('{:016x}'.format).tolist()
+    posts = state['posts']
+    previous = [posts.get(key) for key in post_keys]
+    changed = pd.Series([entry is None or entry['hash'] != digest
+                         for entry, digest in zip(previous, hashes)], index=df.index, dtype=bool)
+    
+    artist = pd.Series([entry['artist'] if entry else 'Sin artista' for entry in previous],
+                       index=df.index, dtype=object)
+    artist_similarity = pd.Series([entry['artist_similarity'] if entry else 0.0 for entry in previous],
+                                  index=df.index, dtype=float)
+    if changed.any():
+        artist[changed], artist_similarity[changed] = classify_descriptions(
+            description_series(df, spec)[changed], matcher, pool)
+    df['artist'] = artist
+    df['artist_similarity'] = artist_similarity
+    
+    # Posts modificados o que ya no vienen en el export: sus meses y artistas anteriores también cambian
+    stale = [entry for entry, is_changed in zip(previous, changed) if entry is not None and is_changed]
+    stale += [posts[key] for key in posts.keys() - set(post_keys)]
+    affected_months = set(df.loc[changed, 'month']) | {entry['month'] for entry in stale}
+    aliases = matcher.aliases
+    affected_artists = {normalize_artist_name(artist, aliases) for artist in set(df.loc[changed, 'artist'])}
+    affected_artists |= {normalize_artist_name(entry['artist'], aliases) for entry in stale}
+    
+    state['posts'] = {
+        key: {'hash': digest, 'month': month, 'artist': name, 'artist_similarity': float(sim)}
+        for key, digest, month, name, sim in zip(post_keys, hashes, df['month'], df['artist'], df['artist_similarity'])
+    }
+    print(f"Filas nuevas o modificadas: {int(changed.sum())}, eliminadas: {len(posts.keys() - set(post_keys))}")
+    return affected_months, affected_artists
+
+def monthly_summary(df, views, likes, comments, shares, collects):
+    """
+    Métricas de cada mes ({mes: métricas}, meses en orden) con un solo groupby().agg()
+    Retorna también el groupby para ubicar los videos de cada mes
+    """
+    aggregations = {
+        'total_posts': (views, 'size'),
+        'median_views': (views, upper_median),
+        'avg_views': (views, 'mean'),
+        'avg_likes': (likes, 'mean'),
+        'avg_ir': ('ir', 'mean'),
+        'total_comments': (comments, 'sum'),
+    }
+    if shares in df.columns:
+        aggregations['total_shares'] = (shares, 'sum')
+    if collects in df.columns:
+        aggregations['total_collects'] = (collects, 'sum')
+    
+    grouped = df.groupby('month')
+    summary = {month: month_metrics(stats) for month, stats in grouped.agg(**aggregations).to_dict('index').items()}
+    return summary, grouped
+
+def month_metrics(stats):
+    """Métricas de salida de un mes a partir de sus agregados (llaves de monthly_summary)"""
+    return {
+        'total_posts': int(stats['total_posts']),
+        'median_views': safe_float(stats['median_views']),
+        'avg_views': safe_float(stats['avg_views']),
+        'avg_likes': safe_float(stats['avg_likes']),
+        'avg_ir': safe_float(stats['avg_ir']),
+        'total_shares': safe_int(stats['total_shares']) if 'total_shares' in stats else 0,
+        'total_comments': safe_int(stats['total_comments']),
+        'total_collects': safe_int(stats['total_collects']) if 'total_collects' in stats else 0
+    }
+
+def build_monthly_data(df, videos, views, likes, comments, shares, collects):
+    """
+    Agrupa por mes con monthly_summary
+    `videos` son los registros por video ya proyectados, en el orden de `df`
+    """
+    summary, grouped = monthly_summary(df, views, likes, comments, shares, collects)
+    positions = grouped.indices
+    records = videos.to_dict('records')
+    return {month: dict(stats, all_videos=[records[i] for i in positions[month]])
+            for month, stats in summary.items()}
+
+def metric_series(rows, column):
+    """Métrica entera de una columna del export (0 si la plataforma no la tiene)"""
+    if column is None:
+        return pd.Series(0, index=rows.index, dtype='int64')
+    return safe_int_series(rows[column])
+
+def index_descriptions(builder, df, spec):
+    """Agrega las descripciones completas de `df` (en su orden) al índice de búsqueda"""
+    descriptions = description_series(df, spec)
+    texts = descriptions.where(descriptions.notna(), '').astype(str)
+    for month, text in zip(df['month'], texts):
+        builder.add(month, text)
+
+def platform_videos(rows, spec):
+    """Registros por video de una plataforma (mismo orden que `rows`)"""
+    def metric(column):
+        return metric_series(rows, column)
+    
+    return pd.DataFrame({
+        'date': rows['date'].dt.strftime('%Y-%m-%d'),
+        'description': description_series(rows, spec).map(str).str[:spec.description_length],
+        'artist': rows['artist'],
+        'views': metric(spec.views),
+        'likes': metric(spec.likes),
+        'comments': metric(spec.comments),
+        'shares': metric(spec.shares),
+        'collects': metric(spec.collects),
+        'ir': safe_float_series(rows['ir']),
+        'url': rows[spec.url].map(str) if spec.url else ''
+    })
+
+def rollup_rows(df, spec):
+    """Una fila por video con las columnas del cubo (rollup.py)"""
+    return pd.DataFrame({
+        'platform': spec.name,
+        'month': df['month'],
+        'artist': df['artist'],
+        'views': metric_series(df, spec.views),
+        'likes': metric_series(df, spec.likes),
+        'shares': metric_series(df, spec.shares),
+        'comments': metric_series(df, spec.comments),
+        'collects': metric_series(df, spec.collects),
+        'ir': safe_float_series(df['ir'])
+    })
+
+def load_frame(spec, snapshots=None, index=None):
+    """
+    DataFrame de los exports de una plataforma (uno o varios, leídos a la vez) con date y month
+    Con `snapshots` (SnapshotStore) cada export se carga del snapshot si no cambió
+    Con `index` (PostIndex) se toman los posts del índice en lugar de los exports
+    """
+    with instrumentation.stage('load', spec.name) as load:
+        if index is not None:
+            df = index.frame(spec.name)
         else:
-            df.at[idx, 'artist'] = 'Sin artista'
-            df.at[idx, 'artist_similarity'] = 0
+            df = read_exports(spec.paths, snapshots)
+        add_month(df, spec)
+        load.rows += len(df)
+    return df
+
+def add_month(df, spec):
+    """Agrega las columnas date (datetime) y month ('AAAA-MM')"""
+    df['date'] = pd.to_datetime(df[spec.date])
+    df['month'] = df['date'].dt.to_period('M').astype(str)
+
+def classify_and_score(df, spec, matcher, state=None, pool=None):
+    """
+    Agrega artist (ya normalizado), artist_similarity e ir al DataFrame
+    Retorna (resultado de classify_posts, posts clasificados)
+    """
+    platform = spec.name
     
-    print(f"Videos clasificados: {classified_count}/{len(df)} ({classified_count/len(df)*100:.1f}%)")
+    # Clasificar por artista (en modo incremental solo las filas nuevas o modificadas)
+    with instrumentation.stage('classify', platform, len(df)):
+        incremental = classify_posts(df, spec, matcher, state, pool)
+    classified_count = int((df['artist_similarity'] > 0).sum())
     
     # Calcular IR
-    df['ir'] = ((df['likes'] + df['comments']) / df['plays'] * 100).fillna(0)
-    
-    # Normalizar nombres de artistas antes de guardar
-    df['artist'] = df['artist'].apply(normalize_artist_name)
-    
-    # Agrupar por mes
-    df['month'] = df['date'].dt.to_period('M').astype(str)
-    
-    monthly_data = {}
-    for month, group in df.groupby('month'):
-        videos = []
-        for _, row in group.iterrows():
-            videos.append({
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'description': str(row['description'])[:200],
-                'artist': row['artist'],
-                'views': safe_int(row['plays']),
-                'likes': safe_int(row['likes']),
-                'comments': safe_int(row['comments']),
-                'shares': safe_int(row['shares']),
-                'collects': safe_int(row['collects']),
-                'ir': safe_float(row['ir']),
-                'url': str(row['video_id'])
-            })
+    with instrumentation.stage('ir', platform, len(df)):
+        df['ir'] = ((df[spec.likes] + df[spec.comments]) / df[spec.views] * 100).fillna(0)
         
-        # Métricas del mes
-        views = group['plays'].tolist()
-        likes = group['likes'].tolist()
-        ir_values = group['ir'].tolist()
-        
-        monthly_data[month] = {
-            'total_posts': len(group),
-            'median_views': safe_float(sorted(views)[len(views)//2]) if views else 0,
-            'avg_views': safe_float(group['plays'].mean()),
-            'avg_likes': safe_float(group['likes'].mean()),
-            'avg_ir': safe_float(group['ir'].mean()),
-            'total_shares': safe_int(group['shares'].sum()),
-            'total_comments': safe_int(group['comments'].sum()),
-            'total_collects': safe_int(group['collects'].sum()),
-            'all_videos': videos
-        }
-    
-    # Guardar
-    with open('client/public/data_tiktok.json', 'w', encoding='utf-8') as f:
-        json.dump(monthly_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Procesados {len(df)} videos de TikTok en {len(monthly_data)} meses")
-    return df
+        # Normalizar nombres de artistas antes de guardar (una vez por artista distinto)
+        df['artist'] = normalize_artists(df['artist'], matcher.aliases)
+    return incremental, classified_count
 
-def process_instagram(artists):
-    """Procesa dataset de Instagram"""
-    print("\nProcesando dataset de Instagram...")
+def process_platform(spec, matcher, state=None, pool=None, single_file=False, columnar=False,
+                     snapshots=None, index=None, frame=None, search_partitions=False):
+    """
+    Procesa el export de una plataforma: datos mensuales e índice de búsqueda
+    (se guardan aquí) y métricas por artista en la misma pasada
+    `snapshots` e `index` son los de load_frame; con `frame` (Future de load_frame)
+    se usa el DataFrame que ya se está leyendo
+    Retorna (métricas por artista, filas del cubo, artistas afectados o None sin `state`)
+    """
+    platform = spec.name
+    print(f"\nProcesando dataset de {spec.label}...")
     
     # Leer datos
-    df = pd.read_csv('/home/ubuntu/upload/instagram_posts_by_accounts.csv')
-    df['date'] = pd.to_datetime(df['date'])
-    
-    # Clasificar por artista
-    classified_count = 0
-    for idx, row in df.iterrows():
-        usernames = extract_usernames(row['Descripción'])
-        artist, sim = find_best_artist_match(usernames, artists)
-        
-        if artist:
-            df.at[idx, 'artist'] = artist
-            df.at[idx, 'artist_similarity'] = sim
-            classified_count += 1
+    df = frame.result() if frame is not None else load_frame(spec, snapshots, index)
+    
+    # Clasificar por artista y calcular IR
+    incremental, classified_count = classify_and_score(df, spec, matcher, state, pool)
+    print(f"{spec.noun.capitalize()} clasificados: {classified_count}/{len(df)} ({classified_count/len(df)*100:.1f}%)")
+    
+    # Artista de cada post para las consultas del historial (--history)
+    if index is not None and index.history is not None and spec.classified:
+        index.history.set_artists(platform, dict(zip(df[spec.key].astype(str), df['artist'])))
+    
+    # Agrupar por mes (en modo incremental solo los meses afectados)
+    with instrumentation.stage('monthly_aggregation', platform) as aggregation:
+        if incremental is not None:
+            affected_months, affected_artists = incremental
+            previous_output = load_previous_monthly(platform, single_file)
+            affected_months |= set(df['month']) - previous_output.keys()
+            rows = df[df['month'].isin(affected_months)]
         else:
-            df.at[idx, 'artist'] = 'Sin artista'
-            df.at[idx, 'artist_similarity'] = 0
+            affected_artists = None
+            rows = df
     
-    print(f"Posts clasificados: {classified_count}/{len(df)} ({classified_count/len(df)*100:.1f}%)")
+        videos = platform_videos(rows, spec)
+        monthly_data = build_monthly_data(rows, videos, spec.views, spec.likes, spec.comments,
+                                          spec.shares, spec.collects)
     
-    # Calcular IR
-    df['ir'] = ((df['Me gusta'] + df['Comentarios']) / df['Visualizaciones'] * 100).fillna(0)
+        if incremental is not None:
+            # Los meses no afectados se conservan tal cual de la ejecución anterior
+            monthly_data = {month: monthly_data[month] if month in monthly_data else previous_output[month]
+                            for month in sorted(set(df['month']))}
+            print(f"Meses recalculados: {len(affected_months & set(df['month']))}/{len(monthly_data)}")
     
-    # Normalizar nombres de artistas antes de guardar
-    df['artist'] = df['artist'].apply(normalize_artist_name)
+        aggregation.rows += len(rows)
     
-    # Agrupar por mes
-    df['month'] = df['date'].dt.to_period('M').astype(str)
+    # Métricas por artista y filas del cubo con el mismo DataFrame (no se vuelve a leer el export)
+    with instrumentation.stage('artist_stats', platform, len(df)):
+        artist_summary = summarize_artists(df, spec.views, spec.likes)
+    with instrumentation.stage('rollup', platform, len(df)):
+        rollup = rollup_rows(df, spec)
     
-    monthly_data = {}
-    for month, group in df.groupby('month'):
-        videos = []
-        for _, row in group.iterrows():
-            videos.append({
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'description': str(row['Descripción'])[:200],
-                'artist': row['artist'],
-                'views': safe_int(row['Visualizaciones']),
-                'likes': safe_int(row['Me gusta']),
-                'comments': safe_int(row['Comentarios']),
-                'shares': safe_int(row['Veces que se compartió']),
-                'collects': safe_int(row['Veces que se guardó']),
-                'ir': safe_float(row['ir']),
-                'url': str(row['Enlace permanente'])
-            })
+    # Guardar
+    with instrumentation.stage('serialization', platform, len(df)):
+        save_monthly(platform, monthly_data, single_file, columnar)
+    
+    # Índice de búsqueda sobre las descripciones completas (siempre de todos los meses)
+    if spec.classified:
+        with instrumentation.stage('search_index', platform, len(df)):
+            search = SearchIndexBuilder(platform)
+            index_descriptions(search, df, spec)
+            search_terms = write_search_index(OUTPUT_DIR, search, search_partitions)
+        print(f"Índice de búsqueda: {search_terms} términos")
+    
+    print(f"Procesados {len(df)} {spec.noun} de {spec.label} en {len(monthly_data)} meses")
+    return artist_summary, rollup, affected_artists
+
+def process_platform_chunked(spec, matcher, pool=None, chunksize=DEFAULT_CHUNKSIZE, single_file=False,
+                             columnar=False, search_partitions=False):
+    """
+    Como process_platform, leyendo los exports por bloques de `chunksize` filas (--chunksize)
+    Cada bloque se clasifica, sus videos se vuelcan a disco y sus métricas se suman a los
+    agregados corrientes por mes y por artista (chunked.RunningStats, exactos); solo la mediana
+    mensual y el cubo necesitan los valores, que se guardan en una fila compacta por post
+    Retorna (métricas por artista, filas del cubo, None)
+    """
+    platform = spec.name
+    print(f"\nProcesando dataset de {spec.label} por bloques de {chunksize} filas...")
+    
+    metrics = [column for column in (spec.views, spec.likes, spec.comments, spec.shares, spec.collects) if column]
+    dtypes = read_dtypes(metrics, spec.description[:1])
+    columns = {spec.date, spec.url, *dtypes} - {None}
+    facts = FactTable(metrics)
+    spool = VideoSpool()
+    search = SearchIndexBuilder(platform) if spec.classified else None
+    monthly = artists = None
+    total = classified_count = 0
+    try:
+        chunks = read_export_chunks(spec.paths, chunksize, columns, dtypes)
+        while True:
+            with instrumentation.stage('load', platform) as load:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                add_month(chunk, spec)
+                load.rows += len(chunk)
+            
+            # Clasificar y calcular IR del bloque
+            classified_count += classify_and_score(chunk, spec, matcher, pool=pool)[1]
+            total += len(chunk)
+            
+            # Videos a disco, agregados corrientes y filas compactas
+            with instrumentation.stage('monthly_aggregation', platform, len(chunk)):
+                for month, video in zip(chunk['month'], platform_videos(chunk, spec).to_dict('records')):
+                    spool.add(month, video)
+                if monthly is None:
+                    # Mismas columnas que agregan monthly_summary y summarize_artists
+                    monthly = RunningStats([spec.views, spec.likes, 'ir', spec.comments]
+                                           + [column for column in (spec.shares, spec.collects) if column in chunk.columns])
+                    artists = RunningStats([spec.views, spec.likes, 'ir'])
+                monthly.add(chunk['month'], chunk)
+                named = chunk[chunk['artist'] != 'Sin artista']
+                artists.add(named['artist'], named)
+                facts.add(chunk)
+            if search is not None:
+                with instrumentation.stage('search_index', platform, len(chunk)):
+                    index_descriptions(search, chunk, spec)
+            del chunk, named
         
-        # Métricas del mes
-        views = group['Visualizaciones'].tolist()
-        likes = group['Me gusta'].tolist()
+        print(f"{spec.noun.capitalize()} clasificados: {classified_count}/{total} ({classified_count/total*100:.1f}%)")
         
-        monthly_data[month] = {
-            'total_posts': len(group),
-            'median_views': safe_float(sorted(views)[len(views)//2]) if views else 0,
-            'avg_views': safe_float(group['Visualizaciones'].mean()),
-            'avg_likes': safe_float(group['Me gusta'].mean()),
-            'avg_ir': safe_float(group['ir'].mean()),
-            'total_shares': safe_int(group['Veces que se compartió'].sum()) if 'Veces que se compartió' in group.columns else 0,
-            'total_comments': safe_int(group['Comentarios'].sum()),
-            'total_collects': safe_int(group['Veces que se guardó'].sum()) if 'Veces que se guardó' in group.columns else 0,
-            'all_videos': videos
-        }
-    
-    # Guardar
-    with open('client/public/data_instagram.json', 'w', encoding='utf-8') as f:
-        json.dump(monthly_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Procesados {len(df)} posts de Instagram en {len(monthly_data)} meses")
-    return df
+        df = facts.frame()
+        with instrumentation.stage('monthly_aggregation', platform, len(df)):
+            medians = df.groupby('month', observed=True)[spec.views].agg(upper_median)
+            for month in sorted(monthly.size):
+                stats = {
+                    'total_posts': monthly.size[month],
+                    'median_views': medians[month],
+                    'avg_views': monthly.mean(month, spec.views),
+                    'avg_likes': monthly.mean(month, spec.likes),
+                    'avg_ir': monthly.mean(month, 'ir'),
+                    'total_comments': monthly.total(month, spec.comments),
+                }
+                for key, column in (('total_shares', spec.shares), ('total_collects', spec.collects)):
+                    if column in monthly.columns:
+                        stats[key] = monthly.total(month, column)
+                spool.summaries[month] = month_metrics(stats)
+        with instrumentation.stage('artist_stats', platform, len(df)):
+            artist_summary = {artist: artist_metrics({
+                'total_videos': count,
+                'avg_views': artists.mean(artist, spec.views),
+                'avg_likes': artists.mean(artist, spec.likes),
+                'avg_ir': artists.mean(artist, 'ir'),
+                'total_views': artists.total(artist, spec.views),
+                'total_likes': artists.total(artist, spec.likes),
+            }) for artist, count in artists.size.items()}
+        with instrumentation.stage('rollup', platform, len(df)):
+            # Mismos tipos que en el modo normal para que el cubo de todas las plataformas se junte igual
+            rollup = rollup_rows(df.astype({'month': str, 'artist': object}), spec)
+        
+        # Guardar
+        with instrumentation.stage('serialization', platform, len(df)):
+            save_spool(platform, spool, single_file, columnar)
+        if search is not None:
+            with instrumentation.stage('search_index', platform, len(df)):
+                search_terms = write_search_index(OUTPUT_DIR, search, search_partitions)
+            print(f"Índice de búsqueda: {search_terms} términos")
+    finally:
+        spool.close()
+    
+    print(f"Procesados {total} {spec.noun} de {spec.label} en {len(spool.summaries)} meses")
+    return artist_summary, rollup, None
 
-def normalize_artist_name(artist_name):
-    """Normaliza nombres de artistas usando el mapeo manual"""
-    # Mismo mapeo que en find_best_artist_match
-    manual_mapping = {
-        'dope': 'Dove Cameron',
-        'nath': 'Nathy Peluso',
-        'calo': 'Carlos Rivera',
-        'belo': 'BEÉLE',
-        'beelo': 'BEÉLE',
-        'pereza': 'Fuerza Regida',
-        'miguel': 'Miguel Bueno',
-        'mdo': 'Mon Laferte',
-        'haim': 'Ha*Ash',
-        'jain': 'Juan Luis',
-        'neton': 'Neto Bernal'
+def normalize_artist_name(artist_name, aliases):
+    """Normaliza nombres de artistas usando la tabla de alias"""
+    if aliases is None:
+        return artist_name
+    return aliases.normalize(artist_name)
+
+def normalize_artists(artists, aliases):
+    """Normaliza una columna de artistas resolviendo cada valor distinto una sola vez"""
+    names = {artist: normalize_artist_name(artist, aliases) for artist in artists.unique()}
+    return artists.map(names)
+
+def summarize_artists(df, views, likes):
+    """Métricas por artista (sin 'Sin artista') con un solo groupby().agg()"""
+    summary = df[df['artist'] != 'Sin artista'].groupby('artist', sort=False).agg(
+        total_videos=(views, 'size'),
+        avg_views=(views, 'mean'),
+        avg_likes=(likes, 'mean'),
+        avg_ir=('ir', 'mean'),
+        total_views=(views, 'sum'),
+        total_likes=(likes, 'sum')
+    )
+    
+    return {artist: artist_metrics(row) for artist, row in summary.to_dict('index').items()}
+
+def artist_metrics(row):
+    """Métricas de salida de un artista a partir de sus agregados (llaves de summarize_artists)"""
+    return {
+        'total_videos': int(row['total_videos']),
+        'avg_views': safe_float(row['avg_views']),
+        'avg_likes': safe_float(row['avg_likes']),
+        'avg_ir': safe_float(row['avg_ir']),
+        'total_views': safe_int(row['total_views']),
+        'total_likes': safe_int(row['total_likes']),
     }
-    
-    artist_lower = artist_name.lower()
-    
-    # Búsqueda exacta
-    if artist_lower in manual_mapping:
-        return manual_mapping[artist_lower]
-    
-    # Búsqueda por subcadena
-    for key, correct_name in manual_mapping.items():
-        if key in artist_lower:
-            return correct_name
-    
-    return artist_name
 
-def generate_artist_stats(df_tiktok, df_instagram):
-    """Genera estadísticas por artista para ambas plataformas"""
+def generate_artist_stats(platform_summaries, affected_artists=None):
+    """
+    Junta las métricas por artista de cada plataforma ({plataforma: {artista: métricas}})
+    Con `affected_artists` (modo incremental) solo se actualizan esos artistas
+    """
     print("\nGenerando estadísticas por artista...")
     
-    # Normalizar nombres de artistas en los DataFrames
-    df_tiktok['artist'] = df_tiktok['artist'].apply(normalize_artist_name)
-    df_instagram['artist'] = df_instagram['artist'].apply(normalize_artist_name)
-    
-    stats = {}
-    
-    # Procesar TikTok
-    for artist in df_tiktok['artist'].unique():
-        if artist == 'Sin artista':
-            continue
-        
-        artist_data = df_tiktok[df_tiktok['artist'] == artist]
-        stats[artist] = {
-            'tiktok': {
-                'total_videos': len(artist_data),
-                'avg_views': safe_float(artist_data['plays'].mean()),
-                'avg_likes': safe_float(artist_data['likes'].mean()),
-                'avg_ir': safe_float(artist_data['ir'].mean()),
-                'total_views': safe_int(artist_data['plays'].sum()),
-                'total_likes': safe_int(artist_data['likes'].sum()),
-            }
-        }
-    
-    # Procesar Instagram
-    for artist in df_instagram['artist'].unique():
-        if artist == 'Sin artista':
-            continue
-        
-        artist_data = df_instagram[df_instagram['artist'] == artist]
-        if artist not in stats:
-            stats[artist] = {}
+    with instrumentation.stage('artist_stats'):
+        # En orden de primera aparición, plataforma por plataforma
+        stats = {}
+        for platform, summary in platform_summaries.items():
+            for artist, artist_stats in summary.items():
+                stats.setdefault(artist, {})[platform] = artist_stats
         
-        stats[artist]['instagram'] = {
-            'total_videos': len(artist_data),
-            'avg_views': safe_float(artist_data['Visualizaciones'].mean()),
-            'avg_likes': safe_float(artist_data['Me gusta'].mean()),
-            'avg_ir': safe_float(artist_data['ir'].mean()),
-            'total_views': safe_int(artist_data['Visualizaciones'].sum()),
-            'total_likes': safe_int(artist_data['Me gusta'].sum()),
-        }
+        if affected_artists is not None:
+            previous = load_previous_output(f'{OUTPUT_DIR}/artist_stats.json')
+            affected_artists = affected_artists | (stats.keys() - previous.keys())
+            # Los artistas no afectados se conservan tal cual de la ejecución anterior
+            print(f"Artistas recalculados: {len(affected_artists & stats.keys())}/{len(stats)}")
+            stats = {artist: artist_stats if artist in affected_artists else previous[artist]
+                     for artist, artist_stats in stats.items()}
     
     # Guardar
-    with open('client/public/artist_stats.json', 'w', encoding='utf-8') as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    with instrumentation.stage('serialization', 'artist_stats', len(stats)):
+        write_json(f'{OUTPUT_DIR}/artist_stats.json', stats)
     
     print(f"Estadísticas generadas para {len(stats)} artistas")
 
-if __name__ == '__main__':
-    print("=== Procesamiento de datos con clasificación por username ===\n")
+def generate_rollup(platform_rows):
+    """Escribe rollup.json y sketches.json con las filas del cubo de cada plataforma"""
+    rows = pd.concat(platform_rows, ignore_index=True)
+    with instrumentation.stage('rollup', rows=len(rows)):
+        rollup = build_rollup(rows)
+    with instrumentation.stage('sketches', rows=len(rows)):
+        sketches = build_sketches(rows)
+    with instrumentation.stage('serialization', 'rollup', len(rows)):
+        write_parallel([lambda: write_json(f'{OUTPUT_DIR}/rollup.json', rollup),
+                        lambda: write_json(f'{OUTPUT_DIR}/sketches.json', sketches)])
+    print(f"Cubo de agregados: {sum(len(cells) for periods in rollup['cells'].values() for cells in periods.values())} celdas")
+
+class Session:
+    """
+    Lo que se conserva entre ejecuciones del modo --watch: roster y tabla de
+    alias, matcher con su caché de menciones, pool de --workers, estado
+    incremental, snapshots en memoria e índice de posts
+    Sin --watch la sesión se usa para una sola ejecución
+    """
     
-    # Cargar artistas
-    artists = load_artists()
+    def __init__(self, args):
+        self.args = args
+        # --chunksize lee los exports por bloques, sin snapshots
+        self.snapshots = None
+        if not args.no_snapshots and not args.chunksize:
+            self.snapshots = SnapshotStore(SNAPSHOT_DIR, memory=args.watch)
+        self.index = None
+        if args.post_index or args.history:
+            self.index = PostIndex(POST_INDEX_PATH, MetricHistory(HISTORY_PATH) if args.history else None)
+        self.matcher = self.cache = self.state = self.pool = None
+        # (mtime, tamaño) del roster y de la tabla de alias con que se construyó el matcher
+        self.classifier_key = None
+    
+    def classifier_sources(self):
+        """Archivos de los que depende la clasificación"""
+        return [self.args.roster, self.args.aliases]
+    
+    def load_classifier(self, artists, key):
+        """(Re)construye el matcher, su caché, el estado incremental y el pool para el roster `artists`"""
+        self.close_classifier()
+        args = self.args
+        aliases = AliasResolver(load_aliases(args.aliases))
+        fingerprint = roster_fingerprint(artists, aliases.aliases)
+        self.cache = MatchCache(MATCH_CACHE_PATH, fingerprint)
+        self.matcher = ArtistMatcher(artists, self.cache, aliases)
+        self.state = IncrementalState(STATE_PATH, fingerprint) if args.incremental else None
+        self.pool = ClassifierPool(artists, args.workers, self.cache, aliases=aliases) if args.workers > 1 else None
+        self.classifier_key = key
+    
+    def reset_counters(self):
+        """Aciertos y fallos de las cachés desde cero para el reporte de cada ejecución"""
+        for cache in (self.cache, self.snapshots, self.index):
+            if cache is not None:
+                cache.hits = cache.misses = 0
+    
+    def close_classifier(self):
+        if self.pool:
+            self.pool.close()
+        if self.cache:
+            self.cache.close()
+        self.pool = self.cache = None
+    
+    def close(self):
+        self.close_classifier()
+        if self.index:
+            self.index.close()
+
+def run(session, platforms, profiler):
+    """Una ejecución del pipeline con los objetos (ya calientes en --watch) de `session`"""
+    args = session.args
+    session.reset_counters()
+    
+    # El roster (solo si cambió) y los exports se leen a la vez en un pool acotado de hilos
+    io = ThreadPoolExecutor(max_workers=IO_WORKERS)
+    classifier_key = file_signatures(session.classifier_sources())
+    roster = io.submit(load_artists, args.roster) if classifier_key != session.classifier_key else None
+    snapshots = session.snapshots
+    index = session.index
+    if index:
+        with instrumentation.stage('load', 'index') as load:
+            load.rows += index.ingest(index_exports(platforms, args.export))
+        print(f"Índice de posts: {index.misses} exports ingeridos, {index.hits} sin cambios, "
+              + ", ".join(f"{index.count(spec.name)} {spec.noun} de {spec.label}" for spec in platforms))
+        instrumentation.current().record_cache('post_index', index)
+    if not args.chunksize:
+        frames = [io.submit(profiler.wrap(load_frame), spec, snapshots, index) for spec in platforms]
     
-    # Procesar datasets
-    df_tiktok = process_tiktok(artists)
-    df_instagram = process_instagram(artists)
+    # Cargar artistas
+    if roster is not None:
+        session.load_classifier(roster.result(), classifier_key)
+    matcher, cache, state, pool = session.matcher, session.cache, session.state, session.pool
+    
+    # Procesar datasets (con --workers las plataformas se procesan a la vez)
+    with ThreadPoolExecutor(max_workers=len(platforms) if pool else 1) as executor:
+        if args.chunksize:
+            # Por bloques: cada plataforma lee su export mientras se procesa
+            futures = [executor.submit(profiler.wrap(process_platform_chunked), spec, matcher, pool,
+                                       args.chunksize, args.single_file, args.columnar, args.search_partitions)
+                       for spec in platforms]
+        else:
+            futures = [executor.submit(profiler.wrap(process_platform), spec, matcher,
+                                       state.platform(spec.name) if state else None, pool,
+                                       args.single_file, args.columnar, snapshots, index, frame,
+                                       args.search_partitions)
+                       for spec, frame in zip(platforms, frames)]
+        results = [future.result() for future in futures]
+    io.shutdown()
+    platform_summaries = {spec.name: summary for spec, (summary, _, _) in zip(platforms, results)}
+    affected_artists = set().union(*(artists for _, _, artists in results)) if state else None
+    cache.save()
+    print(f"Caché de menciones: {cache.hits} aciertos, {cache.misses} fallos")
+    instrumentation.current().record_cache('artist_matches', cache)
+    if snapshots is not None:
+        instrumentation.current().record_cache('snapshots', snapshots)
+    
+    # Estadísticas por artista y cubo de agregados por plataforma, periodo y artista (a la vez)
+    write_parallel([lambda: generate_artist_stats(platform_summaries, affected_artists),
+                    lambda: generate_rollup([rollup for _, rollup, _ in results])])
+    
+    # Versiones .gz/.br para el servidor (solo de los archivos que cambiaron)
+    if not args.no_precompress:
+        with instrumentation.stage('serialization', 'precompress'):
+            compressed, raw, gzipped = precompress(OUTPUT_DIR)
+        print(f"Precomprimidos {compressed} archivos ({raw / 2**20:.1f} MB -> {gzipped / 2**20:.1f} MB en gzip)")
+    
+    # El estado solo se guarda una vez escritos los JSON
+    if state:
+        state.save()
+
+def run_and_report(session, platforms):
+    """Ejecuta el pipeline y escribe el reporte de la ejecución"""
+    args = session.args
+    instrumentation.start_run('process_data_v2.py')
+    profiler = instrumentation.Profiler(args.profile)
     
-    # Generar estadísticas por artista
-    generate_artist_stats(df_tiktok, df_instagram)
+    with profiler:
+        run(session, platforms, profiler)
     
     print("\n✓ Archivos generados exitosamente:")
-    print("  - client/public/data_tiktok.json")
-    print("  - client/public/data_instagram.json")
+    for platform in (spec.name for spec in platforms):
+        if args.single_file:
+            print(f"  - client/public/data_{platform}.json")
+        else:
+            print(f"  - client/public/data/{platform}/ (manifest.json + shards por mes)")
+        if args.columnar:
+            print(f"  - client/public/columnar/{platform}.bin (+ {platform}.json)")
     print("  - client/public/artist_stats.json")
+    print("  - client/public/rollup.json")
+    print("  - client/public/sketches.json")
+    print("  - client/public/search/ (índice de búsqueda por plataforma)")
+    
+    instrumentation.save_report(REPORT_PATH, vars(args), profiler if args.profile else None, PROFILE_PATH)
+    print(f"\nReporte de ejecución: {REPORT_PATH}")
+
+def watched_paths(session, platforms):
+    """Exports de cada plataforma (y de --export con el índice de posts), roster y tabla de alias"""
+    extra = session.args.export if session.index else ()
+    exports = [path for _, paths in index_exports(platforms, extra) for path in paths]
+    return exports + session.classifier_sources()
+
+def watch(session, platforms):
+    """
+    Modo --watch: espera a que cambie un export, el roster o la tabla de alias
+    y vuelve a ejecutar con la sesión caliente (solo se leen los exports que
+    cambiaron y solo se reescriben los meses afectados)
+    """
+    watcher = FileWatcher(lambda: watched_paths(session, platforms))
+    while True:
+        print(f"\nVigilando {len(watched_paths(session, platforms))} archivos cada {watcher.interval:g}s (Ctrl+C para salir)...")
+        changed = watcher.wait()
+        started = time.perf_counter()
+        print(f"\n=== Cambios en {', '.join(sorted(os.path.basename(path) for path in changed))} ===\n")
+        try:
+            run_and_report(session, platforms)
+        except Exception:
+            # Un export a medio corregir no debe tumbar el proceso: se reintenta con el siguiente cambio
+            traceback.print_exc()
+            continue
+        print(f"Salidas actualizadas en {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Procesa los exports de TikTok e Instagram')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Procesar solo los posts nuevos o modificados desde la última ejecución')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Procesos para clasificar artistas en paralelo (1 = serial)')
+    parser.add_argument('--single-file', action='store_true',
+                        help='Escribir data_<plataforma>.json completos en lugar de manifest + shards por mes')
+    parser.add_argument('--columnar', action='store_true',
+                        help='Escribir también la tabla de videos en formato columnar (columnar/<plataforma>.bin + .json)')
+    parser.add_argument('--search-partitions', action='store_true',
+                        help='Escribir también un índice de búsqueda por mes (search/<plataforma>/<mes>.json)')
+    parser.add_argument('--input', action='append', default=[], metavar='PLATAFORMA=RUTA',
+                        help='Exports de una plataforma en lugar de los de /home/ubuntu/upload: archivo, directorio o glob (se puede repetir)')
+    parser.add_argument('--roster', default=ROSTER_PATH,
+                        help='Roster de artistas (ArtistasSME.xlsx)')
+    parser.add_argument('--aliases', default=ALIASES_PATH,
+                        help='Tabla de alias de artistas: JSON {alias: artista} o CSV alias,artista')
+    parser.add_argument('--no-snapshots', action='store_true',
+                        help='Volver a leer los exports en lugar de usar los snapshots de .cache/snapshots')
+    parser.add_argument('--post-index', action='store_true',
+                        help=f'Ingerir los exports en el índice de posts ({POST_INDEX_PATH}) y procesar el último snapshot de cada post')
+    parser.add_argument('--export', action='append', default=[], metavar='PLATAFORMA=RUTA',
+                        help='Export adicional a ingerir en el índice con --post-index (se puede repetir)')
+    parser.add_argument('--history', action='store_true',
+                        help=f'Guardar un snapshot de las métricas de cada post por export ingerido en {HISTORY_PATH} (implica --post-index)')
+    parser.add_argument('--no-precompress', action='store_true',
+                        help='No escribir las versiones .gz/.br de las salidas (ni precompressed.json)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Quedarse vigilando los exports, el roster y la tabla de alias y regenerar las salidas al cambiar (implica --incremental)')
+    parser.add_argument('--chunksize', type=int, nargs='?', const=DEFAULT_CHUNKSIZE, metavar='FILAS',
+                        help=f'Leer los exports por bloques de FILAS filas (por omisión {DEFAULT_CHUNKSIZE}): el texto del export '
+                             'no se carga completo, pero la mediana mensual y el cubo siguen guardando ~30 bytes por post (O(N)); '
+                             'no se combina con --incremental, --watch, --post-index ni --history')
+    parser.add_argument('--profile', choices=['cpu', 'memory'],
+                        help='Perfilar la ejecución con cProfile (cpu) o tracemalloc (memory) e incluir los puntos calientes en el reporte')
+    args = parser.parse_args()
+    if args.chunksize is not None:
+        if args.chunksize < 1:
+            parser.error('--chunksize debe ser al menos 1')
+        if args.incremental or args.watch or args.post_index or args.history:
+            parser.error('--chunksize no se combina con --incremental, --watch, --post-index ni --history')
+    if args.watch:
+        args.incremental = True
+    print("=== Procesamiento de datos con clasificación por username ===\n")
+    
+    inputs = platform_paths(PLATFORMS, args.input)
+    platforms = [spec.with_path(inputs[spec.name]) if inputs[spec.name] else spec for spec in PLATFORMS]
+    
+    session = Session(args)
+    try:
+        run_and_report(session, platforms)
+        if args.watch:
+            watch(session, platforms)
+    except KeyboardInterrupt:
+        if not args.watch:
+            raise
+    finally:
+        session.close()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estructuras para medianas y cuantiles sin guardar listas de Python por mes.
+
+`QuantileSketch` guarda los valores exactos en un `array` compacto mientras el
+grupo tenga a lo más `exact_limit` elementos, así que la mediana coincide con
+`statistics.median`. Si el grupo crece más, pasa a un t-digest con error
+acotado y memoria constante.
+
+Los sketches se combinan con `merge` (p. ej. meses -> año, artista por mes ->
+artista) y se serializan con `to_dict` / `from_dict`: los exactos como la
+lista ordenada de valores, los t-digest como sus centroides.
+"""
+
+import math
+import statistics
+from array import array
+
+# Grupos de hasta este tamaño se calculan de forma exacta
+DEFAULT_EXACT_LIMIT = 1_000_000
+
+
+class TDigest:
+    """t-digest con compresión por fusión (función de escala k1)."""
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids = []  # [(media, peso)] ordenados por media
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._buffer.append((value, weight))
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        """Agrega los centroides de otro t-digest."""
+        if not other.count:
+            return
+        for mean, weight in other._centroids + other._buffer:
+            self._buffer.append((mean, weight))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def centroids(self):
+        """[(media, peso)] ordenados por media."""
+        self._compress()
+        return list(self._centroids)
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = self.count
+
+        merged = []
+        mean, weight = items[0]
+        before = 0
+        q_limit = self._q(self._k(0) + 1)
+        for item_mean, item_weight in items[1:]:
+            if (before + weight + item_weight) / total <= q_limit:
+                weight += item_weight
+                mean += (item_mean - mean) * item_weight / weight
+            else:
+                merged.append((mean, weight))
+                before += weight
+                q_limit = self._q(self._k(before / total) + 1)
+                mean, weight = item_mean, item_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q):
+        """Cuantile aproximado q (0..1) interpolando entre centroides."""
+        self._compress()
+        if not self._centroids:
+            return math.nan
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+
+        target = q * self.count
+        previous_center, previous_mean = 0.0, self.min
+        cumulative = 0
+        for mean, weight in self._centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                fraction = (target - previous_center) / span if span else 0.0
+                return previous_mean + (mean - previous_mean) * fraction
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+
+        span = self.count - previous_center
+        fraction = (target - previous_center) / span if span else 1.0
+        return previous_mean + (self.max - previous_mean) * min(fraction, 1.0)
+
+
+class QuantileSketch:
+    """
+    Valores de un grupo (p. ej. las views de un mes): exactos hasta
+    `exact_limit` elementos, t-digest a partir de ahí.
+    """
+
+    def __init__(self, exact_limit=DEFAULT_EXACT_LIMIT, typecode='q', compression=200):
+        self.exact_limit = exact_limit
+        self.compression = compression
+        self.count = 0
+        self._values = array(typecode)
+        self._digest = None
+
+    @property
+    def exact(self):
+        return self._digest is None
+
+    def add(self, value):
+        self.count += 1
+        if self._digest is not None:
+            self._digest.add(value)
+            return
+        self._values.append(value)
+        if len(self._values) > self.exact_limit:
+            self._to_digest()
+
+    def _to_digest(self):
+        self._digest = TDigest(self.compression)
+        for item in self._values:
+            self._digest.add(item)
+        self._values = array(self._values.typecode)
+
+    def median(self):
+        """Mediana (igual a statistics.median en modo exacto)."""
+        if self._digest is not None:
+            return self._digest.quantile(0.5)
+        return statistics.median(self._values)
+
+    def quantile(self, q):
+        """Cuantil q (0..1); en modo exacto interpolado linealmente entre vecinos."""
+        if self._digest is not None:
+            return self._digest.quantile(q)
+        if not self._values:
+            return math.nan
+        ordered = sorted(self._values)
+        position = (len(ordered) - 1) * q
+        low = math.floor(position)
+        high = math.ceil(position)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    def merge(self, other):
+        """Combina otro sketch; sigue exacto mientras el total quepa en exact_limit."""
+        self.count += other.count
+        if self._digest is None and other._digest is None:
+            self._values.extend(other._values)
+            if len(self._values) > self.exact_limit:
+                self._to_digest()
+            return
+        if self._digest is None:
+            self._to_digest()
+        if other._digest is not None:
+            self._digest.merge(other._digest)
+        else:
+            for item in other._values:
+                self._digest.add(item)
+
+    def to_dict(self):
+        """Forma serializable: valores ordenados (exacto) o centroides (t-digest)."""
+        if self._digest is None:
+            return {'count': self.count, 'values': sorted(self._values)}
+        return {
+            'count': self.count,
+            'min': self._digest.min,
+            'max': self._digest.max,
+            'centroids': [[mean, weight] for mean, weight in self._digest.centroids()],
+        }
+
+    @classmethod
+    def from_values(cls, values, exact_limit=DEFAULT_EXACT_LIMIT, typecode='q', compression=200):
+        """
+        Sketch de un grupo completo. Si no cabe en exact_limit, los valores
+        ordenados se agregan en bloques iguales antes del t-digest (mucho más
+        rápido que agregarlos uno por uno).
+        """
+        sketch = cls(exact_limit, typecode, compression)
+        ordered = sorted(values)
+        sketch.count = len(ordered)
+        if len(ordered) <= exact_limit:
+            sketch._values.extend(ordered)
+            return sketch
+        sketch._digest = TDigest(compression)
+        size = max(1, len(ordered) // (10 * compression))
+        for start in range(0, len(ordered), size):
+            block = ordered[start:start + size]
+            sketch._digest.add(math.fsum(block) / len(block), len(block))
+        sketch._digest.min = ordered[0]
+        sketch._digest.max = ordered[-1]
+        return sketch
+
+    @classmethod
+    def from_dict(cls, data, exact_limit=DEFAULT_EXACT_LIMIT, typecode='q', compression=200):
+        sketch = cls(exact_limit, typecode, compression)
+        sketch.count = data['count']
+        if 'values' in data:
+            sketch._values.extend(data['values'])
+        else:
+            sketch._digest = TDigest(compression)
+            sketch._digest.count = data['count']
+            sketch._digest.min = data['min']
+            sketch._digest.max = data['max']
+            sketch._digest._centroids = [(mean, weight) for mean, weight in data['centroids']]
+        return sketch
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servicio local de consultas sobre la salida del pipeline.
+
+Carga los datos de client/public (manifest + shards, o data_<plataforma>.json
+con --single-file, y artist_stats.json) en una tabla en memoria con índices
+por mes, año y artista para cada plataforma, y sirve por HTTP los mismos
+agregados que Home.tsx calculaba recorriendo todos los `all_videos`:
+
+    GET /api/meta                                  plataformas, meses y años
+    GET /api/totals?platform=&year=&month=         métricas totales
+    GET /api/evolution?platform=&year=&metric=     métrica por mes
+    GET /api/impact?platform=&year=&metric=        videos por nivel de impacto y mes
+    GET /api/distribution?platform=&month=&metric= histograma (violin) y puntos
+    GET /api/videos?platform=&year=&month=&artist=&impact=&metric=&sort=&direction=
+    GET /api/artists?platform=&year=&metric=&min_videos=&exclude=
+    GET /api/search?platform=&q=&year=&month=&sort=&direction=
+
+Las listas se paginan con offset y limit. Cada resultado se guarda en un LRU
+por combinación de filtros; si el pipeline vuelve a escribir la salida, los
+datos se recargan y el LRU se vacía en la siguiente consulta. /api/search
+usa el índice invertido de search/<plataforma>.json (search_index.py): los
+ids del índice son las posiciones de las filas de la tabla.
+
+Solo usa la biblioteca estándar:
+
+    python query_service.py --port 8765
+
+El servidor de desarrollo de Vite redirige /api a este puerto.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from partitioned import MANIFEST_NAME, platform_dir, read_partitioned
+from search_index import SearchIndex, search_path
+
+# Carpeta pública del dashboard (la misma que escribe process_data_v2.py)
+PUBLIC_DIR = 'client/public'
+
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+
+# Paginación de las listas
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Artistas del ranking (como en la pestaña de artistas)
+TOP_ARTISTS = 30
+
+# Tamaño de página por omisión de cada consulta
+DEFAULT_LIMITS = {'artists': TOP_ARTISTS}
+
+# Resultados guardados por combinación de filtros
+RESULT_CACHE_SIZE = 512
+
+# Métrica del dashboard -> campo de cada video
+METRIC_FIELDS = {
+    'median_views': 'views',
+    'avg_views': 'views',
+    'avg_likes': 'likes',
+    'median_ir': 'ir',
+    'avg_ir': 'ir',
+}
+
+# Niveles de impacto y sus umbrales fijos por campo (los mismos que Home.tsx)
+IMPACT_LEVELS = ['Muy Bajo', 'Bajo', 'Medio', 'Alto', 'Muy Alto']
+IMPACT_THRESHOLDS = {
+    'ir': [3.16, 5.36, 11.09, 23.22],
+    'views': [1746, 5197, 26760, 1600000],
+    'likes': [58, 228, 2788, 50000],
+}
+
+SORT_COLUMNS = ['date', 'views', 'likes', 'shares', 'comments', 'collects', 'ir']
+
+# Tope del eje de IR en el histograma
+IR_DISTRIBUTION_MAX = 25
+
+
+class QueryError(ValueError):
+    """Parámetros inválidos (respuesta 400)."""
+
+
+def upper_median(values):
+    """Elemento central de los valores ordenados (el superior si el total es par)."""
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0
+
+
+def impact_level(value, field):
+    return IMPACT_LEVELS[bisect_right(IMPACT_THRESHOLDS[field], value)]
+
+
+class PlatformTable:
+    """Videos de una plataforma en orden de mes, con índices por mes, año y artista."""
+
+    def __init__(self, monthly_data):
+        self.rows = []
+        self.row_months = []
+        self.months = {}
+        self.summaries = {}
+        self.years = {}
+        self.by_artist = {}
+        # Índice de búsqueda (search_index.py), si el pipeline lo generó
+        self.search = None
+        for year_month in sorted(monthly_data):
+            month = monthly_data[year_month]
+            start = len(self.rows)
+            for video in month.get('all_videos', []):
+                self.by_artist.setdefault(video['artist'], []).append(len(self.rows))
+                self.rows.append(video)
+                self.row_months.append(year_month)
+            self.months[year_month] = range(start, len(self.rows))
+            self.summaries[year_month] = {key: value for key, value in month.items() if key != 'all_videos'}
+            self.years.setdefault(year_month[:4], []).append(year_month)
+
+    def month_keys(self, year='all'):
+        """Meses del año (todos con 'all'), en orden."""
+        return list(self.months) if year == 'all' else self.years.get(year, [])
+
+    def select(self, year='all', month=None, artist=None):
+        """Índices de las filas que cumplen los filtros, en orden de mes."""
+        if month:
+            months = [month] if month in self.months else []
+        else:
+            months = self.month_keys(year)
+        if artist is not None:
+            wanted = set(months)
+            return [i for i in self.by_artist.get(artist, []) if self.row_months[i] in wanted]
+        return [i for year_month in months for i in self.months[year_month]]
+
+
+def page(items, params):
+    """Una página de `items` según offset/limit."""
+    offset = params['offset']
+    limit = params['limit']
+    return {'total': len(items), 'offset': offset, 'limit': limit, 'items': items[offset:offset + limit]}
+
+
+class QueryEngine:
+    """Tablas en memoria de la salida del pipeline y LRU de resultados."""
+
+    def __init__(self, public_dir=PUBLIC_DIR, cache_size=RESULT_CACHE_SIZE):
+        self.public_dir = public_dir
+        self.cache_size = cache_size
+        self.tables = {}
+        self.artist_stats = {}
+        self.hits = 0
+        self.misses = 0
+        self._signature = None
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sources(self):
+        """Archivos de los que dependen las tablas, para detectar una nueva ejecución."""
+        sources = [os.path.join(self.public_dir, 'artist_stats.json')]
+        data_dir = os.path.join(self.public_dir, 'data')
+        if os.path.isdir(data_dir):
+            sources += [os.path.join(data_dir, name, MANIFEST_NAME) for name in sorted(os.listdir(data_dir))]
+        sources += [os.path.join(self.public_dir, name) for name in sorted(os.listdir(self.public_dir))
+                    if name.startswith('data_') and name.endswith('.json')]
+        search_dir = os.path.join(self.public_dir, 'search')
+        if os.path.isdir(search_dir):
+            sources += [os.path.join(search_dir, name) for name in sorted(os.listdir(search_dir))
+                        if name.endswith('.json')]
+        signature = []
+        for path in sources:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                pass
+        return tuple(signature)
+
+    def _load(self):
+        tables = {}
+        data_dir = os.path.join(self.public_dir, 'data')
+        platforms = set()
+        if os.path.isdir(data_dir):
+            platforms |= {name for name in os.listdir(data_dir)
+                          if os.path.exists(os.path.join(platform_dir(self.public_dir, name), MANIFEST_NAME))}
+        platforms |= {name[len('data_'):-len('.json')] for name in os.listdir(self.public_dir)
+                      if name.startswith('data_') and name.endswith('.json')}
+        for platform in sorted(platforms):
+            # Mismo orden que el dashboard: manifest primero, si no el JSON completo
+            monthly_data = read_partitioned(self.public_dir, platform)
+            if not monthly_data:
+                try:
+                    with open(os.path.join(self.public_dir, f'data_{platform}.json'), 'r', encoding='utf-8') as f:
+                        monthly_data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+            tables[platform] = table = PlatformTable(monthly_data)
+            try:
+                search = SearchIndex.load(search_path(self.public_dir, platform))
+            except (OSError, ValueError):
+                search = None
+            # Un índice de otra ejecución no corresponde a las filas cargadas
+            counts = [(month, len(rows)) for month, rows in table.months.items()]
+            if search is not None and [(month, count) for month, _, count in search.months] == counts:
+                table.search = search
+        try:
+            with open(os.path.join(self.public_dir, 'artist_stats.json'), 'r', encoding='utf-8') as f:
+                artist_stats = json.load(f)
+        except (OSError, ValueError):
+            artist_stats = {}
+        return tables, artist_stats
+
+    def refresh(self):
+        """Recarga las tablas si el pipeline escribió una salida nueva."""
+        signature = self._sources()
+        with self._lock:
+            if signature == self._signature:
+                return False
+            self.tables, self.artist_stats = self._load()
+            self._signature = signature
+            self._results.clear()
+            return True
+
+    def query(self, endpoint, params):
+        """Resultado de `endpoint` para `params` (dict de str), desde el LRU si ya se calculó."""
+        handler = getattr(self, 'query_' + endpoint, None)
+        if handler is None:
+            raise LookupError(endpoint)
+        self.refresh()
+        key = (endpoint, tuple(sorted(params.items())))
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+            tables, artist_stats = self.tables, self.artist_stats
+        result = handler(tables, artist_stats, self._parse(endpoint, params, tables))
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _parse(endpoint, params, tables):
+        """Valida y completa los filtros comunes."""
+        parsed = dict(params)
+        platform = params.get('platform', 'tiktok')
+        if platform not in tables:
+            raise QueryError(f'plataforma desconocida: {platform}')
+        parsed['platform'] = platform
+        parsed['year'] = params.get('year', 'all') or 'all'
+        parsed['month'] = params.get('month') if params.get('month') not in (None, '', 'all') else None
+        parsed['metric'] = params.get('metric', 'avg_ir')
+        if parsed['metric'] not in METRIC_FIELDS:
+            raise QueryError(f'métrica desconocida: {parsed["metric"]}')
+        parsed['impact'] = params.get('impact', 'all')
+        if parsed['impact'] != 'all' and parsed['impact'] not in IMPACT_LEVELS:
+            raise QueryError(f'nivel de impacto desconocido: {parsed["impact"]}')
+        parsed['sort'] = params.get('sort', 'date')
+        if parsed['sort'] not in SORT_COLUMNS:
+            raise QueryError(f'columna desconocida: {parsed["sort"]}')
+        parsed['direction'] = params.get('direction', 'desc')
+        if parsed['direction'] not in ('asc', 'desc'):
+            raise QueryError(f'dirección desconocida: {parsed["direction"]}')
+        try:
+            parsed['offset'] = max(int(params.get('offset', 0)), 0)
+            parsed['limit'] = min(max(int(params.get('limit', DEFAULT_LIMITS.get(endpoint, PAGE_SIZE))), 0),
+                                  MAX_PAGE_SIZE)
+            parsed['min_videos'] = int(params.get('min_videos', 3))
+        except ValueError as error:
+            raise QueryError(str(error))
+        return parsed
+
+    def query_meta(self, tables, artist_stats, params):
+        return {
+            'platforms': {platform: {'months': list(table.months), 'years': sorted(table.years)}
+                          for platform, table in tables.items()},
+            'artists': len(artist_stats),
+        }
+
+    def query_totals(self, tables, artist_stats, params):
+        table = tables[params['platform']]
+        rows = [table.rows[i] for i in table.select(params['year'], params['month'])]
+        if not rows:
+            return {'total_posts': 0, 'avg_views': 0, 'avg_likes': 0, 'avg_ir': 0,
+                    'total_shares': 0, 'total_comments': 0, 'total_collects': 0}
+        return {
+            'total_posts': len(rows),
+            'avg_views': sum(row['views'] for row in rows) / len(rows),
+            'avg_likes': sum(row['likes'] for row in rows) / len(rows),
+            'avg_ir': sum(row['ir'] for row in rows) / len(rows),
+            'total_shares': sum(row['shares'] for row in rows),
+            'total_comments': sum(row['comments'] for row in rows),
+            'total_collects': sum(row['collects'] for row in rows),
+        }
+
+    def query_evolution(self, tables, artist_stats, params):
+        table = tables[params['platform']]
+        metric = params['metric']
+        result = []
+        for year_month in table.month_keys(params['year']):
+            summary = table.summaries[year_month]
+            if metric == 'median_ir':
+                value = upper_median(table.rows[i]['ir'] for i in table.months[year_month])
+            else:
+                value = summary.get(metric, 0)
+            result.append({'month': year_month, 'posts': summary.get('total_posts', 0), 'metric': value})
+        return result
+
+    def query_impact(self, tables, artist_stats, params):
+        table = tables[params['platform']]
+        field = METRIC_FIELDS[params['metric']]
+        result = []
+        for year_month in table.month_keys(params['year']):
+            counts = dict.fromkeys(reversed(IMPACT_LEVELS), 0)
+            for i in table.months[year_month]:
+                value = table.rows[i][field]
+                if value >= 0:
+                    counts[impact_level(value, field)] += 1
+            result.append(dict({'month': year_month}, **counts))
+        return result
+
+    def query_distribution(self, tables, artist_stats, params):
+        table = tables[params['platform']]
+        metric = params['metric']
+        field = METRIC_FIELDS[metric]
+        # Como el violin del dashboard: el mes seleccionado o todos los meses (sin filtro de año)
+        indices = table.select(month=params['month']) if params['month'] else table.select()
+        if field == 'ir':
+            values = [min(table.rows[i]['ir'], IR_DISTRIBUTION_MAX) for i in indices]
+            max_value = IR_DISTRIBUTION_MAX
+        else:
+            values = [table.rows[i][field] for i in indices]
+            max_value = max(values + [1])
+        bin_count = 26 if metric == 'avg_ir' else 50
+        bins = [0] * bin_count
+        for value in values:
+            bins[min(int(value / max_value * (bin_count - 1)), bin_count - 1)] += 1
+        points = [{'value': value, 'description': table.rows[i]['description'], 'artist': table.rows[i]['artist']}
+                  for i, value in zip(indices, values)]
+        return {
+            'metric_name': {'ir': 'IR', 'views': 'Views', 'likes': 'Likes'}[field],
+            'metric_unit': '%' if field == 'ir' else '',
+            'median': upper_median(values),
+            'average': sum(values) / len(values) if values else 0,
+            'max_value': max_value,
+            'bins': bins,
+            'points': page(points, params),
+        }
+
+    def query_videos(self, tables, artist_stats, params):
+        table = tables[params['platform']]
+        rows = [table.rows[i] for i in table.select(params['year'], params['month'], params.get('artist'))]
+        if params['impact'] != 'all':
+            field = METRIC_FIELDS[params['metric']]
+            rows = [row for row in rows if impact_level(row[field], field) == params['impact']]
+        rows.sort(key=lambda row: row[params['sort']], reverse=params['direction'] == 'desc')
+        return page(rows, params)
+
+    def query_search(self, tables, artist_stats, params):
+        table = tables[params['platform']]
+        if table.search is None:
+            raise QueryError(f'sin índice de búsqueda para {params["platform"]}')
+        indices = table.search.search(params.get('q', ''))
+        if params['month'] or params['year'] != 'all':
+            wanted = {params['month']} if params['month'] else set(table.month_keys(params['year']))
+            indices = [i for i in indices if table.row_months[i] in wanted]
+        rows = [table.rows[i] for i in indices]
+        rows.sort(key=lambda row: row[params['sort']], reverse=params['direction'] == 'desc')
+        return page(rows, params)
+
+    def query_artists(self, tables, artist_stats, params):
+        platform = params['platform']
+        table = tables[platform]
+        year = params['year']
+        metric = params['metric']
+        exclude = params.get('exclude', '').lower()
+        result = []
+        for artist, stats in artist_stats.items():
+            platform_stats = stats.get(platform)
+            if not platform_stats:
+                continue
+            if exclude and exclude in artist.lower():
+                continue
+            if platform_stats['total_videos'] < params['min_videos']:
+                continue
+            indices = table.select(year, artist=artist)
+            if year != 'all' and len(indices) < params['min_videos']:
+                continue
+            if metric in ('median_views', 'median_ir'):
+                values = [table.rows[i][METRIC_FIELDS[metric]] for i in indices]
+                # Sin videos en los meses cargados el dashboard mostraba avg_views
+                value = statistics.median(values) if values else platform_stats['avg_views']
+            else:
+                value = platform_stats[metric]
+            result.append({
+                'artist': artist,
+                'videos': platform_stats['total_videos'],
+                'avg_views': platform_stats['avg_views'],
+                'avg_likes': platform_stats['avg_likes'],
+                'avg_ir': platform_stats['avg_ir'],
+                'metric': value,
+            })
+        result.sort(key=lambda item: item['metric'], reverse=True)
+        return page(result, params)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """GET /api/<consulta>?<filtros> -> JSON."""
+
+    engine = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith('/api/'):
+            self._send(404, {'error': 'no encontrado'})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            self._send(200, self.engine.query(url.path[len('/api/'):], params))
+        except LookupError:
+            self._send(404, {'error': f'consulta desconocida: {url.path}'})
+        except QueryError as error:
+            self._send(400, {'error': str(error)})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(public_dir=PUBLIC_DIR, host=SERVICE_HOST, port=SERVICE_PORT):
+    engine = QueryEngine(public_dir)
+    engine.refresh()
+    handler = type('Handler', (QueryHandler,), {'engine': engine})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Plataformas cargadas: {', '.join(f'{p} ({len(t.rows)} posts)' for p, t in engine.tables.items())}")
+    print(f"Servicio de consultas en http://{host}:{port}/api/meta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio local de consultas sobre la salida del pipeline')
+    parser.add_argument('--public-dir', default=PUBLIC_DIR,
+                        help='Carpeta con la salida del pipeline (manifest + shards o data_<plataforma>.json)')
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    serve(args.public_dir, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cubo de agregados por plataforma, periodo y artista (rollup.json).
+
+El dashboard filtra por plataforma, año, mes y artista. En lugar de recorrer
+los videos en cada cambio de filtro, el pipeline precalcula una celda por cada
+combinación, incluidos los totales marginales (`*` = todos):
+
+    cells[plataforma][periodo][artista]
+
+donde plataforma es 'tiktok', 'instagram' o '*', periodo es 'YYYY-MM', 'YYYY'
+o '*' (el mes ya determina el año) y artista es un nombre o '*'. Cada celda
+trae count, las sumas de views, likes, shares, comments, collects e ir,
+avg_ir, median_views (el central superior, como median_views de los datos
+mensuales) y views_quantiles en los cuantiles de QUANTILES (interpolación
+lineal, como la mediana de la pestaña de artistas).
+
+`build_sketches` genera sketches.json: un QuantileSketch (quantiles.py) de
+views, likes e ir por mes y por artista de cada plataforma. Los grupos de
+hasta SKETCH_EXACT_LIMIT posts van con sus valores exactos (mismas medianas
+que los datos mensuales); los más grandes como t-digest. Los sketches se
+combinan entre meses o plataformas sin los videos, para medianas, percentiles
+y la densidad del violin plot.
+"""
+
+import numpy as np
+import pandas as pd
+
+from quantiles import QuantileSketch
+
+# Subir este número si cambia el formato del cubo
+ROLLUP_VERSION = 1
+
+# Valor de una dimensión agregada (todas las plataformas, todo el periodo, todos los artistas)
+ALL = '*'
+
+QUANTILES = [0.25, 0.5, 0.75, 0.9]
+
+SUM_COLUMNS = ['views', 'likes', 'shares', 'comments', 'collects']
+
+# Sketches: exactos hasta este tamaño de grupo, t-digest con esta compresión arriba
+SKETCH_EXACT_LIMIT = 500
+SKETCH_COMPRESSION = 100
+
+# (métrica, typecode del sketch)
+SKETCH_METRICS = [('views', 'q'), ('likes', 'q'), ('ir', 'd')]
+
+
+def _dimension(values):
+    """Códigos enteros y nombres de una dimensión."""
+    codes, names = pd.factorize(values, sort=True)
+    return codes.astype('int64'), list(names)
+
+
+def _cells(dimensions, metrics, levels):
+    """
+    Celdas de un nivel del cubo: [(plataforma, periodo, artista, celda)].
+    `dimensions` son (códigos, nombres) por dimensión; `levels` indica cuáles
+    se agrupan (las demás valen ALL).
+    """
+    key = np.zeros(len(metrics['views']), dtype='int64')
+    names = []
+    for (codes, dimension_names), grouped in zip(dimensions, levels):
+        if grouped:
+            key = key * len(dimension_names) + codes
+            names.append(dimension_names)
+        else:
+            names.append([ALL])
+
+    # Un solo ordenamiento por nivel: por celda y dentro de cada celda por views
+    views = metrics['views']
+    order = np.lexsort((views, key))
+    sorted_key = key[order]
+    starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    sorted_views = views[order]
+    sums = {column: np.add.reduceat(metrics[column][order], starts) for column in SUM_COLUMNS + ['ir']}
+    # Central superior: el elemento count // 2 de cada celda
+    upper = sorted_views[starts + counts // 2]
+    # Cuantiles con interpolación lineal entre los dos vecinos
+    quantiles = []
+    for q in QUANTILES:
+        position = (counts - 1) * q
+        low = np.floor(position).astype('int64')
+        high = np.ceil(position).astype('int64')
+        low_values = sorted_views[starts + low].astype(float)
+        high_values = sorted_views[starts + high].astype(float)
+        quantiles.append((low_values + (high_values - low_values) * (position - low)).tolist())
+
+    cells = []
+    for i, cell_key in enumerate(sorted_key[starts].tolist()):
+        indices = []
+        for dimension_names in reversed(names):
+            cell_key, index = divmod(cell_key, len(dimension_names))
+            indices.append(dimension_names[index])
+        count = int(counts[i])
+        cells.append((*reversed(indices), {
+            'count': count,
+            **{column: int(sums[column][i]) for column in SUM_COLUMNS},
+            'ir': float(sums['ir'][i]),
+            'avg_ir': float(sums['ir'][i]) / count,
+            'median_views': int(upper[i]),
+            'views_quantiles': [values[i] for values in quantiles],
+        }))
+    return cells
+
+
+def build_rollup(rows):
+    """
+    Cubo a partir de una fila por video con platform, month, artist, las
+    columnas de SUM_COLUMNS (enteros) e ir.
+    """
+    metrics = {column: rows[column].to_numpy(dtype='int64') for column in SUM_COLUMNS}
+    metrics['ir'] = rows['ir'].to_numpy(dtype=float)
+    platform = _dimension(rows['platform'])
+    month = _dimension(rows['month'])
+    year = _dimension(rows['month'].str[:4])
+    artist = _dimension(rows['artist'])
+    cells = {}
+    if len(rows):
+        for by_platform in (True, False):
+            for period in (month, year, None):
+                for by_artist in (True, False):
+                    dimensions = [platform, period or month, artist]
+                    levels = [by_platform, period is not None, by_artist]
+                    for platform_key, period_key, artist_key, cell in _cells(dimensions, metrics, levels):
+                        cells.setdefault(platform_key, {}).setdefault(period_key, {})[artist_key] = cell
+    # Orden estable: plataformas y periodos ordenados, '*' al final
+    ordered = {}
+    for platform_key in sorted(cells, key=lambda key: (key == ALL, key)):
+        ordered[platform_key] = {period_key: cells[platform_key][period_key]
+                                 for period_key in sorted(cells[platform_key], key=lambda key: (key == ALL, key))}
+    return {
+        'version': ROLLUP_VERSION,
+        'dimensions': ['platform', 'period', 'artist'],
+        'all': ALL,
+        'quantiles': QUANTILES,
+        'cells': ordered,
+    }
+
+
+def build_sketches(rows, exact_limit=SKETCH_EXACT_LIMIT, compression=SKETCH_COMPRESSION):
+    """Sketches por mes y por artista de cada plataforma (mismas filas que build_rollup)."""
+    platforms = {}
+    for platform, platform_rows in rows.groupby('platform', sort=True):
+        groups = {}
+        for dimension, column in (('months', 'month'), ('artists', 'artist')):
+            sketches = groups[dimension] = {}
+            for key, group in platform_rows.groupby(column, sort=dimension == 'months'):
+                sketches[key] = {
+                    metric: QuantileSketch.from_values(group[metric].tolist(), exact_limit, typecode,
+                                                       compression).to_dict()
+                    for metric, typecode in SKETCH_METRICS
+                }
+        platforms[platform] = groups
+    return {
+        'version': ROLLUP_VERSION,
+        'exact_limit': exact_limit,
+        'metrics': [metric for metric, _ in SKETCH_METRICS],
+        'platforms': platforms,
+    }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice invertido de búsqueda sobre las descripciones de los posts.
+
+Los videos del dashboard llevan la descripción recortada a 100/200
+caracteres, así que buscar un hashtag (#MiMayorAnhelo) recorriendo
+`all_videos` falla además de ser lento. process_data_v2.py indexa la
+descripción completa de cada post y escribe por plataforma:
+
+    search/<plataforma>.json              índice de todos los meses
+    search/<plataforma>/<mes>.json        un índice por mes (--search-partitions)
+
+Los términos son hashtags (`#mimayoranhelo`), menciones (`@monlaferte`) y
+palabras, en minúsculas y sin acentos. Cada término tiene su lista de
+posteo: los ids de los posts que lo contienen, ordenados y guardados como
+diferencias contra el anterior. El id de un post es su posición en el orden
+de la salida (meses en orden y, dentro de cada mes, el orden de
+`all_videos`); `months` da cuántos posts tiene cada mes para pasar de id a
+(mes, posición). Una búsqueda es la intersección de las listas de sus
+términos, sin recorrer los posts.
+"""
+
+import json
+import os
+import re
+import unicodedata
+
+from outputs import write_json
+
+# Subir este número si cambia el formato del índice
+SEARCH_INDEX_VERSION = 1
+
+# Hashtags, menciones (pueden llevar puntos, como los usernames) y palabras
+TERM_RE = re.compile(r'#\w+|@[\w.]*\w|\w+')
+
+# Palabras más cortas no se indexan
+MIN_WORD_LENGTH = 2
+
+
+def fold(text):
+    """Texto en minúsculas y sin acentos."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def terms(text):
+    """Términos distintos de un texto, en orden de aparición."""
+    found = {}
+    for term in TERM_RE.findall(fold(text)):
+        if term[0] in '#@' or len(term) >= MIN_WORD_LENGTH:
+            found.setdefault(term, None)
+    return list(found)
+
+
+def _encode(ids):
+    """Lista de ids ordenados como el primero y las diferencias siguientes."""
+    return [ids[0]] + [current - previous for previous, current in zip(ids, ids[1:])]
+
+
+class SearchIndexBuilder:
+    """
+    Listas de posteo de una plataforma armadas post por post. Dentro de cada
+    mes los posts se agregan en el orden de `all_videos`; los meses pueden
+    llegar intercalados (process_data_v2.py --chunksize) y el índice los
+    ordena.
+    """
+
+    def __init__(self, platform):
+        self.platform = platform
+        # Posts por mes
+        self.counts = {}
+        # {término: {mes: [posiciones dentro del mes]}}
+        self._postings = {}
+
+    def add(self, month, text):
+        position = self.counts.get(month, 0)
+        self.counts[month] = position + 1
+        for term in terms(text):
+            self._postings.setdefault(term, {}).setdefault(month, []).append(position)
+
+    def months(self):
+        return sorted(self.counts)
+
+    def build(self, month=None):
+        """Índice de todos los meses o, con `month`, solo de ese mes (ids dentro del mes)."""
+        months = self.months() if month is None else [month]
+        starts = {}
+        start = 0
+        for name in months:
+            starts[name] = start
+            start += self.counts[name]
+        index_terms = {}
+        for term in sorted(self._postings):
+            by_month = self._postings[term]
+            ids = [starts[name] + position for name in months if name in by_month
+                   for position in by_month[name]]
+            if ids:
+                index_terms[term] = _encode(ids)
+        return {
+            'version': SEARCH_INDEX_VERSION,
+            'platform': self.platform,
+            'months': [[name, self.counts[name]] for name in months],
+            'terms': index_terms,
+        }
+
+
+def search_path(public_dir, platform, month=None):
+    if month is None:
+        return os.path.join(public_dir, 'search', f'{platform}.json')
+    return os.path.join(public_dir, 'search', platform, f'{month}.json')
+
+
+def write_search_index(public_dir, builder, partitioned=False):
+    """
+    Escribe el índice de la plataforma de `builder` (SearchIndexBuilder) y, con
+    `partitioned`, uno por mes (los ids de cada partición son las posiciones
+    dentro del mes). Las particiones de meses que ya no existen se borran.
+    Retorna el número de términos.
+    """
+    platform = builder.platform
+    os.makedirs(os.path.join(public_dir, 'search'), exist_ok=True)
+    index = builder.build()
+    write_json(search_path(public_dir, platform), index)
+
+    directory = os.path.join(public_dir, 'search', platform)
+    current = set()
+    if partitioned:
+        os.makedirs(directory, exist_ok=True)
+        for month in builder.months():
+            write_json(search_path(public_dir, platform, month), builder.build(month))
+            current.add(f'{month}.json')
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json') and name not in current:
+                os.remove(os.path.join(directory, name))
+    return len(index['terms'])
+
+
+class SearchIndex:
+    """Índice cargado de search/<plataforma>.json (o de una partición)."""
+
+    def __init__(self, data):
+        self.platform = data['platform']
+        self.months = []
+        start = 0
+        for month, count in data['months']:
+            self.months.append((month, start, count))
+            start += count
+        self._terms = data['terms']
+        self._decoded = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SEARCH_INDEX_VERSION:
+            raise ValueError(f'{path}: versión de índice {data.get("version")} no soportada')
+        return cls(data)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def postings(self, term):
+        """Ids de los posts que contienen el término (ya normalizado)."""
+        ids = self._decoded.get(term)
+        if ids is None:
+            ids = []
+            current = 0
+            for gap in self._terms.get(term, ()):
+                current += gap
+                ids.append(current)
+            self._decoded[term] = ids
+        return ids
+
+    def search(self, query):
+        """Ids ordenados de los posts que contienen todos los términos de `query`."""
+        lists = sorted((self.postings(term) for term in terms(query)), key=len)
+        if not lists:
+            return []
+        matches = set(lists[0])
+        for ids in lists[1:]:
+            matches.intersection_update(ids)
+            if not matches:
+                break
+        return sorted(matches)
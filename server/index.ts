@@ -1,4 +1,6 @@
+import { createHash } from "crypto";
 import express from "express";
+import fs from "fs";
 import { createServer } from "http";
 import path from "path";
 import { fileURLToPath } from "url";
@@ -16,7 +18,107 @@ async function startServer() {
       ? path.resolve(__dirname, "public")
       : path.resolve(__dirname, "..", "dist", "public");
 
-  app.use(express.static(staticPath));
+  // Monthly data shards carry a content hash in their name
+  // (data/<platform>/<month>.<hash>.json), so they can be cached forever
+  const shardPattern = /[\\/]data[\\/][^\\/]+[\\/][^\\/]+\.[0-9a-f]{16}\.json$/;
+
+  // The pipeline writes .gz/.br siblings of its outputs plus precompressed.json
+  // (strong ETag = content hash, and size of each original). Serve the variant the
+  // client accepts, as long as the original still has that hash.
+  type PrecompressedEntry = {
+    etag: string;
+    size: number;
+    encodings: Record<string, number>;
+  };
+  const suffixes: Record<string, string> = { br: ".br", gzip: ".gz" };
+  const indexPath = path.join(staticPath, "precompressed.json");
+  let precompressed: Record<string, PrecompressedEntry> = {};
+  let indexMtime = 0;
+
+  const loadPrecompressed = () => {
+    try {
+      const mtime = fs.statSync(indexPath).mtimeMs;
+      if (mtime !== indexMtime) {
+        precompressed = JSON.parse(fs.readFileSync(indexPath, "utf-8")).files ?? {};
+        indexMtime = mtime;
+      }
+    } catch {
+      precompressed = {};
+      indexMtime = 0;
+    }
+    return precompressed;
+  };
+
+  // Content hash of each original, recomputed only when its mtime or size changes
+  const hashes = new Map<string, { mtimeMs: number; size: number; etag: string }>();
+  const contentHash = (filePath: string) => {
+    const stat = fs.statSync(filePath);
+    const cached = hashes.get(filePath);
+    if (cached && cached.mtimeMs === stat.mtimeMs && cached.size === stat.size) return cached;
+    const etag = createHash("sha256").update(fs.readFileSync(filePath)).digest("hex").slice(0, 32);
+    const entry = { mtimeMs: stat.mtimeMs, size: stat.size, etag };
+    hashes.set(filePath, entry);
+    return entry;
+  };
+
+  app.use((req, res, next) => {
+    if (req.method !== "GET" && req.method !== "HEAD") return next();
+    let relative: string;
+    try {
+      relative = decodeURIComponent(req.path).replace(/^\/+/, "");
+    } catch {
+      return next();
+    }
+    const entry = loadPrecompressed()[relative];
+    if (!entry) return next();
+    const encoding = req.acceptsEncodings([...Object.keys(entry.encodings), "identity"]);
+    res.vary("Accept-Encoding");
+    if (!encoding || encoding === "identity") return next();
+
+    const filePath = path.join(staticPath, relative);
+    try {
+      const current = contentHash(filePath);
+      if (current.size !== entry.size || current.etag !== entry.etag) return next();
+    } catch {
+      return next();
+    }
+
+    const etag = `"${entry.etag}-${encoding}"`;
+    res.setHeader("ETag", etag);
+    res.setHeader("Content-Encoding", encoding);
+    res.type(path.extname(relative) === ".json" ? "application/json" : "application/octet-stream");
+    res.setHeader(
+      "Cache-Control",
+      shardPattern.test(filePath) ? "public, max-age=31536000, immutable" : "no-cache"
+    );
+    if (req.fresh) return res.status(304).end();
+    res.setHeader("Content-Length", entry.encodings[encoding]);
+    if (req.method === "HEAD") return res.end();
+    fs.createReadStream(filePath + suffixes[encoding])
+      .on("error", next)
+      .pipe(res);
+  });
+
+  app.use(
+    express.static(staticPath, {
+      setHeaders: (res, filePath) => {
+        if (shardPattern.test(filePath)) {
+          res.setHeader("Cache-Control", "public, max-age=31536000, immutable");
+        }
+      },
+    })
+  );
+
+  // Aggregations are answered by the local query service (query_service.py)
+  const queryServiceUrl = process.env.QUERY_SERVICE_URL || "http://127.0.0.1:8765";
+  app.get("/api/*", async (req, res) => {
+    try {
+      const response = await fetch(`${queryServiceUrl}${req.originalUrl}`);
+      res.status(response.status).type("application/json").send(await response.text());
+    } catch {
+      res.status(503).json({ error: "query service unavailable" });
+    }
+  });
 
   // Handle client-side routing - serve index.html for all routes
   app.get("*", (_req, res) => {
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agregación mensual en streaming para process_data.py.
+
+En lugar de guardar todos los videos de cada mes en listas, `MonthlySpool`
+mantiene sumas y conteos corrientes por mes, guarda las views en un
+`QuantileSketch` para la mediana y escribe cada video ya serializado (una
+línea de JSON compacto) en un archivo temporal por mes. Al final esos
+archivos se copian a la salida: `write_partitioned` los escribe como shards
+mensuales y `write_json` como un solo JSON minificado (el mismo contenido que
+`json.dump` de los datos mensuales).
+
+`VideoSpool` es solo la parte que vuelca los videos a disco y los escribe:
+process_data_v2.py la usa en el modo --chunksize con las métricas que
+calcula con pandas.
+"""
+
+import json
+import os
+import tempfile
+from fractions import Fraction
+
+from columnar import ColumnarWriter
+from partitioned import ShardWriter, compact_json
+from quantiles import DEFAULT_EXACT_LIMIT, QuantileSketch
+
+
+class RunningMean:
+    """
+    Media exacta de un flujo de números, igual a `statistics.mean`: la suma se
+    lleva como racional (numeradores por denominador) y el resultado es int si
+    todos los valores son int y la media es entera.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._partials = {}
+        self._all_int = True
+
+    def add(self, value):
+        self.count += 1
+        self._all_int = self._all_int and isinstance(value, int)
+        numerator, denominator = value.as_integer_ratio()
+        self._partials[denominator] = self._partials.get(denominator, 0) + numerator
+
+    def mean(self):
+        total = sum(Fraction(n, d) for d, n in self._partials.items())
+        value = total / self.count
+        if self._all_int and value.denominator == 1:
+            return int(value)
+        return float(value)
+
+
+class MonthFile:
+    """Archivo temporal con los videos de un mes (una línea de JSON compacto por video)."""
+
+    def __init__(self, year_month, spool_path):
+        self.year_month = year_month
+        self.total_posts = 0
+        self._file = open(spool_path, 'w+', encoding='utf-8', newline='')
+
+    def write(self, video):
+        """Agrega un video ya convertido a dict."""
+        self.total_posts += 1
+        self._file.write(compact_json(video) + '\n')
+
+    def video_lines(self):
+        """Videos del mes en orden, cada uno como JSON compacto."""
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            yield line.rstrip('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class MonthAccumulator(MonthFile):
+    """Métricas corrientes de un mes y su archivo temporal de videos."""
+
+    def __init__(self, year_month, spool_path, exact_limit):
+        super().__init__(year_month, spool_path)
+        self.views = QuantileSketch(exact_limit)
+        self.avg_views = RunningMean()
+        self.avg_likes = RunningMean()
+        self.avg_ir = RunningMean()
+        self.total_shares = 0
+        self.total_comments = 0
+        self.total_collects = 0
+
+    def add(self, video):
+        """Agrega un video (engine.Post); se serializa a dict solo al escribirlo."""
+        self.views.add(video.views)
+        self.avg_views.add(video.views)
+        self.avg_likes.add(video.likes)
+        self.avg_ir.add(video.ir)
+        self.total_shares += video.shares
+        self.total_comments += video.comments
+        self.total_collects += video.collects
+        self.write(video.to_dict())
+
+    def summary(self):
+        """Métricas del mes (mismas llaves y redondeo que antes)."""
+        return {
+            'year_month': self.year_month,
+            'median_views': round(self.views.median(), 2),
+            'avg_views': round(self.avg_views.mean(), 2),
+            'avg_likes': round(self.avg_likes.mean(), 2),
+            'total_shares': self.total_shares,
+            'total_comments': self.total_comments,
+            'total_collects': self.total_collects,
+            'avg_ir': round(self.avg_ir.mean(), 2),
+            'total_posts': self.total_posts
+        }
+
+
+class VideoSpool:
+    """
+    Videos agrupados por mes en archivos temporales. Las métricas de cada mes
+    van en `summaries` y los meses se escriben en ese orden.
+    """
+
+    def __init__(self):
+        self.months = {}
+        self.summaries = {}
+        self._dir = tempfile.TemporaryDirectory(prefix='sme_spool_')
+
+    def _new_month(self, year_month, spool_path):
+        return MonthFile(year_month, spool_path)
+
+    def month(self, year_month):
+        """Archivo del mes (se crea con su primer video)."""
+        month = self.months.get(year_month)
+        if month is None:
+            spool_path = os.path.join(self._dir.name, f'{len(self.months)}.json')
+            month = self.months[year_month] = self._new_month(year_month, spool_path)
+        return month
+
+    def add(self, year_month, video):
+        """Agrega un video (dict) al final de su mes."""
+        self.month(year_month).write(video)
+
+    def write_partitioned(self, public_dir, platform):
+        """Escribe el manifest y un shard minificado por mes (ver partitioned.py)."""
+        writer = ShardWriter(public_dir, platform)
+        for year_month, summary in self.summaries.items():
+            writer.write_month(year_month, summary, self.months[year_month].video_lines())
+        writer.close()
+
+    def write_columnar(self, path):
+        """Escribe la tabla de videos en formato columnar (ver columnar.py)."""
+        writer = ColumnarWriter(path)
+        for year_month, summary in self.summaries.items():
+            writer.add_month(year_month, summary,
+                             (json.loads(line) for line in self.months[year_month].video_lines()))
+        writer.close()
+
+    def write_json(self, path):
+        """Escribe el JSON mensual minificado y de forma atómica (archivo temporal + rename)."""
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write('{')
+            for position, (year_month, summary) in enumerate(self.summaries.items()):
+                if position:
+                    f.write(',')
+                f.write(f'{compact_json(year_month)}:{compact_json(summary)[:-1]},"all_videos":[')
+                for index, line in enumerate(self.months[year_month].video_lines()):
+                    f.write(line if index == 0 else ',' + line)
+                f.write(']}')
+            f.write('}')
+        os.replace(path + '.tmp', path)
+
+    def close(self):
+        for month in self.months.values():
+            month.close()
+        self._dir.cleanup()
+
+
+class MonthlySpool(VideoSpool):
+    """Videos agrupados por mes (en orden de primera aparición) con memoria acotada."""
+
+    def __init__(self, exact_limit=DEFAULT_EXACT_LIMIT):
+        super().__init__()
+        self.exact_limit = exact_limit
+
+    def _new_month(self, year_month, spool_path):
+        return MonthAccumulator(year_month, spool_path, self.exact_limit)
+
+    def add(self, year_month, video):
+        self.month(year_month).add(video)
+
+    def total_posts(self):
+        return sum(month.total_posts for month in self.months.values())
+
+    def summarize(self, previous=None, affected=()):
+        """
+        Calcula las métricas de cada mes. Con `previous` (modo incremental) los
+        meses que no están en `affected` reutilizan su resumen anterior.
+        """
+        previous = previous or {}
+        self.summaries = {}
+        for year_month, month in self.months.items():
+            summary = previous.get(year_month)
+            if summary is None or year_month in affected:
+                summary = month.summary()
+            self.summaries[year_month] = summary
+        return self.summaries
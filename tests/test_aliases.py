@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Reglas de AliasResolver: gana el alias exacto y, si no hay, el primero de la
+tabla (en el orden del archivo) contenido en el texto, como el recorrido del
+mapeo manual original.
+"""
+
+import json
+import random
+
+from aliases import AliasResolver, load_aliases
+
+
+def baseline_lookup(aliases, text):
+    """Recorrido del mapeo manual original: exacto y luego subcadena en orden."""
+    mapping = {}
+    for alias, artist in aliases.items():
+        if alias:
+            mapping.setdefault(alias.lower(), artist)
+    lower = text.lower()
+    if lower in mapping:
+        return mapping[lower]
+    for alias, artist in mapping.items():
+        if alias in lower:
+            return artist
+    return None
+
+
+def test_exact_match_wins():
+    resolver = AliasResolver({'elo': 'Elo', 'belo': 'Belo', 'beelo': 'Beelo'})
+    assert resolver.lookup('beelo') == 'Beelo'
+    assert resolver.lookup('BELO') == 'Belo'
+    # Como subcadena gana el primero de la tabla aunque otro sea más largo
+    assert resolver.lookup('xbeelo') == 'Elo'
+    assert resolver.lookup('belo_oficial') == 'Elo'
+
+
+def test_first_alias_in_file_order_wins():
+    resolver = AliasResolver({'nath': 'Nathy Peluso', 'dope': 'Dove Cameron'})
+    # 'dope' aparece antes en el texto, pero 'nath' va antes en la tabla
+    assert resolver.lookup('dopenath') == 'Nathy Peluso'
+    assert resolver.lookup('dope_oficial') == 'Dove Cameron'
+    assert resolver.lookup('nadie') is None
+
+
+def test_overlapping_aliases():
+    # belo/beelo de aliases.json: 'beelo' no contiene 'belo', 'beebelo' sí
+    table = {'belo': 'BEÉLE', 'beelo': 'Beelo'}
+    resolver = AliasResolver(table)
+    assert resolver.lookup('beelo') == 'Beelo'
+    assert resolver.lookup('beelox') == 'Beelo'
+    assert resolver.lookup('beebelo') == 'BEÉLE'
+    assert resolver.lookup('beebeelo') == 'Beelo'
+    # Un alias dentro de otro (enlace de sufijo del autómata)
+    resolver = AliasResolver({'abcd': 'Largo', 'bc': 'Corto'})
+    assert resolver.lookup('abcx') == 'Corto'
+    assert resolver.lookup('xabcd') == 'Largo'
+    resolver = AliasResolver({'bc': 'Corto', 'abcd': 'Largo'})
+    assert resolver.lookup('abcd') == 'Largo'
+    assert resolver.lookup('xabcd') == 'Corto'
+
+
+def test_case_duplicates_and_empty_aliases():
+    resolver = AliasResolver({'': 'Vacío', 'Belo': 'Primero', 'belo': 'Segundo'})
+    assert len(resolver) == 1
+    assert resolver.lookup('BELO') == 'Primero'
+    assert resolver.lookup('') is None
+    assert resolver.normalize('Mon Laferte') == 'Mon Laferte'
+    assert resolver.normalize('Belo oficial') == 'Primero'
+
+
+def test_repo_table_matches_baseline(tmp_path):
+    path = tmp_path / 'aliases.json'
+    path.write_text(json.dumps({'dope': 'Dove Cameron', 'nath': 'Nathy Peluso', 'belo': 'BEÉLE',
+                                'beelo': 'BEÉLE', 'mdo': 'Mon Laferte'}), encoding='utf-8')
+    table = load_aliases(str(path))
+    assert list(table) == ['dope', 'nath', 'belo', 'beelo', 'mdo']
+    resolver = AliasResolver(table)
+    for text in ['belo', 'Beelo_Music', 'mdonath', 'nathdope', 'dop', 'modo', 'xbeel0']:
+        assert resolver.lookup(text) == baseline_lookup(table, text), text
+
+
+def test_random_tables_match_baseline():
+    rng = random.Random(6)
+    for _ in range(300):
+        table = {}
+        for position in range(rng.randint(1, 8)):
+            alias = ''.join(rng.choice('abC') for _ in range(rng.randint(1, 4)))
+            table.setdefault(alias, f'artista{position}')
+        resolver = AliasResolver(table)
+        for _ in range(30):
+            text = ''.join(rng.choice('abcAB') for _ in range(rng.randint(0, 10)))
+            assert resolver.lookup(text) == baseline_lookup(table, text), (table, text)
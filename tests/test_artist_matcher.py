@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+ArtistMatcher contra los bucles de fuerza bruta originales.
+
+`baseline_find_artist` y `baseline_best_match` son las funciones de
+process_data.py y process_data_v2.py antes del índice precompilado; el
+matcher (trigramas, bigramas y cota LCS) debe dar exactamente lo mismo,
+incluidos los empates y los umbrales.
+"""
+
+import random
+import re
+from difflib import SequenceMatcher
+
+from aliases import AliasResolver
+from artist_matcher import ArtistMatcher
+import process_data_v2 as v2
+
+# Nombres repetidos, de 3 caracteres o menos, de varias palabras y con acentos
+ROSTER = [
+    'Mon Laferte', 'Carlos Rivera', 'BEÉLE', 'Nathy Peluso', 'Ha*Ash', 'Yuridia',
+    'Mon Laferte', 'Yuri', 'Kany', 'MC', 'Bad Bunny', 'Sin Bandera', 'Río Roma',
+    'Grupo Firme', 'Grupo Frontera', 'Ed', 'Kenia OS', 'Juan Luis Guerra', 'Neto Bernal',
+    'Danna', 'Danna Paola', 'Los Ángeles Azules', 'Abc', 'abc', 'Zoé',
+]
+
+ALIASES = {
+    'dope': 'Dove Cameron', 'nath': 'Nathy Peluso', 'calo': 'Carlos Rivera',
+    'belo': 'BEÉLE', 'beelo': 'BEÉLE', 'pereza': 'Fuerza Regida',
+    'miguel': 'Miguel Bueno', 'mdo': 'Mon Laferte', 'haim': 'Ha*Ash',
+    'jain': 'Juan Luis', 'neton': 'Neto Bernal',
+}
+
+WORDS = ['hoy', 'nuevo', 'video', 'con', 'grupo', 'roma', 'los', 'azules', 'bad', 'luis',
+         'en', 'vivo', 'ft', 'concierto', 'mon', 'yuri', 'paola', 'firme', 'frontera']
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    return ''.join(c.lower() for c in text if c.isalnum())
+
+
+def baseline_find_artist(description, artists, threshold=0.75):
+    if not description:
+        return "Sin artista"
+    description_lower = description.lower()
+    description_normalized = normalize_text(description)
+    mentions = re.findall(r'@(\w+)', description)
+    best_match = None
+    best_score = 0
+    for artist in artists:
+        artist_lower = artist.lower()
+        artist_normalized = normalize_text(artist)
+        for mention in mentions:
+            mention_lower = mention.lower()
+            if mention_lower == artist_lower:
+                return artist
+            if artist_normalized in normalize_text(mention) or normalize_text(mention) in artist_normalized:
+                if len(artist_normalized) > 3:
+                    return artist
+        if artist_lower in description_lower:
+            pattern = r'\b' + re.escape(artist_lower) + r'\b'
+            if re.search(pattern, description_lower):
+                return artist
+        artist_words = artist_lower.split()
+        if len(artist_words) > 1:
+            words_found = sum(1 for word in artist_words if len(word) > 2 and word in description_lower)
+            if words_found >= len(artist_words) * 0.7:
+                return artist
+        for mention in mentions:
+            similarity = SequenceMatcher(None, artist_normalized, normalize_text(mention)).ratio()
+            if similarity > best_score:
+                best_score = similarity
+                best_match = artist
+        if len(artist_normalized) > 4 and artist_normalized in description_normalized:
+            similarity = 0.85
+            if similarity > best_score:
+                best_score = similarity
+                best_match = artist
+    if best_score >= threshold:
+        return best_match
+    return "Sin artista"
+
+
+def baseline_best_match(usernames, artists, manual_mapping, threshold=0.6):
+    if not usernames:
+        return None, 0
+    for username in usernames:
+        username_lower = username.lower()
+        if username_lower in manual_mapping:
+            return manual_mapping[username_lower], 1.0
+        for key, artist in manual_mapping.items():
+            if key in username_lower:
+                return artist, 1.0
+    best_artist = None
+    best_similarity = 0
+    for username in usernames:
+        for artist in artists:
+            sim = SequenceMatcher(None, username.lower(), artist.lower()).ratio()
+            if sim > best_similarity and sim >= threshold:
+                best_similarity = sim
+                best_artist = artist
+    return best_artist, best_similarity
+
+
+def mutate(rng, name):
+    """Variante de un nombre: sin espacios, con letras cambiadas, recortada o con sufijo."""
+    text = name.replace(' ', rng.choice(['', '', '_', '.']))
+    for _ in range(rng.randint(0, 2)):
+        if text:
+            position = rng.randrange(len(text))
+            text = text[:position] + rng.choice('aeiouxyz') + text[position + 1:]
+    if rng.random() < 0.3 and len(text) > 3:
+        text = text[:rng.randint(2, len(text))]
+    if rng.random() < 0.3:
+        text += rng.choice(['oficial', 'mx', 'music', '_', '2'])
+    return text
+
+
+def random_description(rng):
+    parts = []
+    for _ in range(rng.randint(0, 6)):
+        kind = rng.random()
+        if kind < 0.35:
+            parts.append('@' + mutate(rng, rng.choice(ROSTER)))
+        elif kind < 0.5:
+            parts.append(rng.choice(ROSTER))
+        elif kind < 0.6:
+            parts.append('@' + rng.choice(list(ALIASES)) + rng.choice(['', 'x', 'oficial']))
+        else:
+            parts.append(rng.choice(WORDS))
+    return ' '.join(parts)
+
+
+def test_find_artist_matches_brute_force():
+    rng = random.Random(1)
+    matcher = ArtistMatcher(ROSTER)
+    for _ in range(4500):
+        description = random_description(rng)
+        assert matcher.find_artist(description) == baseline_find_artist(description, ROSTER), description
+
+
+def test_best_match_matches_brute_force():
+    rng = random.Random(2)
+    matcher = ArtistMatcher(ROSTER, aliases=AliasResolver(ALIASES))
+    batched = ArtistMatcher(ROSTER, aliases=AliasResolver(ALIASES))
+    for _ in range(4500):
+        usernames = re.findall(v2.USERNAME_PATTERN, random_description(rng))
+        expected = baseline_best_match(usernames, ROSTER, ALIASES)
+        assert v2.find_best_artist_match(usernames, matcher) == expected, usernames
+        # El mismo resultado con la cota calculada en lote antes de buscar
+        batched.score_usernames(v2.fuzzy_usernames([tuple(usernames)], batched.aliases))
+        assert v2.find_best_artist_match(usernames, batched) == expected, usernames
+
+
+def test_edge_cases():
+    matcher = ArtistMatcher(ROSTER)
+    for description in ['', '@', '@MC', '@ed', '@abc', 'Abc', 'mon laferte', '@monlaferte', '@mon',
+                        '@Danna', 'Danna Paola en vivo', 'grupo firme frontera', '@zoe', '@Zoé']:
+        assert matcher.find_artist(description) == baseline_find_artist(description, ROSTER), description
+    assert matcher.best_match([]) == (None, 0)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+process_data_v2.py con --chunksize contra la lectura completa: sobre el mismo
+export las salidas (datos, artist_stats, cubo y sketches) deben ser idénticas.
+"""
+
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'process_data_v2.py')
+
+ROSTER = ['Mon Laferte', 'Carlos Rivera', 'BEÉLE', 'Nathy Peluso', 'Grupo Firme', 'Danna Paola']
+
+TIKTOK_COLUMNS = ['date', 'description', 'plays', 'likes', 'comments', 'shares', 'collects', 'video_id']
+INSTAGRAM_COLUMNS = ['date', 'Descripción', 'Visualizaciones', 'Me gusta', 'Comentarios',
+                     'Veces que se compartió', 'Veces que se guardó', 'Enlace permanente']
+
+# Salidas que dependen de la ejecución y no de los datos
+SKIP = {'run_report.json', 'precompressed.json'}
+
+
+def metric(rng, profile):
+    """
+    Métrica según `profile`: enteros que caben en int32, enteros con algunos
+    fuera de int32, o con celdas vacías, ceros y decimales.
+    """
+    if profile == 'large' and rng.random() < 0.02:
+        return 3000000000
+    if profile == 'mixed':
+        kind = rng.random()
+        if kind < 0.05:
+            return ''
+        if kind < 0.1:
+            return 0
+        if kind < 0.13:
+            return f'{rng.uniform(0, 1000):.2f}'
+    return rng.randint(1, 2000000)
+
+
+# Un perfil por columna de métrica (views, likes, comments, shares, collects)
+PROFILES = ['mixed', 'large', 'int', 'mixed', 'int']
+
+
+def description(rng):
+    words = ['hoy', 'nuevo', 'video', '#tour', 'en vivo', 'concierto', 'ft']
+    parts = [rng.choice(words) for _ in range(rng.randint(0, 4))]
+    if rng.random() < 0.6:
+        name = rng.choice(ROSTER)
+        parts.append('@' + name.replace(' ', '').lower() if rng.random() < 0.5 else name)
+    if rng.random() < 0.1:
+        parts.append('@belo_oficial')
+    return ' '.join(parts)
+
+
+def write_fixture(directory, rows=1500):
+    rng = random.Random(7)
+    with open(os.path.join(directory, 'roster.txt'), 'w', encoding='utf-8') as f:
+        f.write('"main_artist"\n' + ''.join(f'"{name}"\n' for name in ROSTER))
+    with open(os.path.join(directory, 'tiktok.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TIKTOK_COLUMNS)
+        for row in range(rows):
+            date = f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00'
+            writer.writerow([date, description(rng)] + [metric(rng, profile) for profile in PROFILES] + [f'tt{row}'])
+    with open(os.path.join(directory, 'instagram.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(INSTAGRAM_COLUMNS)
+        for row in range(rows // 2):
+            date = f'202{rng.randint(4, 5)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+            writer.writerow([date, description(rng)] + [metric(rng, profile) for profile in PROFILES] + [f'ig{row}'])
+
+
+def run(directory, *extra):
+    """Corre el pipeline en `directory` (ahí quedan client/public y .cache)."""
+    public = os.path.join(directory, 'client', 'public')
+    os.makedirs(public)
+    subprocess.run([sys.executable, SCRIPT, '--no-precompress',
+                    '--roster', os.path.join(directory, '..', 'roster.txt'),
+                    '--input', 'tiktok=' + os.path.join(directory, '..', 'tiktok.csv'),
+                    '--input', 'instagram=' + os.path.join(directory, '..', 'instagram.csv'),
+                    *extra], cwd=directory, check=True, capture_output=True)
+    outputs = {}
+    for root, _, names in os.walk(public):
+        for name in names:
+            if name not in SKIP:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    outputs[os.path.relpath(path, public)] = f.read()
+    return outputs
+
+
+@pytest.mark.parametrize('layout', [['--single-file'], []])
+def test_chunked_matches_full_read(tmp_path, layout):
+    write_fixture(str(tmp_path))
+    full = run(str(tmp_path / 'full'), *layout)
+    chunked = run(str(tmp_path / 'chunked'), '--chunksize', '137', *layout)
+    assert {'artist_stats.json', 'rollup.json', 'sketches.json'} <= set(full)
+    assert sorted(full) == sorted(chunked)
+    for name in full:
+        if name.endswith('.json'):
+            assert json.loads(full[name]) == json.loads(chunked[name]), name
+        assert full[name] == chunked[name], name
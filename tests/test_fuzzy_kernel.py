@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+LcsKernel contra una LCS de programación dinámica, con el camino bit-paralelo
+de NumPy (sin rapidfuzz): texto Unicode, nombres de más de 64 caracteres
+(se acotan por longitud) y caracteres de la mención que no están en el roster.
+"""
+
+import random
+
+import pytest
+
+import fuzzy_kernel
+from fuzzy_kernel import WORD_BITS, LcsKernel
+
+ROSTER_CHARS = 'abcdeéñü ßø漢字'
+OTHER_CHARS = 'xyzç€🎵ŁЖ'
+
+
+def brute_force_lcs(a, b):
+    previous = [0] * (len(b) + 1)
+    for char in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if char == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def random_text(rng, chars, low, high):
+    return ''.join(rng.choice(chars) for _ in range(rng.randint(low, high)))
+
+
+@pytest.fixture
+def numpy_kernel(monkeypatch):
+    """LcsKernel que no usa rapidfuzz aunque esté instalado."""
+    find_spec = fuzzy_kernel.importlib.util.find_spec
+    monkeypatch.setattr(fuzzy_kernel.importlib.util, 'find_spec',
+                        lambda name: None if name == 'rapidfuzz' else find_spec(name))
+    return LcsKernel
+
+
+def test_lcs_matches_brute_force(numpy_kernel):
+    rng = random.Random(3)
+    keys = [random_text(rng, ROSTER_CHARS, 1, 20) for _ in range(40)]
+    keys += [random_text(rng, ROSTER_CHARS, WORD_BITS - 1, WORD_BITS) for _ in range(4)]
+    kernel = numpy_kernel(keys)
+    queries = [random_text(rng, ROSTER_CHARS + OTHER_CHARS, 1, 30) for _ in range(300)]
+    queries += [random_text(rng, OTHER_CHARS, 1, 5), random_text(rng, ROSTER_CHARS, 70, 90)]
+    lcs = kernel._lcs(queries)
+    for row, query in enumerate(queries):
+        for column, key in enumerate(keys):
+            assert lcs[row, column] == brute_force_lcs(query, key), (query, key)
+
+
+def test_long_keys_are_bounded_by_length(numpy_kernel):
+    rng = random.Random(4)
+    keys = [random_text(rng, ROSTER_CHARS, WORD_BITS + 1, 100) for _ in range(5)] + ['abc', 'ñü漢']
+    kernel = numpy_kernel(keys)
+    queries = [random_text(rng, ROSTER_CHARS + OTHER_CHARS, 1, 120) for _ in range(100)]
+    lcs = kernel._lcs(queries)
+    for row, query in enumerate(queries):
+        for column, key in enumerate(keys):
+            exact = brute_force_lcs(query, key)
+            if len(key) > WORD_BITS:
+                assert lcs[row, column] == min(len(query), len(key)) >= exact
+            else:
+                assert lcs[row, column] == exact
+
+
+def test_bounds_are_upper_bounds_of_the_ratio(numpy_kernel):
+    from difflib import SequenceMatcher
+
+    rng = random.Random(5)
+    keys = [random_text(rng, ROSTER_CHARS, 1, 80) for _ in range(30)]
+    queries = [random_text(rng, ROSTER_CHARS + OTHER_CHARS, 0, 40) for _ in range(fuzzy_kernel.BATCH_SIZE + 50)]
+    bounds = numpy_kernel(keys).bounds(queries)
+    assert len(bounds) == len(queries)
+    for query, row in zip(queries[::7], bounds[::7]):
+        for key, bound in zip(keys, row):
+            assert SequenceMatcher(None, query, key).ratio() <= bound
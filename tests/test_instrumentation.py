@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""El hilo que muestrea el RSS no sobrevive a su ejecución (modo --watch)."""
+
+import json
+import threading
+
+import instrumentation
+
+
+def test_runs_do_not_leak_sampler_threads(tmp_path):
+    instrumentation.current().close()
+    before = threading.active_count()
+    for run in range(5):
+        instrumentation.start_run('test')
+        with instrumentation.stage('load', rows=10):
+            pass
+        with instrumentation.stage('load', rows=5):
+            pass
+        report = instrumentation.save_report(str(tmp_path / f'report_{run}.json'))
+        assert threading.active_count() == before
+    assert report['stages'][0]['rows'] == 15
+    assert report['stages'][0]['calls'] == 2
+    with open(tmp_path / 'report_4.json', encoding='utf-8') as f:
+        assert json.load(f)['script'] == 'test'
+
+
+def test_start_run_stops_the_previous_sampler():
+    instrumentation.current().close()
+    before = threading.active_count()
+    for _ in range(5):
+        instrumentation.start_run('test')
+        with instrumentation.stage('load'):
+            pass
+    assert threading.active_count() == before + 1
+    instrumentation.current().close()
+    assert threading.active_count() == before
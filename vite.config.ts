@@ -36,6 +36,10 @@ export default defineConfig({
       "localhost",
       "127.0.0.1",
     ],
+    // Local query service (python query_service.py)
+    proxy: {
+      "/api": "http://127.0.0.1:8765",
+    },
     fs: {
       strict: true,
       deny: ["**/.*"],
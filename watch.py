@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vigilancia de los exports para el modo --watch de process_data_v2.py.
+
+`FileWatcher` revisa cada POLL_SECONDS las rutas que le entrega `sources`
+(una función, para que un directorio o glob de exports incluya los archivos
+nuevos) y reporta los archivos creados, modificados o borrados. Un archivo
+solo se reporta cuando su mtime y tamaño ya no cambian entre dos revisiones,
+así que un export que todavía se está copiando no se procesa a medias.
+
+Se usa sondeo (polling) y no inotify: inotify no está en la biblioteca
+estándar y no funciona en carpetas montadas por red; con pocos archivos
+revisar su stat cada dos segundos no cuesta nada.
+"""
+
+import os
+import time
+
+# Segundos entre revisiones
+POLL_SECONDS = 2.0
+
+
+def file_signatures(paths):
+    """{ruta: (mtime_ns, tamaño)} de las rutas que existen."""
+    signatures = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+class FileWatcher:
+    """Detecta cambios en un conjunto de archivos que puede crecer."""
+
+    def __init__(self, sources, interval=POLL_SECONDS):
+        self.sources = sources
+        self.interval = interval
+        self._seen = file_signatures(sources())
+
+    def poll(self):
+        """
+        Archivos que cambiaron desde la última vez que se reportaron y que ya
+        no se están escribiendo (conjunto vacío si no hay cambios).
+        """
+        current = file_signatures(self.sources())
+        if current == self._seen:
+            return set()
+        # Esperar una revisión más: si algo sigue cambiando, se reporta después
+        time.sleep(self.interval)
+        settled = file_signatures(self.sources())
+        if settled != current:
+            return set()
+        changed = {path for path in settled.keys() | self._seen.keys()
+                   if settled.get(path) != self._seen.get(path)}
+        self._seen = settled
+        return changed
+
+    def wait(self):
+        """Bloquea hasta que haya cambios y los retorna."""
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            time.sleep(self.interval)